@@ -0,0 +1,295 @@
+"""
+Play-to-Earn Web Dashboard (async)
+The routes of web_dashboard.py on an ASGI stack (Quart) with AsyncWeb3, so
+slow RPC calls wait on the event loop instead of holding a worker thread.
+Run with `python async_dashboard.py` or `hypercorn async_dashboard:app`.
+"""
+
+import asyncio
+import json
+import logging
+import time
+from types import SimpleNamespace
+
+try:
+    from quart import Quart, Response, g, jsonify, request
+except ImportError as e:  # optional dependency, only needed for this server
+    raise ImportError("The async dashboard needs Quart: pip install quart") from e
+from web3 import Web3
+
+from balance_cache import AsyncBalanceCache
+from balance_reader import AsyncBalanceReader
+from event_stream import AsyncBlockWatcher
+from metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, REGISTRY
+from rpc_provider import make_async_web3
+from structured_logging import configure_logging
+from web_dashboard import (
+    BALANCE_CACHE_MAX_ENTRIES, BALANCE_CACHE_TTL, CONTRACT_ADDRESS, HTTP_REQUEST_SECONDS,
+    INDEXER_POLL_INTERVAL, LEADERBOARD_LEVEL_POLL_INTERVAL, LEADERBOARD_MAX_PAGE, MAX_BALANCE_WALLETS,
+    MULTICALL_ADDRESS, PLAYER_WALLET, RPC_MAX_RETRIES, RPC_POOL_SIZE, RPC_TIMEOUT, RPC_URLS,
+    STATIC_MAX_AGE, STREAM_BLOCK_POLL_INTERVAL, STREAM_KEEPALIVE, PreparedBody, apply_gzip, broadcaster,
+    chain, dashboard_page, game_data, game_store, hashed_assets, leaderboard, route_label,
+    set_cache_headers, static_assets,
+)
+
+app = Quart(__name__, static_folder=None)
+
+log = logging.getLogger("dashboard")
+_fallback_log = logging.getLogger("dashboard.fallback")
+
+# Game state, the event index, the leaderboard, rendered pages and the broadcaster are
+# shared with web_dashboard; only the request-path RPC is async here
+_async_chain = None
+
+
+def async_chain():
+    """AsyncWeb3, its balance cache and block watcher, built on first use (only ever on the event loop)"""
+    global _async_chain
+    if _async_chain is None:
+        w3 = make_async_web3(RPC_URLS, timeout=RPC_TIMEOUT, max_retries=RPC_MAX_RETRIES, pool_size=RPC_POOL_SIZE)
+        _async_chain = SimpleNamespace(
+            w3=w3,
+            balance_cache=AsyncBalanceCache(
+                AsyncBalanceReader(w3, CONTRACT_ADDRESS, MULTICALL_ADDRESS),
+                ttl=BALANCE_CACHE_TTL,
+                max_entries=BALANCE_CACHE_MAX_ENTRIES
+            ),
+            block_watcher=AsyncBlockWatcher(w3, on_new_block, poll_interval=STREAM_BLOCK_POLL_INTERVAL),
+        )
+    return _async_chain
+
+
+async def on_new_block(block_number):
+    """Re-read the balance once per block and push it only if it changed"""
+    if not broadcaster.subscriber_count():
+        return
+    try:
+        balance = await async_chain().balance_cache.get_balance(PLAYER_WALLET)
+    except Exception as e:
+        log.warning("Stream balance refresh failed: %s", e)
+        return
+    previous = broadcaster.latest("balance")
+    if previous is None or previous["balance"] != balance:
+        broadcaster.publish("balance", {"balance": balance, "block": block_number})
+
+
+
+async def conditional_response(prepared, mimetype, last_modified=None, max_age=None):
+    """web_dashboard.conditional_response for Quart"""
+    response = Response(prepared.body, mimetype=mimetype)
+    set_cache_headers(response, prepared, last_modified, max_age)
+    await response.make_conditional(request)
+    apply_gzip(response, prepared, request)
+    return response
+
+
+async def conditional_json(payload, last_modified=None):
+    body = json.dumps(payload, separators=(",", ":"), sort_keys=True).encode()
+    return await conditional_response(PreparedBody(body), "application/json", last_modified)
+
+
+def checksum(wallet):
+    try:
+        return Web3.to_checksum_address(wallet)
+    except ValueError:
+        return None
+
+
+def invalid_wallet(wallet):
+    return jsonify({"error": f"Invalid wallet address: {wallet}"}), 400
+
+
+@app.before_request
+async def start_request_timer():
+    g.request_started = time.perf_counter()
+
+
+@app.after_request
+async def record_request_latency(response):
+    started = g.pop("request_started", None)
+    if started is not None:
+        HTTP_REQUEST_SECONDS.labels(
+            route_label(request.url_rule), request.method, response.status_code
+        ).observe(time.perf_counter() - started)
+    return response
+
+
+@app.route('/')
+async def dashboard():
+    return await conditional_response(dashboard_page(PLAYER_WALLET, "legacy"), "text/html")
+
+@app.route('/players/<wallet>')
+async def player_dashboard(wallet):
+    address = checksum(wallet)
+    if address is None:
+        return invalid_wallet(wallet)
+    return await conditional_response(dashboard_page(address, "player"), "text/html")
+
+@app.route('/assets/<name>')
+async def static_asset(name):
+    if name in hashed_assets:
+        prepared, mimetype = hashed_assets[name]
+        return await conditional_response(prepared, mimetype, max_age=STATIC_MAX_AGE)
+    if name in static_assets:
+        _, prepared, mimetype = static_assets[name]
+        return await conditional_response(prepared, mimetype)
+    return jsonify({"error": "Not found"}), 404
+
+@app.route('/api/balance')
+async def get_balance():
+    try:
+        try:
+            balance = await async_chain().balance_cache.get_balance(PLAYER_WALLET)
+        except Exception as contract_error:
+            if not await async_chain().w3.is_connected():
+                return jsonify({
+                    "error": "Not connected to blockchain. Is Ganache running on port 8545?"
+                }), 500
+            balance = await async_chain().w3.eth.get_balance(Web3.to_checksum_address(PLAYER_WALLET))
+            _fallback_log.warning(
+                "Contract call failed (%s); showing ETH wallet balance instead: %s Wei",
+                contract_error, balance, extra={"wallet": PLAYER_WALLET}
+            )
+
+        return jsonify({
+            "balance": balance,
+            "level": game_data["level"],
+            "completed_tasks": sum(1 for t in game_data["tasks"] if t["completed"]),
+            "tasks": game_data["tasks"]
+        })
+    except Exception as e:
+        log.error("Error in get_balance: %s", e)
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/players/<wallet>')
+async def get_player(wallet):
+    address = checksum(wallet)
+    if address is None:
+        return invalid_wallet(wallet)
+    # SQLite reads run on a worker thread so the loop keeps serving RPC-bound requests
+    player = await asyncio.to_thread(game_store.get_player, address)
+    if player is None:
+        return jsonify({"error": "Unknown player"}), 404
+    try:
+        player["balance"] = await async_chain().balance_cache.get_balance(address)
+    except Exception as e:
+        log.error("Error in get_player: %s", e, extra={"wallet": address})
+        return jsonify({"error": str(e)}), 500
+    del player["updated_at"]
+    return await conditional_json(player)
+
+@app.route('/api/players/<wallet>/tasks')
+async def get_player_tasks(wallet):
+    address = checksum(wallet)
+    if address is None:
+        return invalid_wallet(wallet)
+    player = await asyncio.to_thread(game_store.get_player, address)
+    if player is None:
+        return jsonify({"error": "Unknown player"}), 404
+    tasks = await asyncio.to_thread(game_store.get_tasks, address)
+    return await conditional_json({"wallet": address, "tasks": tasks}, player["updated_at"])
+
+@app.route('/api/balances')
+async def get_balances():
+    wallets = [w.strip() for w in request.args.get("wallets", "").split(",") if w.strip()]
+    if not wallets:
+        return jsonify({"error": "Pass wallets=<address>,<address>,..."}), 400
+    if len(wallets) > MAX_BALANCE_WALLETS:
+        return jsonify({"error": f"At most {MAX_BALANCE_WALLETS} wallets per request"}), 400
+    addresses = [checksum(w) for w in wallets]
+    if None in addresses:
+        return invalid_wallet(wallets[addresses.index(None)])
+
+    try:
+        return jsonify({"balances": await async_chain().balance_cache.get_balances(addresses)})
+    except Exception as e:
+        log.error("Error in get_balances: %s", e, extra={"wallets": len(addresses)})
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/history/<wallet>')
+async def get_history(wallet):
+    address = checksum(wallet)
+    if address is None:
+        return invalid_wallet(wallet)
+    event_indexer = chain().event_indexer
+    event_indexer.start(poll_interval=INDEXER_POLL_INTERVAL)
+    limit = min(max(request.args.get("limit", 50, type=int), 1), 500)
+    offset = max(request.args.get("offset", 0, type=int), 0)
+    total_earned, history = await asyncio.to_thread(
+        lambda: (event_indexer.total_earned(address), event_indexer.history(address, limit=limit, offset=offset))
+    )
+    return jsonify({
+        "wallet": address,
+        "total_earned": total_earned,
+        "indexed_to_block": event_indexer.last_indexed_block,
+        "history": history
+    })
+
+@app.route('/api/leaderboard')
+async def get_leaderboard():
+    # First call replays the index into the leaderboard, so keep it off the loop
+    event_indexer = chain().event_indexer
+    await asyncio.to_thread(
+        leaderboard.start, event_indexer, game_store, LEADERBOARD_LEVEL_POLL_INTERVAL,
+        chain().balance_cache.reader
+    )
+    event_indexer.start(poll_interval=INDEXER_POLL_INTERVAL)
+    limit = min(max(request.args.get("limit", 50, type=int), 1), LEADERBOARD_MAX_PAGE)
+    offset = max(request.args.get("offset", 0, type=int), 0)
+    result = {
+        "total": len(leaderboard),
+        "offset": offset,
+        "limit": limit,
+        "indexed_to_block": event_indexer.last_indexed_block,
+        "players": leaderboard.page(offset, limit)
+    }
+    wallet = request.args.get("wallet")
+    if wallet:
+        address = checksum(wallet)
+        if address is None:
+            return invalid_wallet(wallet)
+        result["player"] = leaderboard.entry(address)
+    return jsonify(result)
+
+@app.route('/api/update-task/<int:task_id>')
+async def update_task(task_id):
+    for task in game_data["tasks"]:
+        if task["id"] == task_id:
+            if not task["completed"]:
+                task["completed"] = True
+                broadcaster.publish("task", task)
+            break
+    return jsonify({"status": "updated"})
+
+@app.route('/api/stream')
+async def stream():
+    """Server-Sent Events feed of balance and task changes"""
+    async_chain().block_watcher.start()
+    response = Response(
+        broadcaster.astream(keepalive=STREAM_KEEPALIVE),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+    # Streams stay open for as long as the client is connected
+    response.timeout = None
+    return response
+
+@app.route('/metrics')
+async def metrics():
+    """Prometheus scrape endpoint"""
+    return Response(REGISTRY.render(), content_type=METRICS_CONTENT_TYPE)
+
+@app.after_serving
+async def shutdown():
+    if _async_chain is not None:
+        await _async_chain.block_watcher.stop()
+        await _async_chain.w3.provider.disconnect()
+
+if __name__ == '__main__':
+    configure_logging()
+    log.info("Starting Play-to-Earn Web Dashboard (async)...")
+    log.info("RPC URLs: %s", ", ".join(RPC_URLS))
+    log.info("Contract: %s", CONTRACT_ADDRESS)
+    log.info("Player Wallet: %s", PLAYER_WALLET)
+    log.info("Open your browser and go to: http://localhost:5000")
+    app.run(port=5000)
@@ -0,0 +1,273 @@
+"""
+Award Transaction Sender
+Signs and broadcasts awardTokens/batchAwardTokens transactions from one
+wallet using pre-encoded templates, shared by the single-player game and
+the game server
+"""
+
+import os
+import time
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from web3 import Web3
+
+from fee_oracle import FeeOracle
+from metrics import Counter, Histogram
+from nonce_manager import NonceManager
+from reward_batching import chunked, iter_chunks
+from tx_templates import AwardTxTemplate, encode_award_tokens, encode_batch_award_tokens
+
+
+AWARD_SIGNING_SECONDS = Histogram(
+    "award_signing_seconds", "Time to sign one award transaction in this process",
+    buckets=(0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1),
+)
+AWARD_TRANSACTIONS = Counter(
+    "award_transactions_total", "Award transactions handed to the node, by outcome", ["result"]
+)
+_SIGNING = AWARD_SIGNING_SECONDS.labels()
+_SENT = AWARD_TRANSACTIONS.labels("sent")
+_SEND_FAILED = AWARD_TRANSACTIONS.labels("failed")
+
+
+class WindowAborted(Exception):
+    """send_awards() result for an award that was never signed or sent because an earlier one failed"""
+
+
+def _fresh_address() -> str:
+    """Never-used recipient, so gas estimates include the cost of a new balance slot"""
+    return Web3.to_checksum_address(os.urandom(20))
+
+
+class AwardSender:
+    """Sends award transactions with locally allocated nonces; never waits for receipts"""
+
+    def __init__(self, w3, contract, sender_wallet: str, private_key: str, config, signing_pool=None,
+                 ledger=None):
+        """config is a BlockchainConfig-style class (gas limits, retries, batch settings);
+        signing_pool is an optional SigningPool used by send_awards(); ledger is an optional
+        RewardLedger that gets every signed transaction before it is broadcast"""
+        self.w3 = w3
+        self.contract = contract
+        self.sender_wallet = sender_wallet
+        self.private_key = private_key
+        self.config = config
+        self.nonce_manager = NonceManager(w3, sender_wallet)
+        self.fee_oracle = FeeOracle(
+            w3,
+            urgency=config.FEE_URGENCY,
+            refresh_interval=config.FEE_REFRESH_INTERVAL,
+            gas_margin=config.GAS_LIMIT_MARGIN,
+            use_eip1559=config.USE_EIP1559,
+        )
+        self.signing_pool = signing_pool
+        self.ledger = ledger
+        self._chain_id = None
+        self._template = None
+
+    @property
+    def chain_id(self) -> int:
+        """Chain id of the connected node, fetched once"""
+        if self._chain_id is None:
+            self._chain_id = self.w3.eth.chain_id
+        return self._chain_id
+
+    def send_award(self, player: str, amount: int, urgency: Optional[str] = None,
+                   award_ids: Iterable[str] = ()) -> str:
+        """Sign and broadcast an awardTokens transaction without waiting for its receipt"""
+        return self._send_transaction(encode_award_tokens(player, amount), self._award_gas(), urgency, award_ids)
+
+    def send_batch_award(self, players: List[str], amounts: List[int], urgency: Optional[str] = None,
+                         award_ids: Iterable[str] = ()) -> str:
+        """Sign and broadcast one batchAwardTokens transaction covering several players"""
+        count = len(players)
+        gas = self.fee_oracle.gas_limit(
+            ("batchAwardTokens", count),
+            lambda: self._estimate(self.contract.functions.batchAwardTokens(
+                [_fresh_address() for _ in range(count)], [1] * count
+            )),
+            self.config.BATCH_AWARD_GAS_PER_PLAYER * count,
+        )
+        return self._send_transaction(encode_batch_award_tokens(players, amounts), gas, urgency, award_ids)
+
+    def send_awards(self, awards: Iterable[Tuple], urgency: Optional[str] = None, window: int = 500,
+                    before_send: Optional[Callable[[Tuple, int, bytes], None]] = None) -> Iterator[Tuple[Tuple, object]]:
+        """Sign many awards (in the signing pool if there is one) and broadcast them in nonce order.
+
+        Each award is a (player, amount, ...) tuple; extra fields are passed through untouched.
+        Yields (award, tx_hash or Exception) in input order: ValueError for an award that cannot
+        be encoded, WindowAborted for awards skipped after a failed send. before_send(award, nonce, raw_tx)
+        runs right before each broadcast, e.g. to journal it. Consume the iterator to the end,
+        since nonces are reserved a window at a time.
+        """
+        for chunk in iter_chunks(awards, window):
+            yield from self._send_award_window(chunk, urgency, before_send)
+
+    def _send_award_window(self, awards: List[Tuple], urgency: Optional[str], before_send):
+        calldata = {}
+        invalid = {}
+        for position, award in enumerate(awards):
+            try:
+                calldata[position] = encode_award_tokens(award[0], award[1])
+            except ValueError as e:
+                invalid[position] = e
+        signed = iter(())
+        if calldata:
+            gas = self._award_gas()
+            fees = self.fee_oracle.fee_fields(urgency)
+
+        failed = None
+        nonce = None
+        sent = 0
+        try:
+            if calldata:
+                # Inside the try: if signing fails, the reserved range is handed back below
+                nonce = self.nonce_manager.allocate_range(len(calldata))
+                jobs = [(data, nonce + i, gas, fees) for i, data in enumerate(calldata.values())]
+                if self.signing_pool is not None:
+                    signed = self.signing_pool.sign(jobs)
+                else:
+                    signed = (self._sign(*job) for job in jobs)
+            for position, award in enumerate(awards):
+                if position in invalid:
+                    yield award, invalid[position]
+                    continue
+                if failed is not None:
+                    yield award, WindowAborted(f"Not sent: an earlier award in this window failed ({failed})")
+                    continue
+                try:
+                    raw_tx = next(signed)
+                    if before_send is not None:
+                        before_send(award, nonce, raw_tx)
+                    tx_hash = self._broadcast(raw_tx)
+                except Exception as e:
+                    _SEND_FAILED.inc()
+                    # Later nonces in the window can no longer be mined, so hand them back
+                    failed = e
+                    yield award, e
+                    continue
+                nonce += 1
+                sent += 1
+                _SENT.inc()
+                yield award, tx_hash
+        finally:
+            if nonce is not None and sent < len(calldata):
+                # Unused nonces in the range would leave a gap; the next allocate asks the node
+                self.nonce_manager.invalidate()
+
+    def send_reward_batch(self, awards: Dict[str, int], award_ids: Optional[Dict[str, List[str]]] = None) -> Dict:
+        """Flush callback for the reward batcher: one award per player or one batch call per chunk"""
+        award_ids = award_ids or {}
+        results = {}
+        players = list(awards)
+        if self.config.USE_BATCH_AWARD and len(players) > 1:
+            for chunk in chunked(players, self.config.BATCH_AWARD_MAX_PLAYERS):
+                try:
+                    tx_hash = self.send_batch_award(
+                        chunk, [awards[p] for p in chunk],
+                        award_ids=[award_id for p in chunk for award_id in award_ids.get(p, ())]
+                    )
+                except Exception as e:
+                    tx_hash = e
+                results.update({player: tx_hash for player in chunk})
+            return results
+
+        if self.signing_pool is not None and len(players) > 1:
+            signed = {}
+
+            def record_signed(award, nonce, raw_tx):
+                if award[2]:
+                    signed[award[0]] = self.ledger.record_signed(award[2], self.sender_wallet, nonce, raw_tx)
+
+            batch = ((p, awards[p], award_ids.get(p, ())) for p in players)
+            for (player, _, _), result in self.send_awards(batch, before_send=record_signed if self.ledger else None):
+                self._after_send(signed.get(player), result if isinstance(result, Exception) else None)
+                results[player] = result
+            return results
+
+        for player in players:
+            try:
+                results[player] = self.send_award(player, awards[player], award_ids=award_ids.get(player, ()))
+            except Exception as e:
+                results[player] = e
+        return results
+
+    def _award_gas(self) -> int:
+        return self.fee_oracle.gas_limit(
+            ("awardTokens",),
+            lambda: self._estimate(self.contract.functions.awardTokens(_fresh_address(), 1)),
+            self.config.AWARD_GAS,
+        )
+
+    def _estimate(self, call) -> int:
+        return call.estimate_gas({'from': self.sender_wallet})
+
+    @property
+    def template(self) -> AwardTxTemplate:
+        """Signing template for this contract and key, built on first use"""
+        if self._template is None:
+            self._template = AwardTxTemplate(self.contract.address, self.private_key, self.chain_id)
+        return self._template
+
+    def _sign(self, data: bytes, nonce: int, gas: int, fees: Dict) -> bytes:
+        started = time.perf_counter()
+        raw_tx = self.template.sign(data, nonce, gas, fees)
+        _SIGNING.observe(time.perf_counter() - started)
+        return raw_tx
+
+    def _broadcast(self, raw_tx: bytes) -> str:
+        """send_raw_transaction; "already known" means an earlier (retried) attempt landed, so it counts as sent"""
+        try:
+            return self.w3.to_hex(self.w3.eth.send_raw_transaction(raw_tx))
+        except Exception as e:
+            message = str(e).lower()
+            if "already known" in message or "known transaction" in message:
+                return self.w3.to_hex(Web3.keccak(raw_tx))
+            raise
+
+    def _after_send(self, ledger_tx: Optional[str], error: Optional[Exception] = None):
+        """Move a journaled transaction on once its broadcast succeeded or failed"""
+        if self.ledger is None or ledger_tx is None:
+            return
+        if error is None:
+            self.ledger.mark_sent(ledger_tx)
+        elif NonceManager.is_nonce_error(error):
+            self.ledger.mark_unsigned(ledger_tx)
+        elif not isinstance(error, (OSError, TimeoutError)):
+            # The node answered with an error, so it did not accept the transaction
+            self.ledger.mark_rejected(ledger_tx, str(error))
+        # Otherwise it may have reached the node; RewardLedger.reconcile() settles it later
+
+    def _send_transaction(self, data: bytes, gas: int, urgency: Optional[str] = None,
+                          award_ids: Iterable[str] = ()) -> str:
+        """Sign and send calldata to the contract with a locally allocated nonce"""
+        award_ids = list(award_ids)
+        attempts = self.config.NONCE_RETRIES + 1
+        for attempt in range(attempts):
+            nonce = self.nonce_manager.allocate()
+            ledger_tx = None
+            try:
+                # Only nonce, fees, gas and calldata vary; fees come from the oracle's short-lived (time-based) cache
+                raw_tx = self._sign(data, nonce, gas, self.fee_oracle.fee_fields(urgency))
+                if self.ledger is not None and award_ids:
+                    ledger_tx = self.ledger.record_signed(award_ids, self.sender_wallet, nonce, raw_tx)
+                tx_hash = self._broadcast(raw_tx)
+            except Exception as e:
+                _SEND_FAILED.inc()
+                self._after_send(ledger_tx, e)
+                if "underpriced" in str(e).lower() or "base fee" in str(e).lower():
+                    self.fee_oracle.invalidate()
+                if NonceManager.is_nonce_error(e):
+                    # Another sender used this wallet or a transaction was dropped
+                    self.nonce_manager.resync()
+                    if attempt + 1 < attempts:
+                        continue
+                elif isinstance(e, (OSError, TimeoutError)):
+                    # It may be in the mempool already, so ask the node before this nonce is used again
+                    self.nonce_manager.invalidate()
+                else:
+                    self.nonce_manager.release(nonce)
+                raise
+            _SENT.inc()
+            self._after_send(ledger_tx)
+            return tx_hash
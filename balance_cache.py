@@ -0,0 +1,243 @@
+"""
+Shared Balance Cache
+LRU-bounded cache of token balances keyed by (contract, wallet) that is
+invalidated per block or by TTL and coalesces concurrent lookups
+(threads, or asyncio tasks in AsyncBalanceCache)
+"""
+
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+from web3 import Web3
+
+from metrics import Counter
+
+BALANCE_CACHE_LOOKUPS = Counter("balance_cache_lookups_total", "Balance cache lookups by result", ["result"])
+_HITS = BALANCE_CACHE_LOOKUPS.labels("hit")
+_MISSES = BALANCE_CACHE_LOOKUPS.labels("miss")
+
+
+class _Entry:
+    __slots__ = ("balance", "block", "fetched_at")
+
+    def __init__(self, balance: int, block: Optional[int], fetched_at: float):
+        self.balance = balance
+        self.block = block
+        self.fetched_at = fetched_at
+
+
+class _InFlight:
+    __slots__ = ("done", "balance", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.balance = None
+        self.error = None
+
+
+class _CacheBase:
+    """Entry storage and expiry shared by BalanceCache and AsyncBalanceCache"""
+
+    def __init__(self, reader, ttl: float = 15.0, max_entries: int = 10000,
+                 per_block: bool = True, block_poll_interval: float = 1.0):
+        self.reader = reader
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.per_block = per_block
+        self.block_poll_interval = block_poll_interval
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Tuple[str, str], _Entry]" = OrderedDict()
+        self._inflight: Dict = {}
+        self._block: Optional[int] = None
+        self._block_checked_at = float("-inf")
+
+    def invalidate(self, wallet: Optional[str] = None):
+        """Drop one wallet's entry, or everything when no wallet is given"""
+        with self._lock:
+            if wallet is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(self._key(wallet), None)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._entries)}
+
+    def _lookup(self, key, block: Optional[int]) -> Optional[_Entry]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if time.monotonic() - entry.fetched_at >= self.ttl or (
+                self.per_block and block is not None and entry.block != block):
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def _lookup_many(self, wallets: List[str], block: Optional[int]) -> Tuple[Dict[str, int], List[str]]:
+        """(cached balances, wallets that missed)"""
+        balances = {}
+        missing = []
+        with self._lock:
+            for wallet in wallets:
+                entry = self._lookup(self._key(wallet), block)
+                if entry is not None:
+                    balances[wallet] = entry.balance
+                else:
+                    missing.append(wallet)
+            self._count(len(balances), len(missing))
+        return balances, missing
+
+    def _count(self, hits: int, misses: int):
+        """Caller holds the lock"""
+        self.hits += hits
+        self.misses += misses
+        if hits:
+            _HITS.inc(hits)
+        if misses:
+            _MISSES.inc(misses)
+
+    def _store(self, key, balance: int, block: Optional[int]):
+        with self._lock:
+            self._entries[key] = _Entry(balance, block, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _store_many(self, balances: Dict[str, int], fetched: Dict[str, int], missing: List[str],
+                    block: Optional[int]):
+        for wallet, balance in fetched.items():
+            self._store(self._key(wallet), balance, block)
+        for wallet in missing:
+            balances[wallet] = fetched[self._checksum(wallet)]
+
+    def _key(self, wallet: str) -> Tuple[str, str]:
+        return (self.reader.token_address, self._checksum(wallet))
+
+    @staticmethod
+    def _checksum(wallet: str) -> str:
+        return Web3.to_checksum_address(wallet)
+
+
+class BalanceCache(_CacheBase):
+    """Caches BalanceReader results so many viewers share one RPC per block"""
+
+    def __init__(self, reader, **kwargs):
+        super().__init__(reader, **kwargs)
+        self._block_lock = threading.Lock()
+
+    def get_balance(self, wallet: str) -> int:
+        """Cached balance for one wallet; concurrent misses for the same key share one fetch"""
+        key = self._key(wallet)
+        block = self._current_block()
+        with self._lock:
+            entry = self._lookup(key, block)
+            if entry is not None:
+                self._count(1, 0)
+                return entry.balance
+            self._count(0, 1)
+            waiter = self._inflight.get(key)
+            leader = waiter is None
+            if leader:
+                waiter = self._inflight[key] = _InFlight()
+
+        if not leader:
+            waiter.done.wait()
+            if waiter.error is not None:
+                raise waiter.error
+            return waiter.balance
+
+        try:
+            waiter.balance = self.reader.get_balance(wallet)
+            self._store(key, waiter.balance, block)
+            return waiter.balance
+        except Exception as e:
+            waiter.error = e
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            waiter.done.set()
+
+    def get_balances(self, wallets: List[str]) -> Dict[str, int]:
+        """Cached balances for many wallets; all misses are fetched in one batched read"""
+        block = self._current_block()
+        balances, missing = self._lookup_many(wallets, block)
+        if missing:
+            self._store_many(balances, self.reader.get_balances(missing), missing, block)
+        return balances
+
+    def _current_block(self) -> Optional[int]:
+        """Latest block number, refreshed at most once per block_poll_interval for all callers"""
+        if not self.per_block:
+            return None
+        with self._block_lock:
+            now = time.monotonic()
+            if now - self._block_checked_at >= self.block_poll_interval:
+                try:
+                    self._block = self.reader.w3.eth.block_number
+                except Exception:
+                    # Fall back to TTL-only expiry until the node answers again
+                    self._block = None
+                self._block_checked_at = now
+            return self._block
+
+
+class AsyncBalanceCache(_CacheBase):
+    """BalanceCache over an AsyncBalanceReader; concurrent misses await one shared fetch"""
+
+    async def get_balance(self, wallet: str) -> int:
+        key = self._key(wallet)
+        block = await self._current_block()
+        with self._lock:
+            entry = self._lookup(key, block)
+            if entry is not None:
+                self._count(1, 0)
+                return entry.balance
+            self._count(0, 1)
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._inflight[key] = asyncio.get_running_loop().create_future()
+
+        if not leader:
+            # shield: one waiter going away must not cancel the fetch for the others
+            return await asyncio.shield(future)
+
+        try:
+            balance = await self.reader.get_balance(wallet)
+            self._store(key, balance, block)
+            future.set_result(balance)
+            return balance
+        except BaseException as e:
+            future.set_exception(e if isinstance(e, Exception) else Exception("Balance fetch was cancelled"))
+            # Mark the exception as retrieved even if nobody else was waiting
+            future.exception()
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    async def get_balances(self, wallets: List[str]) -> Dict[str, int]:
+        block = await self._current_block()
+        balances, missing = self._lookup_many(wallets, block)
+        if missing:
+            self._store_many(balances, await self.reader.get_balances(missing), missing, block)
+        return balances
+
+    async def _current_block(self) -> Optional[int]:
+        if not self.per_block:
+            return None
+        now = time.monotonic()
+        if now - self._block_checked_at >= self.block_poll_interval:
+            # Claim the refresh first; callers arriving meanwhile use the previous block
+            self._block_checked_at = now
+            try:
+                self._block = await self.reader.w3.eth.block_number
+            except Exception:
+                self._block = None
+        return self._block
@@ -0,0 +1,181 @@
+"""
+Batched Balance Reader
+Reads ERC-20 balanceOf for many wallets in one round-trip, through a
+Multicall3 aggregate call or a JSON-RPC batch request (sync and asyncio)
+"""
+
+import asyncio
+from typing import Dict, List, Optional
+from web3 import Web3
+
+# Well-known Multicall3 deployment address (same on most EVM chains)
+MULTICALL3_ADDRESS = "0xcA11bde05977b3631167028862bE2a173976CA11"
+
+MULTICALL3_ABI = [
+    {
+        "inputs": [{"components": [{"internalType": "address", "name": "target", "type": "address"},
+                                   {"internalType": "bool", "name": "allowFailure", "type": "bool"},
+                                   {"internalType": "bytes", "name": "callData", "type": "bytes"}],
+                    "internalType": "struct Multicall3.Call3[]", "name": "calls", "type": "tuple[]"}],
+        "name": "aggregate3",
+        "outputs": [{"components": [{"internalType": "bool", "name": "success", "type": "bool"},
+                                    {"internalType": "bytes", "name": "returnData", "type": "bytes"}],
+                     "internalType": "struct Multicall3.Result[]", "name": "returnData", "type": "tuple[]"}],
+        "stateMutability": "payable",
+        "type": "function"
+    }
+]
+
+# keccak("balanceOf(address)")[:4]
+BALANCE_OF_SELECTOR = bytes.fromhex("70a08231")
+
+
+def encode_balance_of(wallet: str) -> bytes:
+    """Calldata for balanceOf(wallet) without going through the contract ABI machinery"""
+    return BALANCE_OF_SELECTOR + bytes(12) + bytes.fromhex(wallet[2:])
+
+
+class BalanceReader:
+    """Fetches token balances for many wallets with one request per chunk"""
+
+    def __init__(self, w3, token_address: str, multicall_address: Optional[str] = None,
+                 chunk_size: int = 500):
+        self.w3 = w3
+        self.token_address = Web3.to_checksum_address(token_address)
+        self.chunk_size = chunk_size
+        self.multicall = None
+        if multicall_address:
+            self.multicall = w3.eth.contract(
+                address=Web3.to_checksum_address(multicall_address),
+                abi=MULTICALL3_ABI
+            )
+
+    def get_balance(self, wallet: str, block_identifier="latest") -> int:
+        """Balance of a single wallet"""
+        return self.get_balances([wallet], block_identifier)[Web3.to_checksum_address(wallet)]
+
+    def get_balances(self, wallets: List[str], block_identifier="latest") -> Dict[str, int]:
+        """Balances keyed by checksum address; duplicates are fetched once"""
+        unique = list(dict.fromkeys(Web3.to_checksum_address(w) for w in wallets))
+        balances = {}
+        for start in range(0, len(unique), self.chunk_size):
+            chunk = unique[start:start + self.chunk_size]
+            balances.update(self._read_chunk(chunk, block_identifier))
+        return balances
+
+    def _read_chunk(self, wallets: List[str], block_identifier) -> Dict[str, int]:
+        if self.multicall is not None:
+            return self._read_multicall(wallets, block_identifier)
+        if hasattr(self.w3.provider, "make_batch_request"):
+            try:
+                return self._read_rpc_batch(wallets, block_identifier)
+            except (NotImplementedError, TypeError, AttributeError):
+                # Provider cannot batch (e.g. the in-process eth-tester provider)
+                pass
+        return self._read_sequential(wallets, block_identifier)
+
+    def _read_multicall(self, wallets: List[str], block_identifier) -> Dict[str, int]:
+        calls = [(self.token_address, True, encode_balance_of(w)) for w in wallets]
+        results = self.multicall.functions.aggregate3(calls).call(block_identifier=block_identifier)
+        return _decode_multicall(wallets, results)
+
+    def _read_rpc_batch(self, wallets: List[str], block_identifier) -> Dict[str, int]:
+        responses = self.w3.provider.make_batch_request(
+            _batch_calls(self.token_address, wallets, block_identifier)
+        )
+        return _decode_batch(wallets, responses)
+
+    def _read_sequential(self, wallets: List[str], block_identifier) -> Dict[str, int]:
+        balances = {}
+        for wallet in wallets:
+            result = self.w3.eth.call(
+                {"to": self.token_address, "data": encode_balance_of(wallet)},
+                block_identifier
+            )
+            balances[wallet] = _decode_uint(result, wallet)
+        return balances
+
+
+class AsyncBalanceReader:
+    """BalanceReader for AsyncWeb3; chunks are requested concurrently"""
+
+    def __init__(self, w3, token_address: str, multicall_address: Optional[str] = None,
+                 chunk_size: int = 500):
+        self.w3 = w3
+        self.token_address = Web3.to_checksum_address(token_address)
+        self.chunk_size = chunk_size
+        self.multicall = None
+        if multicall_address:
+            self.multicall = w3.eth.contract(
+                address=Web3.to_checksum_address(multicall_address),
+                abi=MULTICALL3_ABI
+            )
+
+    async def get_balance(self, wallet: str, block_identifier="latest") -> int:
+        balances = await self.get_balances([wallet], block_identifier)
+        return balances[Web3.to_checksum_address(wallet)]
+
+    async def get_balances(self, wallets: List[str], block_identifier="latest") -> Dict[str, int]:
+        unique = list(dict.fromkeys(Web3.to_checksum_address(w) for w in wallets))
+        chunks = [unique[start:start + self.chunk_size] for start in range(0, len(unique), self.chunk_size)]
+        balances = {}
+        for chunk_balances in await asyncio.gather(*(self._read_chunk(c, block_identifier) for c in chunks)):
+            balances.update(chunk_balances)
+        return balances
+
+    async def _read_chunk(self, wallets: List[str], block_identifier) -> Dict[str, int]:
+        if self.multicall is not None:
+            calls = [(self.token_address, True, encode_balance_of(w)) for w in wallets]
+            results = await self.multicall.functions.aggregate3(calls).call(block_identifier=block_identifier)
+            return _decode_multicall(wallets, results)
+        if hasattr(self.w3.provider, "make_batch_request"):
+            try:
+                responses = await self.w3.provider.make_batch_request(
+                    _batch_calls(self.token_address, wallets, block_identifier)
+                )
+                return _decode_batch(wallets, responses)
+            except (NotImplementedError, TypeError, AttributeError):
+                pass
+        results = await asyncio.gather(*(
+            self.w3.eth.call({"to": self.token_address, "data": encode_balance_of(w)}, block_identifier)
+            for w in wallets
+        ))
+        return {wallet: _decode_uint(result, wallet) for wallet, result in zip(wallets, results)}
+
+
+def _batch_calls(token_address: str, wallets: List[str], block_identifier) -> List:
+    if isinstance(block_identifier, int):
+        block_identifier = hex(block_identifier)
+    return [
+        ("eth_call", [{"to": token_address, "data": "0x" + encode_balance_of(w).hex()}, block_identifier])
+        for w in wallets
+    ]
+
+
+def _decode_batch(wallets: List[str], responses) -> Dict[str, int]:
+    if isinstance(responses, dict):
+        # Some nodes answer a rejected batch with one error object
+        raise Exception(f"Batch balance request failed: {responses.get('error')}")
+    responses = sorted(responses, key=lambda r: int(r["id"]))
+    balances = {}
+    for wallet, response in zip(wallets, responses):
+        if "error" in response:
+            raise Exception(f"balanceOf failed for {wallet}: {response['error']}")
+        balances[wallet] = _decode_uint(bytes.fromhex(response["result"][2:]), wallet)
+    return balances
+
+
+def _decode_multicall(wallets: List[str], results) -> Dict[str, int]:
+    balances = {}
+    for wallet, (success, data) in zip(wallets, results):
+        if not success:
+            raise Exception(f"balanceOf reverted for {wallet}")
+        balances[wallet] = _decode_uint(data, wallet)
+    return balances
+
+
+def _decode_uint(data: bytes, wallet: str) -> int:
+    if len(data) < 32:
+        # An empty result means there is no contract code at the token address
+        raise Exception(f"balanceOf returned no data for {wallet}")
+    return int.from_bytes(data[:32], "big")
@@ -0,0 +1,64 @@
+"""
+Award Signing Microbenchmark
+Signed awardTokens transactions per second: contract build_transaction +
+sign_transaction versus the pre-encoded AwardTxTemplate fast path.
+Runs offline (no node needed): python benchmarks/bench_award_signing.py [count]
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from eth_account import Account
+from web3 import Web3
+
+from play_to_earn_game import BlockchainConfig
+from tx_templates import AwardTxTemplate
+
+CHAIN_ID = 80001
+GAS = 100000
+FEES = {"maxFeePerGas": 3 * 10 ** 9, "maxPriorityFeePerGas": 10 ** 9}
+
+
+def bench(label: str, sign_one, count: int) -> float:
+    sign_one(0)  # warm-up
+    started = time.perf_counter()
+    for nonce in range(count):
+        sign_one(nonce)
+    rate = count / (time.perf_counter() - started)
+    print(f"{label:<40} {rate:>10.1f} tx/s")
+    return rate
+
+
+def main(count: int = 500):
+    w3 = Web3()
+    account = Account.create()
+    contract_address = Web3.to_checksum_address(os.urandom(20))
+    player = Web3.to_checksum_address(os.urandom(20))
+    contract = w3.eth.contract(address=contract_address, abi=BlockchainConfig.CONTRACT_ABI)
+    template = AwardTxTemplate(contract_address, account.key, CHAIN_ID)
+
+    def contract_path(nonce):
+        tx = contract.functions.awardTokens(player, 10).build_transaction({
+            "from": account.address,
+            "chainId": CHAIN_ID,
+            "gas": GAS,
+            "nonce": nonce,
+            **FEES,
+        })
+        return w3.eth.account.sign_transaction(tx, account.key).raw_transaction
+
+    def template_path(nonce):
+        return template.sign_award(player, 10, nonce, GAS, FEES)
+
+    assert contract_path(7) == template_path(7), "template output differs from eth_account"
+    print(f"Signing {count} awardTokens transactions per path\n")
+    before = bench("build_transaction + sign_transaction", contract_path, count)
+    after = bench("AwardTxTemplate.sign_award", template_path, count)
+    print(f"\nSpeed-up: {after / before:.2f}x")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 500)
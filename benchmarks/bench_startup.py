@@ -0,0 +1,91 @@
+"""
+Startup Benchmark
+Cold import time of the game and dashboard modules, and how long the CLI takes
+to show its first prompt and (with a dead RPC endpoint) the player-name prompt.
+Every run is a fresh interpreter: python benchmarks/bench_startup.py [runs]
+"""
+
+import os
+import select
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+GAME = os.path.join(ROOT, "play_to_earn_game.py")
+
+# Nothing listens here, so only a lazy connect reaches the name prompt without waiting on RPC retries
+DEAD_RPC_URL = "http://127.0.0.1:9"
+WALLET = "0x7E5F4552091A69125d5DfCb7b8C2659029395Bdf"
+PRIVATE_KEY = "0x" + "00" * 31 + "01"
+PROMPT_TIMEOUT = 60
+
+
+def _env(**overrides) -> dict:
+    env = dict(os.environ, PYTHONPATH=ROOT, PYTHONIOENCODING="utf-8", PYTHONUNBUFFERED="1")
+    env.update(overrides)
+    return env
+
+
+def import_time(module: str) -> float:
+    """Seconds for a fresh interpreter to import module (interpreter start-up excluded)"""
+    code = f"import time; t = time.perf_counter(); import {module}; print(time.perf_counter() - t)"
+    with tempfile.TemporaryDirectory() as workdir:
+        result = subprocess.run(
+            [sys.executable, "-c", code], cwd=workdir, env=_env(), capture_output=True, text=True, check=True
+        )
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def time_to_prompt(prompt: str, answers: str = "", **env) -> float:
+    """Seconds from spawning the game until prompt appears on stdout"""
+    with tempfile.TemporaryDirectory() as workdir:
+        started = time.perf_counter()
+        proc = subprocess.Popen(
+            [sys.executable, GAME], cwd=workdir, env=_env(**env),
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL
+        )
+        try:
+            if answers:
+                proc.stdin.write(answers.encode())
+                proc.stdin.flush()
+            output = b""
+            needle = prompt.encode()
+            while needle not in output:
+                remaining = PROMPT_TIMEOUT - (time.perf_counter() - started)
+                if remaining <= 0 or not select.select([proc.stdout], [], [], remaining)[0]:
+                    raise TimeoutError(f"No {prompt!r} prompt within {PROMPT_TIMEOUT}s")
+                chunk = os.read(proc.stdout.fileno(), 65536)
+                if not chunk:
+                    raise RuntimeError(f"Game exited before {prompt!r}: {output.decode(errors='replace')}")
+                output += chunk
+            return time.perf_counter() - started
+        finally:
+            proc.kill()
+            proc.wait()
+
+
+def report(label: str, samples) -> float:
+    median = statistics.median(samples)
+    print(f"{label:<45} {median * 1000:>9.1f} ms (min {min(samples) * 1000:.1f})")
+    return median
+
+
+def main(runs: int = 5):
+    print(f"Median of {runs} fresh interpreters\n")
+    report("import play_to_earn_game", [import_time("play_to_earn_game") for _ in range(runs)])
+    report("import web_dashboard", [import_time("web_dashboard") for _ in range(runs)])
+    report("first prompt (contract address)", [
+        time_to_prompt("Enter Smart Contract Address") for _ in range(runs)
+    ])
+    credentials = f"{WALLET}\n{WALLET}\n{PRIVATE_KEY}\n"
+    report("player-name prompt, lazy connect, dead RPC", [
+        time_to_prompt("Enter your player name", credentials, RPC_URLS=DEAD_RPC_URL, LAZY_CONNECT="1")
+        for _ in range(runs)
+    ])
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
@@ -0,0 +1,230 @@
+"""
+Game Benchmark Suite
+Hot paths against an in-process chain (benchmarks/local_chain.py), no node or
+network needed: mints/sec through mint_tokens_on_blockchain, balance reads/sec,
+/api/balance p50/p99 under concurrent clients and memory per player session.
+Results are saved as JSON so runs can be compared:
+python benchmarks/bench_suite.py [--output FILE] [--compare EARLIER.json]
+"""
+
+import argparse
+import contextlib
+import gc
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import web3
+from web3 import Web3
+
+from balance_reader import BalanceReader
+from local_chain import LocalChain
+from play_to_earn_game import BlockchainConfig, PlayToEarnGame
+
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+
+
+@contextlib.contextmanager
+def quiet():
+    """Hide the game's progress prints while timing"""
+    with open(os.devnull, "w", encoding="utf-8") as devnull, contextlib.redirect_stdout(devnull):
+        yield
+
+
+def random_wallets(count: int):
+    return [Web3.to_checksum_address(os.urandom(20)) for _ in range(count)]
+
+
+def percentile(samples, pct: int) -> float:
+    return statistics.quantiles(samples, n=100)[pct - 1] if len(samples) > 1 else samples[0]
+
+
+def bench_mints(chain: LocalChain, count: int) -> dict:
+    """Sign, send and wait for the receipt of one awardTokens transaction at a time"""
+    with quiet():
+        game = PlayToEarnGame(chain.token_address, chain.account, chain.private_key, lazy=False, w3=chain.w3)
+        game.mint_tokens_on_blockchain(1)  # warm-up: gas estimate, fee cache, nonce
+        started = time.perf_counter()
+        for _ in range(count):
+            game.mint_tokens_on_blockchain(1)
+        elapsed = time.perf_counter() - started
+        if game.reward_batcher:
+            game.reward_batcher.stop()
+        game.confirmations.stop()
+    return {"count": count, "seconds": elapsed, "per_second": count / elapsed}
+
+
+def bench_reads(chain: LocalChain, count: int, batch_size: int) -> dict:
+    """Single balanceOf calls, and Multicall3 batches of batch_size wallets"""
+    reader = BalanceReader(chain.w3, chain.token_address, chain.multicall_address)
+    wallet = chain.account
+    reader.get_balance(wallet)
+    started = time.perf_counter()
+    for _ in range(count):
+        reader.get_balance(wallet)
+    single = count / (time.perf_counter() - started)
+
+    wallets = random_wallets(batch_size)
+    batches = max(count // batch_size, 1)
+    reader.get_balances(wallets)
+    started = time.perf_counter()
+    for _ in range(batches):
+        reader.get_balances(wallets)
+    batched = batches * batch_size / (time.perf_counter() - started)
+    return {"single_per_second": single, "batch_size": batch_size, "batched_wallets_per_second": batched}
+
+
+def bench_api_balance(chain: LocalChain, clients: int, requests_per_client: int) -> dict:
+    """GET /api/balance from concurrent clients, with the balance cache on and with every read a miss"""
+    import web_dashboard
+
+    web_dashboard.use_web3(chain.w3, chain.token_address, chain.multicall_address)
+    chain.w3.eth.contract(address=chain.token_address, abi=BlockchainConfig.CONTRACT_ABI).functions.awardTokens(
+        web_dashboard.PLAYER_WALLET, 100
+    ).transact({"from": chain.account})
+    cache = web_dashboard.chain().balance_cache
+
+    def client(_):
+        test_client = web_dashboard.app.test_client()
+        latencies = []
+        for _ in range(requests_per_client):
+            started = time.perf_counter()
+            response = test_client.get("/api/balance")
+            latencies.append(time.perf_counter() - started)
+            if response.status_code != 200:
+                raise RuntimeError(f"/api/balance answered {response.status_code}: {response.get_data(as_text=True)}")
+        return latencies
+
+    def run(ttl: float) -> dict:
+        cache.ttl = ttl
+        cache.invalidate()
+        cache.hits = cache.misses = 0
+        started = time.perf_counter()
+        with ThreadPoolExecutor(clients) as pool:
+            latencies = [latency for chunk in pool.map(client, range(clients)) for latency in chunk]
+        elapsed = time.perf_counter() - started
+        return {
+            "requests": len(latencies),
+            "requests_per_second": len(latencies) / elapsed,
+            "p50_ms": percentile(latencies, 50) * 1000,
+            "p99_ms": percentile(latencies, 99) * 1000,
+            "cache": cache.stats(),
+        }
+
+    ttl = cache.ttl
+    with quiet():
+        results = {"clients": clients, "cached": run(ttl), "uncached": run(0)}
+    cache.ttl = ttl
+    return results
+
+
+def bench_sessions(chain: LocalChain, count: int) -> dict:
+    """Python heap held by GameServer per open player session (tracemalloc)"""
+    from game_server import GameServer
+
+    server = GameServer(
+        chain.token_address, chain.account, chain.private_key, w3=chain.w3,
+        db_path=BlockchainConfig.GAME_DB, autosave_interval=0,
+    )
+    wallets = random_wallets(count)
+    server.open_session(wallets[0])  # first-use allocations are not per session
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    for wallet in wallets[1:]:
+        server.open_session(wallet)
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return {"count": count - 1, "bytes_per_session": (after - before) / max(count - 1, 1)}
+
+
+def headline(results: dict) -> dict:
+    """The numbers worth comparing between runs"""
+    return {
+        "mints/s": results["mints"]["per_second"],
+        "balance reads/s": results["balance_reads"]["single_per_second"],
+        "batched balance reads/s": results["balance_reads"]["batched_wallets_per_second"],
+        "/api/balance cached p50 ms": results["api_balance"]["cached"]["p50_ms"],
+        "/api/balance cached p99 ms": results["api_balance"]["cached"]["p99_ms"],
+        "/api/balance uncached p50 ms": results["api_balance"]["uncached"]["p50_ms"],
+        "/api/balance uncached p99 ms": results["api_balance"]["uncached"]["p99_ms"],
+        "bytes/session": results["sessions"]["bytes_per_session"],
+    }
+
+
+def report(results: dict, earlier: dict = None):
+    current = headline(results)
+    previous = headline(earlier["results"]) if earlier else {}
+    for name, value in current.items():
+        line = f"{name:<32} {value:>12.2f}"
+        if name in previous and previous[name]:
+            line += f"   ({value / previous[name]:.2f}x of {previous[name]:.2f})"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the game's hot paths on an in-process chain")
+    parser.add_argument("--mints", type=int, default=200, help="awards minted one by one")
+    parser.add_argument("--reads", type=int, default=500, help="single balance reads")
+    parser.add_argument("--batch-size", type=int, default=100, help="wallets per batched read")
+    parser.add_argument("--clients", type=int, default=8, help="concurrent /api/balance clients")
+    parser.add_argument("--requests", type=int, default=200, help="/api/balance requests per client")
+    parser.add_argument("--sessions", type=int, default=5000, help="player sessions opened for the memory figure")
+    parser.add_argument("--output", help="results file (default: benchmarks/results/suite-<time>.json)")
+    parser.add_argument("--compare", help="earlier results file to print ratios against")
+    args = parser.parse_args()
+
+    output = os.path.abspath(args.output or os.path.join(
+        RESULTS_DIR, f"suite-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    ))
+    earlier = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            earlier = json.load(f)
+
+    started_at = datetime.now().isoformat()
+    # Game and dashboard databases are created in the working directory
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        BlockchainConfig.RECEIPT_POLL_INTERVAL = 0.1
+        chain = LocalChain()
+        print(f"In-process chain ready (token {chain.token_address})\n")
+        results = {}
+        print(f"Minting {args.mints} awards...")
+        results["mints"] = bench_mints(chain, args.mints)
+        print(f"Reading balances ({args.reads} single, batches of {args.batch_size})...")
+        results["balance_reads"] = bench_reads(chain, args.reads, args.batch_size)
+        print(f"/api/balance with {args.clients} clients x {args.requests} requests...")
+        results["api_balance"] = bench_api_balance(chain, args.clients, args.requests)
+        print(f"Opening {args.sessions} player sessions...\n")
+        results["sessions"] = bench_sessions(chain, args.sessions)
+        os.chdir(ROOT)
+
+    report(results, earlier)
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump({
+            "started_at": started_at,
+            "python": platform.python_version(),
+            "web3": web3.__version__,
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "params": vars(args),
+            "results": results,
+        }, f, indent=2)
+    print(f"\nResults saved to {output}")
+
+
+if __name__ == "__main__":
+    main()
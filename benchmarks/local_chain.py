@@ -0,0 +1,138 @@
+"""
+Local In-Process Chain
+An eth-tester (py-evm) chain with the game's token and a Multicall3-compatible
+reader deployed, so benchmarks run without a node or any network access
+"""
+
+import threading
+
+try:
+    from eth_tester import EthereumTester, PyEVMBackend
+except ImportError as e:  # optional dependency, only needed for benchmarks
+    raise ImportError('The local chain needs eth-tester: pip install "eth-tester[py-evm]"') from e
+from web3 import EthereumTesterProvider, Web3
+
+# Minimal token implementing BlockchainConfig.CONTRACT_ABI. The bytecode below is this source
+# compiled with vyper 0.4.3, embedded so running a benchmark needs no compiler
+TOKEN_SOURCE = """
+# pragma version ^0.4.0
+event Transfer:
+    sender: indexed(address)
+    receiver: indexed(address)
+    value: uint256
+
+balanceOf: public(HashMap[address, uint256])
+totalSupply: public(uint256)
+
+@external
+def awardTokens(player: address, amount: uint256):
+    self.balanceOf[player] += amount
+    self.totalSupply += amount
+    log Transfer(sender=empty(address), receiver=player, value=amount)
+
+@external
+def batchAwardTokens(players: DynArray[address, 256], amounts: DynArray[uint256, 256]):
+    assert len(players) == len(amounts)
+    for i: uint256 in range(len(players), bound=256):
+        self.balanceOf[players[i]] += amounts[i]
+        self.totalSupply += amounts[i]
+        log Transfer(sender=empty(address), receiver=players[i], value=amounts[i])
+
+@external
+def transfer(to: address, amount: uint256) -> bool:
+    self.balanceOf[msg.sender] -= amount
+    self.balanceOf[to] += amount
+    log Transfer(sender=msg.sender, receiver=to, value=amount)
+    return True
+"""
+
+TOKEN_BYTECODE = (
+    "0x61033b6100116100003961033b610000f35f3560e01c60026005820660011b61033101601e395f51565b632b581990"
+    "81186100a75760443610341761032d576004358060a01c61032d576040525f6040516020525f5260405f208054602435"
+    "80820182811061032d579050905081555060015460243580820182811061032d57905090506001556040515f7fddf252"
+    "ad1be2c89b69c2b068fc378daa952ba7f163c4a11628f55a4df523b3ef60243560605260206060a3005b6318160ddd81"
+    "18610329573461032d5760015460405260206040f35b6353f329a9811861024d5760443610341761032d576004356004"
+    "0161010081351161032d5780355f81610100811161032d57801561012257905b8060051b6020850101358060a01c6103"
+    "2d578160051b606001526001018181186100fd575b505080604052505060243560040161010081351161032d57803560"
+    "208160051b01808361206037505050612060516040511861032d575f604051610100811161032d57801561024957905b"
+    "80614080525f6140805160405181101561032d5760051b606001516020525f5260405f20805461408051612060518110"
+    "1561032d5760051b612080015180820182811061032d5790509050815550600154614080516120605181101561032d57"
+    "60051b612080015180820182811061032d57905090506001556140805160405181101561032d5760051b606001515f7f"
+    "ddf252ad1be2c89b69c2b068fc378daa952ba7f163c4a11628f55a4df523b3ef614080516120605181101561032d5760"
+    "051b61208001516140a05260206140a0a360010181811861016d575b5050005b6370a082318118610329576024361034"
+    "1761032d576004358060a01c61032d576040525f6040516020525f5260405f205460605260206060f35b63a9059cbb81"
+    "186103295760443610341761032d576004358060a01c61032d576040525f336020525f5260405f208054602435808203"
+    "82811161032d57905090508155505f6040516020525f5260405f20805460243580820182811061032d57905090508155"
+    "50604051337fddf252ad1be2c89b69c2b068fc378daa952ba7f163c4a11628f55a4df523b3ef60243560605260206060"
+    "a3600160605260206060f35b5f5ffd5b5f80fd001800c302870329032985582051f7bebec2269daa0371dccc43d269c8"
+    "4bf7645a2d7d30ba7cbb04b014118e7219033b810a00a1657679706572830004030036"
+)
+
+# aggregate3() subset of Multicall3, enough for BalanceReader's batched reads
+MULTICALL_SOURCE = """
+# pragma version ^0.4.0
+struct Call3:
+    target: address
+    allowFailure: bool
+    callData: Bytes[100]
+
+struct Result:
+    success: bool
+    returnData: Bytes[64]
+
+@external
+@payable
+def aggregate3(calls: DynArray[Call3, 500]) -> DynArray[Result, 500]:
+    out: DynArray[Result, 500] = []
+    for c: Call3 in calls:
+        ok: bool = False
+        data: Bytes[64] = b""
+        ok, data = raw_call(c.target, c.callData, max_outsize=64, revert_on_failure=False)
+        out.append(Result(success=ok, returnData=data))
+    return out
+"""
+
+MULTICALL_BYTECODE = (
+    "0x61024861001161000039610248610000f35f3560e01c6382ad56cb8118610240576023361115610244576004356004"
+    "016101f48135116102445780355f816101f481116102445780156100a057905b8060051b602085010135602085010160"
+    "e0820260600181358060a01c61024457815260208201358060011c610244576020820152604082013582018035606481"
+    "11610244575060208135016040830181838237505050505060010181811861003d575b50508060405250505f6201b5e0"
+    "525f6040516101f4811161024457801561018e57905b60e0810260600180516202b0005260208101516202b020526040"
+    "8101602081510180826202b0405e5050506040366202b0e0376202b000515a6202b04060406202b1808251602084015f"
+    "8787f19050905090506202b1c0523d604081183d60401002186202b160526202b1606060816202b1e05e506202b1c051"
+    "6202b0e05260606202b1e06202b1005e6201b5e0516101f38111610244578060071b6201b600016202b0e05181526020"
+    "810160606202b100825e5050600181016201b5e052506001018181186100c3575b50506020806202b00052806202b000"
+    "015f6201b5e0518083528060051b5f826101f4811161024457801561022a57905b828160051b6020880101528060071b"
+    "6201b6000183602088010160408251825280602083015260208301818301606082825e8051806020830101601f825f03"
+    "163682375050601f19601f82516020010116905090508101905090509050830192506001018181186101be575b505082"
+    "016020019150509050810190506202b000f35b5f5ffd5b5f80fd855820430cc71faf4830c8272015436406befd40d688"
+    "3f99db622495ac8357460f30b71902488000a1657679706572830004030035"
+)
+
+
+class LockedTesterProvider(EthereumTesterProvider):
+    """py-evm is not thread-safe, so concurrent clients take turns"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._lock = threading.Lock()
+
+    def make_request(self, method, params):
+        with self._lock:
+            return super().make_request(method, params)
+
+
+class LocalChain:
+    """Fresh in-process chain; the first funded account deploys the contracts and signs awards"""
+
+    def __init__(self):
+        self.tester = EthereumTester(PyEVMBackend())
+        self.w3 = Web3(LockedTesterProvider(self.tester))
+        self.account = self.w3.eth.accounts[0]
+        self.private_key = self.tester.backend.account_keys[0].to_hex()
+        self.token_address = self.deploy(TOKEN_BYTECODE)
+        self.multicall_address = self.deploy(MULTICALL_BYTECODE)
+
+    def deploy(self, bytecode: str) -> str:
+        tx_hash = self.w3.eth.send_transaction({"from": self.account, "data": bytecode})
+        return self.w3.eth.wait_for_transaction_receipt(tx_hash).contractAddress
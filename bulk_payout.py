@@ -0,0 +1,363 @@
+"""
+Bulk Token Payout
+Streams (wallet, amount) records from a CSV or JSONL file and awards them
+with a bounded number of unconfirmed transactions, journaling every signed
+award so an interrupted run resumes without paying anyone twice
+"""
+
+import argparse
+import csv
+import json
+import logging
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from eth_account import Account
+from eth_utils import keccak
+from web3 import Web3
+
+from play_to_earn_game import BlockchainConfig
+from award_sender import AwardSender
+from reward_batching import iter_chunks
+from reward_ledger import DROPPED, MINED, check_signed_tx
+from rpc_provider import make_web3
+from signing_pool import SigningPool
+from structured_logging import configure_logging
+from tx_confirmations import ConfirmationTracker, receipt_status
+
+log = logging.getLogger("payout")
+
+# Journal statuses
+SIGNED = "signed"  # written before broadcast; may or may not have reached the node
+SENT = "sent"
+CONFIRMED = "confirmed"
+REVERTED = "reverted"
+FAILED = "failed"  # broadcast raised; re-checked on the next run
+UNCONFIRMED = "unconfirmed"  # no receipt before the tracker timeout; re-checked on the next run
+INVALID = "invalid"  # bad wallet or amount, never signed
+
+# Rows whose transaction might still be (or have been) mined
+UNSETTLED = (SIGNED, SENT, FAILED, UNCONFIRMED)
+
+JOURNAL_SCHEMA = """
+CREATE TABLE IF NOT EXISTS payouts (
+    record INTEGER PRIMARY KEY,
+    wallet TEXT NOT NULL,
+    amount TEXT NOT NULL,
+    nonce INTEGER,
+    tx_hash TEXT,
+    raw_tx BLOB,
+    status TEXT NOT NULL,
+    error TEXT,
+    updated_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_payouts_status ON payouts (status);
+CREATE INDEX IF NOT EXISTS idx_payouts_tx_hash ON payouts (tx_hash);
+"""
+
+RESULT_COLUMNS = ("record", "wallet", "amount", "tx_hash", "status", "error")
+
+
+def iter_payouts(path: str) -> Iterator[Tuple[str, object, int]]:
+    """(wallet, amount, record number) per input row, read lazily.
+
+    CSV files need a header with 'wallet' and 'amount' columns; JSONL lines are
+    {"wallet": ..., "amount": ...} objects. Unparseable amounts are passed through
+    as-is and end up marked invalid.
+    """
+    with open(path, newline="", encoding="utf-8") as f:
+        if path.lower().endswith((".jsonl", ".ndjson")):
+            record = 0
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    row = json.loads(line)
+                except ValueError:
+                    row = {"wallet": line.strip(), "amount": None}
+                yield str(row.get("wallet", "")), _parse_amount(row.get("amount")), record
+                record += 1
+            return
+
+        reader = csv.DictReader(f)
+        if not reader.fieldnames or not {"wallet", "amount"} <= set(reader.fieldnames):
+            raise Exception("CSV payout files need a header row with 'wallet' and 'amount' columns")
+        for record, row in enumerate(reader):
+            yield (row["wallet"] or "").strip(), _parse_amount(row["amount"]), record
+
+
+def _parse_amount(value) -> object:
+    try:
+        return int(str(value).strip())
+    except (TypeError, ValueError):
+        return value
+
+
+class PayoutJournal:
+    """SQLite (WAL) checkpoint of every payout record that has been attempted"""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        # Signed rows must be on disk before their transaction is broadcast
+        self._db.execute("PRAGMA synchronous=FULL")
+        self._db.executescript(JOURNAL_SCHEMA)
+
+    def attempted(self, records: List[int]) -> Set[int]:
+        """Which of these records already have a journal row"""
+        if not records:
+            return set()
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT record FROM payouts WHERE record IN ({','.join('?' * len(records))})", records
+            ).fetchall()
+        return {record for record, in rows}
+
+    def record_signed(self, record: int, wallet: str, amount: int, nonce: int, raw_tx: bytes) -> str:
+        tx_hash = Web3.to_hex(keccak(raw_tx))
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO payouts (record, wallet, amount, nonce, tx_hash, raw_tx, status, error, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, NULL, ?)",
+                (record, wallet, str(amount), nonce, tx_hash, raw_tx, SIGNED, datetime.now().isoformat())
+            )
+        return tx_hash
+
+    def record_invalid(self, record: int, wallet: str, amount, error: str):
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO payouts (record, wallet, amount, status, error, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (record, wallet, str(amount), INVALID, error, datetime.now().isoformat())
+            )
+
+    def set_status(self, record: int, status: str, error: Optional[str] = None):
+        with self._lock, self._db:
+            self._db.execute(
+                "UPDATE payouts SET status = ?, error = ?, updated_at = ? WHERE record = ?",
+                (status, error, datetime.now().isoformat(), record)
+            )
+
+    def forget(self, record: int):
+        """Drop a row whose transaction can never be mined, so the record is paid again"""
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM payouts WHERE record = ?", (record,))
+
+    def unsettled(self) -> List[Tuple[int, str, int, str, bytes]]:
+        """(record, wallet, nonce, tx_hash, raw_tx) of rows that may still be mined, in nonce order"""
+        with self._lock:
+            return self._db.execute(
+                f"SELECT record, wallet, nonce, tx_hash, raw_tx FROM payouts "
+                f"WHERE status IN ({','.join('?' * len(UNSETTLED))}) ORDER BY nonce",
+                UNSETTLED
+            ).fetchall()
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._db.execute("SELECT status, COUNT(*) FROM payouts GROUP BY status").fetchall())
+
+    def export(self, results_path: str) -> int:
+        """Stream every row (ordered by record) to a CSV or JSONL results file"""
+        written = 0
+        with self._lock, open(results_path, "w", newline="", encoding="utf-8") as f:
+            rows = self._db.execute(
+                "SELECT record, wallet, amount, tx_hash, status, error FROM payouts ORDER BY record"
+            )
+            jsonl = results_path.lower().endswith((".jsonl", ".ndjson"))
+            writer = csv.writer(f)
+            if not jsonl:
+                writer.writerow(RESULT_COLUMNS)
+            for row in rows:
+                if jsonl:
+                    f.write(json.dumps(dict(zip(RESULT_COLUMNS, row))) + "\n")
+                else:
+                    writer.writerow(row)
+                written += 1
+        return written
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+class BulkPayout:
+    """Pays out records through one AwardSender with at most max_in_flight unconfirmed awards"""
+
+    def __init__(self, sender: AwardSender, journal: PayoutJournal, confirmations: ConfirmationTracker,
+                 max_in_flight: int = 50, urgency: Optional[str] = None):
+        self.sender = sender
+        self.journal = journal
+        self.confirmations = confirmations
+        self.max_in_flight = max_in_flight
+        self.urgency = urgency
+        self._in_flight = 0
+        self._slots = threading.Condition()
+        self._signed: Set[int] = set()
+
+    def recover(self) -> int:
+        """Settle rows left by an interrupted run; returns how many records were re-queued"""
+        rows = self.journal.unsettled()
+        if not rows:
+            return 0
+        w3 = self.sender.w3
+        mined_count = w3.eth.get_transaction_count(self.sender.sender_wallet, "latest")
+        requeued = 0
+        for record, wallet, nonce, tx_hash, raw_tx in rows:
+            outcome, receipt = check_signed_tx(w3, tx_hash, nonce, raw_tx, mined_count)
+            if outcome == MINED:
+                self._settle(record, receipt)
+            elif outcome == DROPPED:
+                # Something else was mined with this nonce, so this transaction never can be
+                self.journal.forget(record)
+                requeued += 1
+            else:
+                self.journal.set_status(record, SENT)
+                with self._slots:
+                    self._in_flight += 1
+                self._track(record, tx_hash)
+        self.sender.nonce_manager.resync()
+        return requeued
+
+    def run(self, payouts: Iterable[Tuple[str, object, int]]) -> Dict[str, int]:
+        """Pay every record not already in the journal, then wait for outstanding receipts"""
+        retry = []
+        for chunk in iter_chunks(payouts, self.max_in_flight):
+            attempted = self.journal.attempted([record for _, _, record in chunk])
+            # Records skipped when a send failed in the last window go out with this one
+            todo = retry + [payout for payout in chunk if payout[2] not in attempted]
+            retry = []
+            if not todo:
+                continue
+            results = self.sender.send_awards(
+                todo, self.urgency, window=len(todo), before_send=self._before_send
+            )
+            for (wallet, amount, record), result in results:
+                if not isinstance(result, Exception):
+                    self.journal.set_status(record, SENT)
+                    self._track(record, result)
+                elif record in self._signed:
+                    self._signed.discard(record)
+                    self._release_slot()
+                    self.journal.set_status(record, FAILED, str(result))
+                elif isinstance(result, ValueError):
+                    self.journal.record_invalid(record, wallet, amount, str(result))
+                else:
+                    # Never signed (WindowAborted, or journaling failed): no row, so a rerun pays it
+                    retry.append((wallet, amount, record))
+        self.confirmations.drain(timeout=self.confirmations.timeout)
+        counts = self.journal.counts()
+        if retry:
+            log.warning("⚠️  %s record(s) were not sent and will be paid on the next run", len(retry))
+            counts["unsent"] = len(retry)
+        return counts
+
+    def _before_send(self, award: Tuple, nonce: int, raw_tx: bytes):
+        """Wait for a free in-flight slot, then journal the signed transaction before it goes out"""
+        wallet, amount, record = award
+        with self._slots:
+            while self._in_flight >= self.max_in_flight:
+                self._slots.wait()
+            self._in_flight += 1
+        try:
+            self.journal.record_signed(record, wallet, amount, nonce, raw_tx)
+        except Exception:
+            self._release_slot()
+            raise
+        self._signed.add(record)
+
+    def _release_slot(self):
+        with self._slots:
+            self._in_flight -= 1
+            self._slots.notify()
+
+    def _track(self, record: int, tx_hash: str):
+        self._signed.discard(record)
+        self.confirmations.track(
+            tx_hash,
+            on_confirmed=lambda h, receipt: self._on_settled(record, receipt),
+            on_failed=lambda h, receipt: self._on_settled(record, receipt),
+        )
+
+    def _on_settled(self, record: int, receipt):
+        self._release_slot()
+        if receipt is None:
+            self.journal.set_status(record, UNCONFIRMED, "No receipt before timeout")
+        else:
+            self._settle(record, receipt)
+
+    def _settle(self, record: int, receipt):
+        if receipt_status(receipt) == 1:
+            self.journal.set_status(record, CONFIRMED)
+        else:
+            self.journal.set_status(record, REVERTED, "Transaction reverted")
+
+
+def main():
+    """Non-interactive payout: python bulk_payout.py payouts.csv --contract 0x..."""
+    BlockchainConfig.load_env()
+    parser = argparse.ArgumentParser(description="Award tokens to every (wallet, amount) in a CSV or JSONL file")
+    parser.add_argument("input", help="CSV with wallet,amount header or JSONL of {wallet, amount}")
+    parser.add_argument("--contract", required=True, help="Deployed token contract address")
+    parser.add_argument("--journal", help="Checkpoint database (default: <input>.journal.db)")
+    parser.add_argument("--results", help="Results file, .csv or .jsonl (default: <input>.results.csv)")
+    parser.add_argument("--max-in-flight", type=int, default=50, help="Unconfirmed awards allowed at once")
+    parser.add_argument("--urgency", choices=("low", "standard", "high"), default=BlockchainConfig.FEE_URGENCY)
+    parser.add_argument("--signing-workers", type=int, default=BlockchainConfig.SIGNING_WORKERS,
+                        help="Worker processes for signing (0 = sign inline)")
+    args = parser.parse_args()
+    configure_logging(default_format="text")
+    if BlockchainConfig.METRICS_PORT:
+        from metrics import start_http_server
+        start_http_server(BlockchainConfig.METRICS_PORT)
+
+    # The key never goes on the command line, where other users could read it
+    private_key = os.getenv("PAYOUT_PRIVATE_KEY") or input("Enter treasury wallet private key: ").strip()
+    treasury_wallet = Account.from_key(private_key).address
+
+    w3 = make_web3(
+        BlockchainConfig.RPC_URLS,
+        timeout=BlockchainConfig.RPC_TIMEOUT,
+        max_retries=BlockchainConfig.RPC_MAX_RETRIES,
+        pool_size=BlockchainConfig.RPC_POOL_SIZE
+    )
+    if not w3.is_connected():
+        log.error("❌ Failed to connect to blockchain!")
+        return
+    contract = w3.eth.contract(address=Web3.to_checksum_address(args.contract), abi=BlockchainConfig.CONTRACT_ABI)
+    sender = AwardSender(w3, contract, treasury_wallet, private_key, BlockchainConfig)
+    if args.signing_workers > 0:
+        sender.signing_pool = SigningPool(contract.address, private_key, sender.chain_id, workers=args.signing_workers)
+    confirmations = ConfirmationTracker(
+        w3,
+        poll_interval=BlockchainConfig.RECEIPT_POLL_INTERVAL,
+        batch_size=BlockchainConfig.RECEIPT_BATCH_SIZE,
+        timeout=BlockchainConfig.RECEIPT_TIMEOUT,
+    )
+    journal = PayoutJournal(args.journal or f"{args.input}.journal.db")
+    payout = BulkPayout(sender, journal, confirmations, max_in_flight=args.max_in_flight, urgency=args.urgency)
+
+    log.info("💸 Paying out %s from %s", args.input, treasury_wallet)
+    confirmations.start()
+    try:
+        requeued = payout.recover()
+        if requeued:
+            log.info("🔁 %s record(s) from the previous run were never mined and will be paid again", requeued)
+        counts = payout.run(iter_payouts(args.input))
+    finally:
+        confirmations.stop()
+        if sender.signing_pool:
+            sender.signing_pool.stop()
+        results_path = args.results or f"{args.input}.results.csv"
+        written = journal.export(results_path)
+        journal.close()
+    log.info("📄 %s result(s) written to %s", written, results_path, extra={"counts": counts})
+    log.info("📊 %s", ", ".join(f"{status}: {count}" for status, count in sorted(counts.items())))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,272 @@
+"""
+Reward Event Indexer
+Scans token Transfer logs in block-range chunks with eth_getLogs and keeps
+a local SQLite history, so reward history and totals never hit the chain
+"""
+
+import logging
+import sqlite3
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+from web3 import Web3
+
+log = logging.getLogger("indexer")
+
+# keccak("Transfer(address,address,uint256)")
+TRANSFER_TOPIC = "0xddf252ad1be2c89b69c2b068fc378daa952ba7f163c4a11628f55a4df523b3ef"
+ZERO_ADDRESS = "0x0000000000000000000000000000000000000000"
+
+# (from, to, amount) as seen by listeners
+Transfer = Tuple[str, str, int]
+# Called with (added, removed) transfers whenever the index changes, removed ones after a reorg
+TransferListener = Callable[[List[Transfer], List[Transfer]], None]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS transfers (
+    token TEXT NOT NULL,
+    block_number INTEGER NOT NULL,
+    log_index INTEGER NOT NULL,
+    tx_hash TEXT NOT NULL,
+    from_addr TEXT NOT NULL,
+    to_addr TEXT NOT NULL,
+    amount TEXT NOT NULL,
+    PRIMARY KEY (token, block_number, log_index)
+);
+CREATE INDEX IF NOT EXISTS idx_transfers_to ON transfers (token, to_addr, block_number);
+CREATE INDEX IF NOT EXISTS idx_transfers_from ON transfers (token, from_addr, block_number);
+CREATE TABLE IF NOT EXISTS indexer_state (
+    token TEXT PRIMARY KEY,
+    last_block INTEGER NOT NULL
+);
+"""
+
+
+class EventIndexer:
+    """Incremental, reorg-tolerant Transfer log indexer for one token contract"""
+
+    def __init__(self, w3, token_address: str, db_path: str = "reward_history.db",
+                 start_block: Optional[int] = None, chunk_size: int = 2000, confirmations: int = 12,
+                 lookback_blocks: int = 50000):
+        """start_block should be the token's deployment block; without it the first sync
+        only covers the last lookback_blocks blocks instead of scanning from genesis"""
+        self.w3 = w3
+        self.token_address = Web3.to_checksum_address(token_address)
+        self.start_block = start_block
+        self.lookback_blocks = lookback_blocks
+        self.chunk_size = chunk_size
+        self.confirmations = confirmations
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        # WAL lets the game and the dashboard read the history while one of them indexes
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(SCHEMA)
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._listeners: List[TransferListener] = []
+
+    @property
+    def last_indexed_block(self) -> Optional[int]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT last_block FROM indexer_state WHERE token = ?", (self.token_address,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def sync(self) -> int:
+        """Index everything up to the chain head; returns the number of logs stored"""
+        head = self.w3.eth.block_number
+        last = self.last_indexed_block
+        if last is None:
+            from_block = self._first_block(head)
+        else:
+            # Re-scan the last few blocks so logs from reorged-out blocks get replaced
+            from_block = max(self.start_block or 0, last + 1 - self.confirmations)
+        if last is not None and last > head:
+            # The chain got shorter (reorg or node reset): drop what is now past the head
+            self._drop_after(head)
+            from_block = max(self.start_block or 0, head + 1 - self.confirmations)
+        if from_block > head:
+            return 0
+
+        stored = 0
+        block = from_block
+        chunk = self.chunk_size
+        while block <= head:
+            to_block = min(block + chunk - 1, head)
+            try:
+                logs = self.w3.eth.get_logs({
+                    "fromBlock": block,
+                    "toBlock": to_block,
+                    "address": self.token_address,
+                    "topics": [TRANSFER_TOPIC],
+                })
+            except Exception:
+                # Providers cap range/result size; retry the same range in smaller pieces
+                if chunk == 1:
+                    raise
+                chunk = max(1, chunk // 2)
+                continue
+            stored += self._store_range(block, to_block, logs)
+            block = to_block + 1
+        return stored
+
+    def _first_block(self, head: int) -> int:
+        if self.start_block is None:
+            self.start_block = max(0, head + 1 - self.lookback_blocks)
+            if self.start_block > 0:
+                log.warning(
+                    "⚠️  INDEXER_START_BLOCK is not set; indexing from block %s (history and totals "
+                    "only cover the last %s blocks)", self.start_block, self.lookback_blocks
+                )
+        return self.start_block
+
+    def _store_range(self, from_block: int, to_block: int, logs: List) -> int:
+        rows = [
+            (
+                self.token_address,
+                log["blockNumber"],
+                log["logIndex"],
+                Web3.to_hex(log["transactionHash"]),
+                _topic_to_address(log["topics"][1]),
+                _topic_to_address(log["topics"][2]),
+                str(int.from_bytes(bytes(log["data"]), "big")),
+            )
+            for log in logs
+            if len(log["topics"]) == 3
+        ]
+        with self._lock:
+            with self._db:
+                removed = self._transfers_where("block_number BETWEEN ? AND ?", (from_block, to_block))
+                self._db.execute(
+                    "DELETE FROM transfers WHERE token = ? AND block_number BETWEEN ? AND ?",
+                    (self.token_address, from_block, to_block)
+                )
+                self._db.executemany("INSERT INTO transfers VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+                self._db.execute(
+                    "INSERT INTO indexer_state (token, last_block) VALUES (?, ?) "
+                    "ON CONFLICT(token) DO UPDATE SET last_block = excluded.last_block",
+                    (self.token_address, to_block)
+                )
+            # Re-scanned blocks come back as removed + added; listeners only need the net change
+            self._notify([(row[4], row[5], int(row[6])) for row in rows], removed)
+        return len(rows)
+
+    def _drop_after(self, block: int):
+        with self._lock:
+            with self._db:
+                removed = self._transfers_where("block_number > ?", (block,))
+                self._db.execute(
+                    "DELETE FROM transfers WHERE token = ? AND block_number > ?",
+                    (self.token_address, block)
+                )
+                self._db.execute(
+                    "UPDATE indexer_state SET last_block = ? WHERE token = ?",
+                    (block, self.token_address)
+                )
+            self._notify([], removed)
+
+    def _transfers_where(self, condition: str, params: Tuple) -> List[Transfer]:
+        if not self._listeners:
+            return []
+        return [
+            (from_addr, to_addr, int(amount))
+            for from_addr, to_addr, amount in self._db.execute(
+                f"SELECT from_addr, to_addr, amount FROM transfers WHERE token = ? AND {condition}",
+                (self.token_address, *params)
+            )
+        ]
+
+    def _notify(self, added: List[Transfer], removed: List[Transfer]):
+        if not (added or removed):
+            return
+        for listener in self._listeners:
+            listener(added, removed)
+
+    def add_listener(self, listener: TransferListener, replay: bool = True, batch_size: int = 10000):
+        """Call listener on every index change; replay first feeds it the transfers already stored.
+
+        Runs under the index lock, so the listener sees each transfer exactly once and must be quick.
+        """
+        with self._lock:
+            if replay:
+                cursor = self._db.execute(
+                    "SELECT from_addr, to_addr, amount FROM transfers WHERE token = ?", (self.token_address,)
+                )
+                while True:
+                    batch = cursor.fetchmany(batch_size)
+                    if not batch:
+                        break
+                    listener([(from_addr, to_addr, int(amount)) for from_addr, to_addr, amount in batch], [])
+            self._listeners.append(listener)
+
+    def history(self, wallet: str, limit: int = 50, offset: int = 0) -> List[Dict]:
+        """Most recent transfers into or out of a wallet"""
+        wallet = Web3.to_checksum_address(wallet)
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT block_number, log_index, tx_hash, from_addr, to_addr, amount FROM transfers "
+                "WHERE token = ? AND to_addr = ? "
+                "UNION ALL "
+                "SELECT block_number, log_index, tx_hash, from_addr, to_addr, amount FROM transfers "
+                "WHERE token = ? AND from_addr = ? AND to_addr != ? "
+                "ORDER BY block_number DESC, log_index DESC LIMIT ? OFFSET ?",
+                (self.token_address, wallet, self.token_address, wallet, wallet, limit, offset)
+            ).fetchall()
+        return [
+            {
+                "block": block_number,
+                "tx_hash": tx_hash,
+                "from": from_addr,
+                "to": to_addr,
+                "amount": int(amount),
+                "award": from_addr == ZERO_ADDRESS,
+            }
+            for block_number, log_index, tx_hash, from_addr, to_addr, amount in rows
+        ]
+
+    def total_earned(self, wallet: str) -> int:
+        """Sum of all awards (mints from the zero address) to a wallet"""
+        wallet = Web3.to_checksum_address(wallet)
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT amount FROM transfers WHERE token = ? AND to_addr = ? AND from_addr = ?",
+                (self.token_address, wallet, ZERO_ADDRESS)
+            ).fetchall()
+        # Amounts are uint256, which can overflow SQLite integers, so sum in Python
+        return sum(int(amount) for (amount,) in rows)
+
+    def start(self, poll_interval: float = 5.0):
+        """Keep the index current from a background thread (only the first call starts it)"""
+        with self._start_lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stopped.clear()
+            self._thread = threading.Thread(
+                target=self._run, args=(poll_interval,), name="event-indexer", daemon=True
+            )
+            self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def close(self):
+        self.stop()
+        with self._lock:
+            self._db.close()
+
+    def _run(self, poll_interval: float):
+        while not self._stopped.is_set():
+            try:
+                self.sync()
+            except Exception as e:
+                log.warning("⚠️  Event indexing failed: %s", e)
+            self._stopped.wait(poll_interval)
+
+
+def _topic_to_address(topic) -> str:
+    data = bytes(topic) if not isinstance(topic, str) else bytes.fromhex(topic[2:])
+    return Web3.to_checksum_address("0x" + data[-20:].hex())
@@ -0,0 +1,193 @@
+"""
+Server-Push Event Stream
+Fans out balance and task updates to connected dashboard clients as
+Server-Sent Events, driven by new-block notifications from the node
+"""
+
+import asyncio
+import json
+import logging
+import queue
+import threading
+from typing import AsyncIterator, Awaitable, Callable, Dict, Iterator, Optional
+
+log = logging.getLogger("stream")
+
+
+class _AsyncSubscriber:
+    """Queue-like handle for an asyncio client; publish() may be called from any thread"""
+    __slots__ = ("loop", "queue")
+
+    def __init__(self, max_queue: int):
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=max_queue)
+
+    def put_nowait(self, item):
+        self.loop.call_soon_threadsafe(self._put, item)
+
+    def _put(self, item):
+        try:
+            self.queue.put_nowait(item)
+        except asyncio.QueueFull:
+            pass
+
+
+class EventBroadcaster:
+    """Delivers published events to every subscriber queue"""
+
+    def __init__(self, max_queue: int = 100):
+        self.max_queue = max_queue
+        self._lock = threading.Lock()
+        self._subscribers = set()
+        self._latest: Dict[str, dict] = {}
+
+    def subscribe(self) -> queue.Queue:
+        """Register a client; it first receives the latest value of every event type"""
+        q = queue.Queue(maxsize=self.max_queue)
+        with self._lock:
+            for event, data in self._latest.items():
+                q.put_nowait((event, data))
+            self._subscribers.add(q)
+        return q
+
+    def subscribe_async(self) -> _AsyncSubscriber:
+        """subscribe() for a client served from the running event loop"""
+        subscriber = _AsyncSubscriber(self.max_queue)
+        with self._lock:
+            for event, data in self._latest.items():
+                subscriber.queue.put_nowait((event, data))
+            self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, q):
+        with self._lock:
+            self._subscribers.discard(q)
+
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return len(self._subscribers)
+
+    def latest(self, event: str) -> Optional[dict]:
+        with self._lock:
+            return self._latest.get(event)
+
+    def publish(self, event: str, data: dict):
+        """Send an event to all subscribers; slow clients lose events rather than block others"""
+        with self._lock:
+            self._latest[event] = data
+            subscribers = list(self._subscribers)
+        for q in subscribers:
+            try:
+                q.put_nowait((event, data))
+            except queue.Full:
+                pass
+
+    def stream(self, keepalive: float = 15.0) -> Iterator[str]:
+        """Generator of SSE frames for one client; unsubscribes when the client goes away"""
+        q = self.subscribe()
+        try:
+            yield "retry: 3000\n\n"
+            while True:
+                try:
+                    event, data = q.get(timeout=keepalive)
+                except queue.Empty:
+                    # Comment line keeps proxies from closing an idle connection
+                    yield ": keepalive\n\n"
+                    continue
+                yield format_sse(event, data)
+        finally:
+            self.unsubscribe(q)
+
+    async def astream(self, keepalive: float = 15.0) -> AsyncIterator[str]:
+        """stream() for asyncio servers: waiting clients cost no thread"""
+        subscriber = self.subscribe_async()
+        try:
+            yield "retry: 3000\n\n"
+            while True:
+                try:
+                    event, data = await asyncio.wait_for(subscriber.queue.get(), keepalive)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                yield format_sse(event, data)
+        finally:
+            self.unsubscribe(subscriber)
+
+
+def format_sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+class BlockWatcher:
+    """Polls the node's block number on a thread and reports each new block once"""
+
+    def __init__(self, w3, on_new_block: Callable[[int], None], poll_interval: float = 1.0):
+        self.w3 = w3
+        self.on_new_block = on_new_block
+        self.poll_interval = poll_interval
+        self.last_block: Optional[int] = None
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+
+    def start(self):
+        """Start watching (safe to call from every request; only the first call starts a thread)"""
+        with self._start_lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stopped.clear()
+            self._thread = threading.Thread(target=self._run, name="block-watcher", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while not self._stopped.is_set():
+            try:
+                block = self.w3.eth.block_number
+                if block != self.last_block:
+                    self.last_block = block
+                    self.on_new_block(block)
+            except Exception as e:
+                log.warning("⚠️  Block watcher error: %s", e)
+            self._stopped.wait(self.poll_interval)
+
+
+class AsyncBlockWatcher:
+    """BlockWatcher for AsyncWeb3: a task on the running loop awaits each new block"""
+
+    def __init__(self, w3, on_new_block: Callable[[int], Awaitable[None]], poll_interval: float = 1.0):
+        self.w3 = w3
+        self.on_new_block = on_new_block
+        self.poll_interval = poll_interval
+        self.last_block: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        """Start watching (safe to call from every request; only the first call starts a task)"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                block = await self.w3.eth.block_number
+                if block != self.last_block:
+                    self.last_block = block
+                    await self.on_new_block(block)
+            except Exception as e:
+                log.warning("⚠️  Block watcher error: %s", e)
+            await asyncio.sleep(self.poll_interval)
@@ -0,0 +1,127 @@
+"""
+Gas Fee Oracle
+Caches base/priority fees for a few seconds (about a block), memoizes gas limits
+per call shape and builds EIP-1559 (type 2) fee fields with urgency tiers
+"""
+
+import logging
+import threading
+import time
+from typing import Callable, Dict, Hashable, Optional
+
+log = logging.getLogger("fees")
+
+# Urgency tier -> (priority fee percentile from recent blocks, base fee multiplier for maxFeePerGas)
+URGENCY_TIERS = {
+    "low": (10, 1.25),
+    "standard": (50, 2.0),
+    "high": (90, 3.0),
+}
+
+PRIORITY_PERCENTILES = [percentile for percentile, _ in URGENCY_TIERS.values()]
+
+
+class FeeOracle:
+    """Fee fields and gas limits for outgoing transactions with as few RPC calls as possible.
+
+    The fee snapshot is time-based: it is reused for refresh_interval seconds rather than
+    keyed on the block, since checking for a new block would cost a call of its own. Keep the
+    interval near the block time; invalidate() forces a refresh after an underpriced rejection.
+    """
+
+    def __init__(self, w3, urgency: str = "standard", history_blocks: int = 5,
+                 refresh_interval: float = 2.0, gas_margin: float = 1.2, use_eip1559: bool = True):
+        if urgency not in URGENCY_TIERS:
+            raise ValueError(f"Unknown urgency tier '{urgency}'")
+        self.w3 = w3
+        self.urgency = urgency
+        self.history_blocks = history_blocks
+        self.refresh_interval = refresh_interval
+        self.gas_margin = gas_margin
+        self.use_eip1559 = use_eip1559
+        self._lock = threading.Lock()
+        self._fees: Optional[Dict] = None
+        self._fetched_at = float("-inf")
+        self._gas_limits: Dict[Hashable, int] = {}
+
+    def fee_fields(self, urgency: Optional[str] = None) -> Dict:
+        """maxFeePerGas/maxPriorityFeePerGas for the tier, or gasPrice on pre-London chains"""
+        urgency = urgency or self.urgency
+        if urgency not in URGENCY_TIERS:
+            raise ValueError(f"Unknown urgency tier '{urgency}'")
+        fees = self._current_fees()
+        if fees["base_fee"] is None:
+            return {"gasPrice": fees["gas_price"]}
+        _, base_multiplier = URGENCY_TIERS[urgency]
+        priority_fee = fees["priority_fees"][urgency]
+        return {
+            "maxPriorityFeePerGas": priority_fee,
+            "maxFeePerGas": int(fees["base_fee"] * base_multiplier) + priority_fee,
+        }
+
+    def gas_limit(self, shape: Hashable, estimate: Callable[[], int], fallback: int) -> int:
+        """Gas limit for a call shape, estimated once (plus a safety margin) and then reused"""
+        with self._lock:
+            cached = self._gas_limits.get(shape)
+        if cached is not None:
+            return cached
+        try:
+            limit = int(estimate() * self.gas_margin)
+        except Exception as e:
+            # Not memoized, so the next send tries the estimate again
+            log.warning("⚠️  Gas estimate for %s failed, using %s: %s", shape, fallback, e)
+            return fallback
+        with self._lock:
+            self._gas_limits[shape] = limit
+        return limit
+
+    def block_number(self) -> Optional[int]:
+        """Block the cached fees were read at"""
+        return self._fees["block"] if self._fees else None
+
+    def invalidate(self):
+        """Drop cached fees, e.g. after the node rejected a transaction as underpriced"""
+        with self._lock:
+            self._fetched_at = float("-inf")
+
+    def _current_fees(self) -> Dict:
+        with self._lock:
+            if self._fees is not None and time.monotonic() - self._fetched_at < self.refresh_interval:
+                return self._fees
+            self._fees = self._fetch_fees()
+            self._fetched_at = time.monotonic()
+            return self._fees
+
+    def _fetch_fees(self) -> Dict:
+        """One eth_feeHistory call covers the next base fee and every tier's priority fee"""
+        if self.use_eip1559:
+            try:
+                history = self.w3.eth.fee_history(self.history_blocks, "latest", PRIORITY_PERCENTILES)
+            except Exception:
+                history = None
+            base_fees = history.get("baseFeePerGas") if history else None
+            if base_fees and base_fees[-1]:
+                return {
+                    "block": history["oldestBlock"] + len(history["gasUsedRatio"]) - 1,
+                    "base_fee": base_fees[-1],
+                    "gas_price": None,
+                    "priority_fees": self._priority_fees(history.get("reward") or []),
+                }
+        return {
+            "block": None,
+            "base_fee": None,
+            "gas_price": self.w3.eth.gas_price,
+            "priority_fees": {},
+        }
+
+    def _priority_fees(self, rewards) -> Dict[str, int]:
+        """Median of each tier's percentile over the sampled blocks"""
+        if not rewards:
+            # Some nodes return no reward samples; ask for the node's own suggestion instead
+            suggested = self.w3.eth.max_priority_fee
+            return {urgency: suggested for urgency in URGENCY_TIERS}
+        fees = {}
+        for index, urgency in enumerate(URGENCY_TIERS):
+            samples = sorted(block_rewards[index] for block_rewards in rewards)
+            fees[urgency] = samples[len(samples) // 2]
+        return fees
@@ -0,0 +1,409 @@
+"""
+Multi-Player Game Server
+Hosts many player sessions in one process on a shared Web3 provider,
+contract, award sender, reward batcher and state store
+"""
+
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+from web3 import Web3
+
+from play_to_earn_game import BlockchainConfig, DEFAULT_TASKS
+from award_sender import AwardSender
+from reward_batching import RewardBatcher
+from tx_confirmations import ConfirmationTracker
+from game_store import GameStore
+from task_registry import Task, TaskRegistry
+from reward_ledger import CONFIRMED as AWARD_CONFIRMED, OPEN, RewardLedger, apply_ledger_awards
+from rpc_provider import make_web3
+from signing_pool import SigningPool
+
+log = logging.getLogger("server")
+
+
+class PlayerSession:
+    """Compact per-player state; tasks are keyed by id"""
+
+    __slots__ = ("wallet", "player_name", "tokens", "blockchain_tokens", "level", "next_task_id",
+                 "tasks", "dirty_player", "dirty_tasks", "deleted_tasks", "dirty_txs")
+
+    def __init__(self, wallet: str, player_name: str = ""):
+        self.wallet = wallet
+        self.player_name = player_name
+        self.tokens = 0
+        self.blockchain_tokens = 0
+        self.level = 1
+        self.next_task_id = len(DEFAULT_TASKS) + 1
+        self.tasks = TaskRegistry.from_dicts(DEFAULT_TASKS)
+        self.dirty_player = True
+        self.dirty_tasks = set(self.tasks.ids())
+        self.deleted_tasks = set()
+        self.dirty_txs = {}
+
+    def has_inflight_awards(self) -> bool:
+        return any(t.tx_status in ("queued", "pending") for t in self.tasks)
+
+    def is_dirty(self) -> bool:
+        return bool(self.dirty_player or self.dirty_tasks or self.deleted_tasks or self.dirty_txs)
+
+    def mark(self, task: Task = None, record_tx: bool = False):
+        self.dirty_player = True
+        if task is not None:
+            self.dirty_tasks.add(task.id)
+            if record_tx:
+                self.dirty_txs[(task.tx_hash, task.id)] = {
+                    "tx_hash": task.tx_hash,
+                    "task_id": task.id,
+                    "amount": task.reward,
+                    "status": task.tx_status,
+                }
+
+    def to_dict(self) -> Dict:
+        return {
+            "player_name": self.player_name,
+            "player_wallet": self.wallet,
+            "tokens": self.tokens,
+            "blockchain_tokens": self.blockchain_tokens,
+            "level": self.level,
+            "completed_tasks": self.tasks.completed_count,
+            "tasks": self.tasks.to_dicts(),
+        }
+
+
+class GameServer:
+    """Session manager: one operator wallet pays out awards for every hosted player"""
+
+    def __init__(self, contract_address: str, operator_wallet: str, operator_key: str,
+                 w3=None, db_path: str = BlockchainConfig.GAME_DB, max_sessions: int = 100000,
+                 autosave_interval: float = 5.0):
+        self.w3 = w3 or make_web3(
+            BlockchainConfig.RPC_URLS,
+            timeout=BlockchainConfig.RPC_TIMEOUT,
+            max_retries=BlockchainConfig.RPC_MAX_RETRIES,
+            pool_size=BlockchainConfig.RPC_POOL_SIZE,
+        )
+        self.contract = self.w3.eth.contract(
+            address=Web3.to_checksum_address(contract_address),
+            abi=BlockchainConfig.CONTRACT_ABI
+        )
+        self.operator_wallet = Web3.to_checksum_address(operator_wallet)
+        self.ledger = RewardLedger(BlockchainConfig.REWARD_LEDGER_DB)
+        self.award_sender = AwardSender(
+            self.w3, self.contract, self.operator_wallet, operator_key, BlockchainConfig,
+            ledger=self.ledger
+        )
+        self.signing_pool = None
+        if BlockchainConfig.SIGNING_WORKERS > 0:
+            self.signing_pool = SigningPool(
+                self.contract.address, operator_key, self.award_sender.chain_id,
+                workers=BlockchainConfig.SIGNING_WORKERS,
+            )
+            self.award_sender.signing_pool = self.signing_pool
+        self.confirmations = ConfirmationTracker(
+            self.w3,
+            poll_interval=BlockchainConfig.RECEIPT_POLL_INTERVAL,
+            batch_size=BlockchainConfig.RECEIPT_BATCH_SIZE,
+            timeout=BlockchainConfig.RECEIPT_TIMEOUT,
+        )
+        self.reward_batcher = RewardBatcher(
+            self.award_sender.send_reward_batch,
+            window=max(BlockchainConfig.REWARD_BATCH_WINDOW, 0.1),
+            max_size=BlockchainConfig.REWARD_BATCH_MAX_SIZE,
+        )
+        self.store = GameStore(db_path)
+        self.max_sessions = max_sessions
+        self.autosave_interval = autosave_interval
+        self._lock = threading.RLock()
+        self._sessions: "OrderedDict[str, PlayerSession]" = OrderedDict()
+        self._rechecks: Dict[Tuple[str, int], int] = {}  # (wallet, task id) -> times re-watched after a timeout
+        self._stopped = threading.Event()
+        self._autosave_thread: Optional[threading.Thread] = None
+
+    def start(self):
+        """Settle awards left open by the last run, then start the background workers"""
+        self.ledger.reconcile(self.w3, self.operator_wallet)
+        if self.signing_pool:
+            self.signing_pool.start()
+        self.confirmations.start()
+        self.reward_batcher.start()
+        if self.autosave_interval > 0:
+            self._stopped.clear()
+            self._autosave_thread = threading.Thread(target=self._autosave, name="game-autosave", daemon=True)
+            self._autosave_thread.start()
+
+    def stop(self, drain_timeout: float = BlockchainConfig.RECEIPT_TIMEOUT):
+        """Flush queued rewards, wait for confirmations and save every session"""
+        self.reward_batcher.stop()
+        self.confirmations.drain(timeout=drain_timeout)
+        self.confirmations.stop()
+        if self.signing_pool:
+            self.signing_pool.stop()
+        self._stopped.set()
+        if self._autosave_thread:
+            self._autosave_thread.join()
+            self._autosave_thread = None
+        self.save_all()
+
+    def open_session(self, wallet: str, player_name: str = "") -> Dict:
+        """Load or create a player's session and return its state"""
+        with self._lock:
+            session = self._session(wallet)
+            if player_name and player_name != session.player_name:
+                session.player_name = player_name
+                session.mark()
+            return session.to_dict()
+
+    def get_player(self, wallet: str) -> Dict:
+        with self._lock:
+            return self._session(wallet).to_dict()
+
+    def session_count(self) -> int:
+        with self._lock:
+            return len(self._sessions)
+
+    def _session(self, wallet: str) -> PlayerSession:
+        wallet = Web3.to_checksum_address(wallet)
+        session = self._sessions.get(wallet)
+        if session is None:
+            session = self._load_session(wallet)
+            self._sessions[wallet] = session
+            self._evict()
+        else:
+            self._sessions.move_to_end(wallet)
+        return session
+
+    def _load_session(self, wallet: str) -> PlayerSession:
+        data = self.store.load_player(wallet)
+        session = PlayerSession(wallet)
+        if data is not None:
+            session.player_name = data["player_name"]
+            session.tokens = data["tokens"]
+            session.blockchain_tokens = data["blockchain_tokens"]
+            session.level = data["level"]
+            session.next_task_id = data["next_task_id"]
+            session.tasks = TaskRegistry.from_dicts(data["tasks"])
+            session.dirty_player = False
+            session.dirty_tasks = set()
+
+        # Sessions with queued awards are never evicted, so any unsigned intent is from an earlier run
+        self.ledger.fail_intents(wallet, "Not sent before the game stopped")
+        # The ledger knows about awards the store may not have saved yet
+        awards = self.ledger.latest_awards(wallet)
+        changed, waiting, confirmed_delta = apply_ledger_awards(session.tasks, awards)
+        if changed:
+            session.tokens = sum(t.reward for t in session.tasks if t.completed)
+            session.level = 1 + session.tasks.completed_count // 2
+            session.blockchain_tokens += confirmed_delta
+            for task in changed:
+                session.mark(task, record_tx=task.tx_hash is not None)
+        for task in waiting:
+            self._track(session, task)
+
+        for task in session.tasks:
+            if task.id in awards:
+                continue
+            if task.tx_status == "pending":
+                self._track(session, task)
+            elif task.tx_status == "queued":
+                # Nothing was minted for a reward that never left the batch queue
+                self._on_award_failed(session, task)
+        return session
+
+    def _evict(self):
+        """Drop least-recently-used sessions that have nothing unsaved or in flight"""
+        if len(self._sessions) <= self.max_sessions:
+            return
+        # The newest session is the one being handed out, so it is never a candidate
+        for wallet in list(self._sessions)[:-1]:
+            if len(self._sessions) <= self.max_sessions:
+                break
+            session = self._sessions[wallet]
+            if not session.is_dirty() and not session.has_inflight_awards():
+                del self._sessions[wallet]
+
+    def complete_task(self, wallet: str, task_id: int) -> Dict:
+        """Complete a task and queue its award; returns immediately with the new state"""
+        with self._lock:
+            session = self._session(wallet)
+            task = session.tasks.get(task_id)
+            if task is None:
+                return {"success": False, "error": "Task not found"}
+            if task.completed:
+                return {"success": False, "error": "Task already completed"}
+            if self.ledger.has_open_award(session.wallet, task.id):
+                return {"success": False, "error": "Previous award for this task is still unsettled"}
+
+            award_id = self.ledger.record_intent(session.wallet, task.reward, task.id)
+            session.tasks.set_completed(task, True)
+            task.tx_status = "queued"
+            session.tokens += task.reward
+            leveled_up = session.tasks.completed_count % 2 == 0
+            if leveled_up:
+                session.level += 1
+            session.mark(task)
+            result = {
+                "success": True,
+                "reward": task.reward,
+                "tokens": session.tokens,
+                "level": session.level,
+                "leveled_up": leveled_up,
+            }
+
+        self.reward_batcher.add(
+            session.wallet,
+            task.reward,
+            on_sent=lambda tx_hash: self._on_award_sent(session, task, tx_hash),
+            on_error=lambda e: self._on_award_send_failed(session, task, award_id, e),
+            award_id=award_id,
+        )
+        return result
+
+    def add_custom_task(self, wallet: str, title: str, reward: int) -> Dict:
+        if not title.strip():
+            return {"success": False, "error": "Task title cannot be empty"}
+        if reward <= 0:
+            return {"success": False, "error": "Reward must be positive"}
+        with self._lock:
+            session = self._session(wallet)
+            task = Task(session.next_task_id, title, reward)
+            session.tasks.add(task)
+            session.next_task_id += 1
+            session.mark(task)
+            return {"success": True, "task": task.to_dict()}
+
+    def delete_task(self, wallet: str, task_id: int) -> Dict:
+        with self._lock:
+            session = self._session(wallet)
+            task = session.tasks.get(task_id)
+            if task is None:
+                return {"success": False, "error": "Task not found"}
+            if task.completed:
+                return {"success": False, "error": "Cannot delete completed tasks"}
+            session.tasks.remove(task_id)
+            session.dirty_tasks.discard(task_id)
+            session.deleted_tasks.add(task_id)
+            return {"success": True}
+
+    def _on_award_sent(self, session: PlayerSession, task: Task, tx_hash: str):
+        with self._lock:
+            task.tx_hash = tx_hash
+            task.tx_status = "pending"
+            session.mark(task, record_tx=True)
+        self._track(session, task)
+
+    def _track(self, session: PlayerSession, task: Task):
+        self.confirmations.track(
+            task.tx_hash,
+            on_confirmed=lambda h, receipt: self._on_award_confirmed(session, task, receipt),
+            on_failed=lambda h, receipt: (
+                self._on_award_failed(session, task, receipt) if receipt is not None
+                else self._on_award_unconfirmed(session, task)
+            ),
+        )
+
+    def _on_award_send_failed(self, session: PlayerSession, task: Task, award_id: str, error: Exception):
+        # Only touches awards that were never signed; a signed one is settled by reconcile
+        self.ledger.mark_failed([award_id], str(error))
+        self._on_award_failed(session, task)
+
+    def _on_award_confirmed(self, session: PlayerSession, task: Task, receipt=None):
+        if receipt is not None:
+            self.ledger.settle(task.tx_hash, receipt)
+        with self._lock:
+            self._rechecks.pop((session.wallet, task.id), None)
+            task.tx_status = "confirmed"
+            session.blockchain_tokens += task.reward
+            session.mark(task, record_tx=True)
+
+    def _on_award_unconfirmed(self, session: PlayerSession, task: Task):
+        """No receipt in time: reconcile rebroadcasts the signed transaction, or fails it if its
+        nonce was taken; watch it again while it is in doubt, up to RECEIPT_RECHECKS times"""
+        try:
+            self.ledger.reconcile(self.w3, self.operator_wallet)
+        except Exception as e:
+            log.warning("⚠️  Could not reconcile reward ledger (will check again): %s", e)
+        award = self.ledger.latest_awards(session.wallet).get(task.id)
+        status = award["status"] if award else None
+        if status == AWARD_CONFIRMED:
+            # reconcile already stored the receipt
+            self._on_award_confirmed(session, task)
+            return
+        if status not in OPEN:
+            self._on_award_failed(session, task)
+            return
+        with self._lock:
+            rechecks = self._rechecks.get((session.wallet, task.id), 0) + 1
+            if rechecks > BlockchainConfig.RECEIPT_RECHECKS:
+                # Stop pinning the session; the ledger keeps the award open for the next load or start
+                self._rechecks.pop((session.wallet, task.id), None)
+                task.tx_status = "unsettled"
+                session.mark(task, record_tx=True)
+                log.warning("⏳ Award %s for task %s is still unconfirmed; left to the next reconcile",
+                            task.tx_hash, task.id)
+                return
+            self._rechecks[(session.wallet, task.id)] = rechecks
+        log.warning("⏳ Award %s for task %s is not confirmed yet; still watching", task.tx_hash, task.id)
+        self._track(session, task)
+
+    def _on_award_failed(self, session: PlayerSession, task: Task, receipt=None):
+        """Undo a completion whose award could not be sent or reverted"""
+        if receipt is not None:
+            self.ledger.settle(task.tx_hash, receipt)
+        with self._lock:
+            self._rechecks.pop((session.wallet, task.id), None)
+            if session.tasks.completed_count % 2 == 0 and session.level > 1:
+                session.level -= 1
+            session.tasks.set_completed(task, False)
+            task.tx_status = "failed"
+            session.tokens -= task.reward
+            session.mark(task, record_tx=task.tx_hash is not None)
+
+    def save_all(self) -> int:
+        """Write every session's changed rows in one transaction; returns how many sessions were saved"""
+        with self._lock:
+            pending = []
+            for session in self._sessions.values():
+                if not session.is_dirty():
+                    continue
+                pending.append((session, (
+                    session.wallet,
+                    {
+                        "player_name": session.player_name,
+                        "tokens": session.tokens,
+                        "blockchain_tokens": session.blockchain_tokens,
+                        "level": session.level,
+                        "next_task_id": session.next_task_id,
+                    } if session.dirty_player else None,
+                    [session.tasks.get(i).to_dict() for i in session.dirty_tasks if i in session.tasks],
+                    list(session.deleted_tasks),
+                    list(session.dirty_txs.values()),
+                )))
+                session.dirty_player = False
+                session.dirty_tasks = set()
+                session.deleted_tasks = set()
+                session.dirty_txs = {}
+        if not pending:
+            return 0
+
+        try:
+            self.store.save_many(change for _, change in pending)
+        except Exception:
+            # Put the changes back so the next save retries them
+            with self._lock:
+                for session, (_, player, tasks, deleted, txs) in pending:
+                    session.dirty_player = session.dirty_player or player is not None
+                    session.dirty_tasks.update(t["id"] for t in tasks)
+                    session.deleted_tasks.update(deleted)
+                    for tx in txs:
+                        session.dirty_txs.setdefault((tx["tx_hash"], tx["task_id"]), tx)
+            raise
+        return len(pending)
+
+    def _autosave(self):
+        while not self._stopped.wait(self.autosave_interval):
+            try:
+                self.save_all()
+            except Exception as e:
+                log.warning("⚠️  Autosave failed: %s", e)
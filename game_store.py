@@ -0,0 +1,212 @@
+"""
+Game State Store
+SQLite (WAL) storage for players, tasks and award transactions with
+incremental upserts, replacing the single-player JSON progress file
+"""
+
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS players (
+    wallet TEXT PRIMARY KEY,
+    player_name TEXT NOT NULL,
+    tokens INTEGER NOT NULL,
+    blockchain_tokens INTEGER NOT NULL,
+    level INTEGER NOT NULL,
+    next_task_id INTEGER NOT NULL,
+    updated_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS tasks (
+    wallet TEXT NOT NULL,
+    task_id INTEGER NOT NULL,
+    title TEXT NOT NULL,
+    reward INTEGER NOT NULL,
+    completed INTEGER NOT NULL,
+    difficulty TEXT NOT NULL,
+    tx_hash TEXT,
+    tx_status TEXT,
+    updated_at TEXT NOT NULL,
+    PRIMARY KEY (wallet, task_id)
+);
+CREATE TABLE IF NOT EXISTS transactions (
+    tx_hash TEXT NOT NULL,
+    wallet TEXT NOT NULL,
+    task_id INTEGER NOT NULL,
+    amount INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    PRIMARY KEY (tx_hash, wallet, task_id)
+);
+CREATE INDEX IF NOT EXISTS idx_transactions_wallet ON transactions (wallet);
+CREATE INDEX IF NOT EXISTS idx_transactions_status ON transactions (status);
+CREATE INDEX IF NOT EXISTS idx_players_updated ON players (updated_at);
+"""
+
+TASK_COLUMNS = ("id", "title", "reward", "completed", "difficulty", "tx_hash", "tx_status")
+
+
+class GameStore:
+    """Thread-safe SQLite store shared by every player in the process"""
+
+    def __init__(self, db_path: str = "game_progress.db"):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        # WAL keeps committed data safe on a crash; NORMAL skips an fsync per commit
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(SCHEMA)
+
+    def load_player(self, wallet: str) -> Optional[Dict]:
+        """Player row plus its tasks, or None for a new wallet"""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT player_name, tokens, blockchain_tokens, level, next_task_id "
+                "FROM players WHERE wallet = ?", (wallet,)
+            ).fetchone()
+            if row is None:
+                return None
+            task_rows = self._db.execute(
+                "SELECT task_id, title, reward, completed, difficulty, tx_hash, tx_status "
+                "FROM tasks WHERE wallet = ? ORDER BY task_id", (wallet,)
+            ).fetchall()
+        player_name, tokens, blockchain_tokens, level, next_task_id = row
+        tasks = []
+        for task_row in task_rows:
+            task = dict(zip(TASK_COLUMNS, task_row))
+            task["completed"] = bool(task["completed"])
+            tasks.append(task)
+        return {
+            "player_name": player_name,
+            "player_wallet": wallet,
+            "tokens": tokens,
+            "blockchain_tokens": blockchain_tokens,
+            "level": level,
+            "next_task_id": next_task_id,
+            "tasks": tasks,
+        }
+
+    def get_player(self, wallet: str) -> Optional[Dict]:
+        """Player row with task counts and the last time the player or any task was saved"""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT p.player_name, p.tokens, p.blockchain_tokens, p.level, p.updated_at, "
+                "COUNT(t.task_id), COALESCE(SUM(t.completed), 0), MAX(t.updated_at) "
+                "FROM players p LEFT JOIN tasks t ON t.wallet = p.wallet WHERE p.wallet = ? GROUP BY p.wallet",
+                (wallet,)
+            ).fetchone()
+        if row is None:
+            return None
+        player_name, tokens, blockchain_tokens, level, updated_at, total, completed, tasks_updated_at = row
+        return {
+            "player_name": player_name,
+            "player_wallet": wallet,
+            "tokens": tokens,
+            "blockchain_tokens": blockchain_tokens,
+            "level": level,
+            "completed_tasks": completed,
+            "total_tasks": total,
+            "updated_at": max(updated_at, tasks_updated_at or ""),
+        }
+
+    def get_tasks(self, wallet: str) -> List[Dict]:
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT task_id, title, reward, completed, difficulty, tx_hash, tx_status "
+                "FROM tasks WHERE wallet = ? ORDER BY task_id", (wallet,)
+            ).fetchall()
+        tasks = []
+        for row in rows:
+            task = dict(zip(TASK_COLUMNS, row))
+            task["completed"] = bool(task["completed"])
+            tasks.append(task)
+        return tasks
+
+    def get_task(self, wallet: str, task_id: int) -> Optional[Dict]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT task_id, title, reward, completed, difficulty, tx_hash, tx_status "
+                "FROM tasks WHERE wallet = ? AND task_id = ?", (wallet, task_id)
+            ).fetchone()
+        if row is None:
+            return None
+        task = dict(zip(TASK_COLUMNS, row))
+        task["completed"] = bool(task["completed"])
+        return task
+
+    def transactions_for(self, wallet: str) -> List[Dict]:
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT tx_hash, task_id, amount, status, updated_at FROM transactions "
+                "WHERE wallet = ? ORDER BY updated_at", (wallet,)
+            ).fetchall()
+        return [
+            {"tx_hash": tx_hash, "task_id": task_id, "amount": amount, "status": status, "updated_at": updated_at}
+            for tx_hash, task_id, amount, status, updated_at in rows
+        ]
+
+    def levels_updated_since(self, since: str = "") -> List[Tuple[str, int, str]]:
+        """(wallet, level, updated_at) for players saved at or after an updated_at value"""
+        with self._lock:
+            return self._db.execute(
+                "SELECT wallet, level, updated_at FROM players WHERE updated_at >= ? ORDER BY updated_at",
+                (since,)
+            ).fetchall()
+
+    def save(self, wallet: str, player: Optional[Dict] = None, tasks: Iterable[Dict] = (),
+             deleted_task_ids: Iterable[int] = (), transactions: Iterable[Dict] = ()):
+        """Upsert only the rows that changed, all in one transaction"""
+        self.save_many([(wallet, player, tasks, deleted_task_ids, transactions)])
+
+    def save_many(self, changes: Iterable[Tuple]):
+        """save() for many players at once: (wallet, player, tasks, deleted_task_ids, transactions) tuples"""
+        now = datetime.now().isoformat()
+        with self._lock, self._db:
+            for wallet, player, tasks, deleted_task_ids, transactions in changes:
+                self._save_rows(wallet, player, tasks, deleted_task_ids, transactions, now)
+
+    def _save_rows(self, wallet, player, tasks, deleted_task_ids, transactions, now):
+        if player is not None:
+            self._db.execute(
+                "INSERT INTO players (wallet, player_name, tokens, blockchain_tokens, level, next_task_id, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(wallet) DO UPDATE SET player_name = excluded.player_name, "
+                "tokens = excluded.tokens, blockchain_tokens = excluded.blockchain_tokens, "
+                "level = excluded.level, next_task_id = excluded.next_task_id, updated_at = excluded.updated_at",
+                (wallet, player["player_name"], player["tokens"], player["blockchain_tokens"],
+                 player["level"], player["next_task_id"], now)
+            )
+        self._db.executemany(
+            "INSERT INTO tasks (wallet, task_id, title, reward, completed, difficulty, tx_hash, tx_status, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT(wallet, task_id) DO UPDATE SET title = excluded.title, reward = excluded.reward, "
+            "completed = excluded.completed, difficulty = excluded.difficulty, tx_hash = excluded.tx_hash, "
+            "tx_status = excluded.tx_status, updated_at = excluded.updated_at",
+            [
+                (wallet, t["id"], t["title"], t["reward"], int(t["completed"]), t["difficulty"],
+                 t["tx_hash"], t["tx_status"], now)
+                for t in tasks
+            ]
+        )
+        deleted = [(wallet, task_id) for task_id in deleted_task_ids]
+        self._db.executemany("DELETE FROM tasks WHERE wallet = ? AND task_id = ?", deleted)
+        if deleted and player is None:
+            # Deleted rows leave no updated_at behind, so bump the player's
+            self._db.execute("UPDATE players SET updated_at = ? WHERE wallet = ?", (now, wallet))
+        self._db.executemany(
+            "INSERT INTO transactions (tx_hash, wallet, task_id, amount, status, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT(tx_hash, wallet, task_id) DO UPDATE SET status = excluded.status, "
+            "updated_at = excluded.updated_at",
+            [
+                (tx["tx_hash"], wallet, tx["task_id"], tx["amount"], tx["status"], now)
+                for tx in transactions
+            ]
+        )
+
+    def close(self):
+        with self._lock:
+            self._db.close()
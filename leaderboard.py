@@ -0,0 +1,198 @@
+"""
+Player Leaderboard
+In-memory ranking by on-chain balance, then level, kept sorted as transfer
+events and level changes arrive, so any page is a slice instead of a scan.
+With a BalanceReader, wallets touched by transfers have their balance re-read
+in batches, so a partial event index (no INDEXER_START_BLOCK) still ranks true balances
+"""
+
+import logging
+import threading
+from bisect import bisect_left, insort
+from collections import defaultdict
+from typing import Dict, List, Optional, Set, Tuple
+
+from event_indexer import ZERO_ADDRESS, Transfer
+
+log = logging.getLogger("leaderboard")
+
+# Sort key: highest balance first, then highest level, then wallet for a stable order
+RankKey = Tuple[int, int, str]
+
+# Batches touching this many wallets (and a good share of the board) are applied with one sort
+BULK_REBUILD_MIN = 1000
+
+
+class Leaderboard:
+    """Sorted ranking of every known wallet; updates are O(log n) search plus one list insert"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._players: Dict[str, Tuple[int, Optional[int]]] = {}  # wallet -> (balance, level)
+        self._ranking: List[RankKey] = []
+        self._levels_since = ""
+        self._reader = None  # BalanceReader; when set, transfers only mark wallets for a re-read
+        self._stale: Set[str] = set()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._ranking)
+
+    def update(self, wallet: str, balance: Optional[int] = None, level: Optional[int] = None):
+        """Set a wallet's balance and/or level and move it to its new rank"""
+        with self._lock:
+            old_balance, old_level = self._players.get(wallet, (0, None))
+            self._move(
+                wallet,
+                old_balance if balance is None else balance,
+                old_level if level is None else level,
+            )
+
+    def apply_transfers(self, added: List[Transfer], removed: List[Transfer]):
+        """EventIndexer listener: apply the net balance change of each wallet once"""
+        deltas = defaultdict(int)
+        for from_addr, to_addr, amount in added:
+            deltas[from_addr] -= amount
+            deltas[to_addr] += amount
+        for from_addr, to_addr, amount in removed:
+            deltas[from_addr] += amount
+            deltas[to_addr] -= amount
+        # Mints come from the zero address, which is not a player
+        deltas.pop(ZERO_ADDRESS, None)
+        with self._lock:
+            if self._reader is not None:
+                # The index may start after a wallet's first transfer, so its deltas can be partial
+                self._stale.update(deltas)
+                return
+            self._apply(deltas)
+
+    def refresh_balances(self) -> int:
+        """Re-read the balances of wallets touched since the last refresh; returns how many were read"""
+        with self._lock:
+            wallets, self._stale = list(self._stale), set()
+        if not wallets:
+            return 0
+        try:
+            balances = self._reader.get_balances(wallets)
+        except Exception:
+            with self._lock:
+                self._stale.update(wallets)
+            raise
+        with self._lock:
+            self._apply({
+                wallet: balance - self._players.get(wallet, (0, None))[0] for wallet, balance in balances.items()
+            })
+        return len(balances)
+
+    def sync_levels(self, store) -> int:
+        """Pull levels of players the GameStore saved since the last sync; returns rows read"""
+        rows = store.levels_updated_since(self._levels_since)
+        if not rows:
+            return 0
+        with self._lock:
+            for wallet, level, _ in rows:
+                balance, old_level = self._players.get(wallet, (0, None))
+                if level != old_level:
+                    self._move(wallet, balance, level)
+        # Rows saved in the same instant as the last one are read again next time; re-applying is a no-op
+        self._levels_since = rows[-1][2]
+        return len(rows)
+
+    def page(self, offset: int = 0, limit: int = 50) -> List[Dict]:
+        """Ranked entries [offset, offset + limit); ranks start at 1"""
+        with self._lock:
+            return [
+                {"rank": offset + index + 1, "wallet": wallet, "balance": -neg_balance,
+                 "level": self._players[wallet][1]}
+                for index, (neg_balance, _, wallet) in enumerate(self._ranking[offset:offset + limit])
+            ]
+
+    def entry(self, wallet: str) -> Optional[Dict]:
+        """A single wallet's rank, or None if it holds nothing and has never played"""
+        with self._lock:
+            if wallet not in self._players:
+                return None
+            balance, level = self._players[wallet]
+            rank = bisect_left(self._ranking, self._key(wallet, balance, level)) + 1
+        return {"rank": rank, "wallet": wallet, "balance": balance, "level": level}
+
+    def start(self, indexer, store=None, poll_interval: float = 5.0, balance_reader=None):
+        """Follow the indexer's transfers (replaying those already indexed) and poll the store for levels;
+        with balance_reader, balances come from balanceOf of the wallets the transfers touch"""
+        with self._start_lock:
+            if self._thread and self._thread.is_alive():
+                return
+            if self._thread is None:
+                self._reader = balance_reader
+                indexer.add_listener(self.apply_transfers)
+                if balance_reader is not None:
+                    self._refresh()
+            self._stopped.clear()
+            self._thread = threading.Thread(
+                target=self._run, args=(store, poll_interval), name="leaderboard", daemon=True
+            )
+            self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        if self._thread:
+            self._thread.join()
+
+    def _run(self, store, poll_interval: float):
+        while not self._stopped.is_set():
+            if store is not None:
+                try:
+                    self.sync_levels(store)
+                except Exception as e:
+                    log.warning("⚠️  Leaderboard level sync failed: %s", e)
+            if self._reader is not None:
+                self._refresh()
+            self._stopped.wait(poll_interval)
+
+    def _refresh(self):
+        try:
+            self.refresh_balances()
+        except Exception as e:
+            log.warning("⚠️  Leaderboard balance refresh failed (will retry): %s", e)
+
+    @staticmethod
+    def _key(wallet: str, balance: int, level: Optional[int]) -> RankKey:
+        return -balance, -(level or 0), wallet
+
+    def _apply(self, deltas: Dict[str, int]):
+        """Apply net balance changes, re-sorting once for big batches; caller holds the lock"""
+        if len(deltas) > BULK_REBUILD_MIN and len(deltas) * 4 > len(self._ranking):
+            self._rebuild(deltas)
+            return
+        for wallet, delta in deltas.items():
+            if delta:
+                balance, level = self._players.get(wallet, (0, None))
+                self._move(wallet, balance + delta, level)
+
+    def _rebuild(self, deltas: Dict[str, int]):
+        """Apply many balance changes and re-sort once (replays and big reorgs); caller holds the lock"""
+        for wallet, delta in deltas.items():
+            balance, level = self._players.get(wallet, (0, None))
+            balance += delta
+            if balance == 0 and level is None:
+                self._players.pop(wallet, None)
+            else:
+                self._players[wallet] = (balance, level)
+        self._ranking = sorted(
+            self._key(wallet, balance, level) for wallet, (balance, level) in self._players.items()
+        )
+
+    def _move(self, wallet: str, balance: int, level: Optional[int]):
+        """Re-rank one wallet; caller holds the lock"""
+        old = self._players.get(wallet)
+        if old is not None:
+            index = bisect_left(self._ranking, self._key(wallet, *old))
+            del self._ranking[index]
+        if balance == 0 and level is None:
+            # Emptied a wallet that never played: nothing left to rank
+            self._players.pop(wallet, None)
+            return
+        self._players[wallet] = (balance, level)
+        insort(self._ranking, self._key(wallet, balance, level))
@@ -0,0 +1,81 @@
+"""
+Local Nonce Manager
+Hands out transaction nonces from process memory so one wallet can keep
+several transactions in flight without asking the node before every send
+"""
+
+import threading
+from typing import Optional
+
+
+class NonceManager:
+    """Thread-safe nonce allocator for a single sending wallet"""
+
+    # Substrings (lower-cased) that nodes use to reject a transaction because of its nonce
+    NONCE_ERROR_MARKERS = (
+        "nonce too low",
+        "nonce too high",
+        "invalid nonce",
+        "invalid transaction nonce",
+        "doesn't have the correct nonce",
+        "nonce has already been used",
+        "replacement transaction underpriced",
+    )
+
+    def __init__(self, w3, address: str):
+        self.w3 = w3
+        self.address = address
+        self._lock = threading.Lock()
+        self._next_nonce: Optional[int] = None
+
+    def allocate(self) -> int:
+        """Reserve the next nonce, syncing with the node on first use"""
+        with self._lock:
+            if self._next_nonce is None:
+                self._next_nonce = self._fetch_pending_count()
+            nonce = self._next_nonce
+            self._next_nonce += 1
+            return nonce
+
+    def allocate_range(self, count: int) -> int:
+        """Reserve count consecutive nonces and return the first one"""
+        with self._lock:
+            if self._next_nonce is None:
+                self._next_nonce = self._fetch_pending_count()
+            first = self._next_nonce
+            self._next_nonce += count
+            return first
+
+    def release(self, nonce: int):
+        """Give back a nonce that was allocated but never broadcast"""
+        with self._lock:
+            if self._next_nonce is not None and nonce == self._next_nonce - 1:
+                self._next_nonce = nonce
+            else:
+                # Later nonces are already out, so this one leaves a gap; resync on next allocate
+                self._next_nonce = None
+
+    def invalidate(self):
+        """Forget the local counter so the next allocate() asks the node again"""
+        with self._lock:
+            self._next_nonce = None
+
+    def resync(self) -> int:
+        """Reset the local counter to the node's pending transaction count"""
+        with self._lock:
+            self._next_nonce = self._fetch_pending_count()
+            return self._next_nonce
+
+    def peek(self) -> Optional[int]:
+        """Return the nonce the next allocate() will hand out, if known"""
+        with self._lock:
+            return self._next_nonce
+
+    def _fetch_pending_count(self) -> int:
+        return self.w3.eth.get_transaction_count(self.address, "pending")
+
+    @classmethod
+    def is_nonce_error(cls, error: Exception) -> bool:
+        """Check whether a send failure was caused by a stale or gapped nonce"""
+        message = str(error).lower()
+        return any(marker in message for marker in cls.NONCE_ERROR_MARKERS)
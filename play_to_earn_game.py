@@ -3,14 +3,24 @@ Play-to-Earn Game with Blockchain Integration (Ethereum/Polygon)
 This game integrates Web3 to interact with a smart contract and mint real tokens
 """
 
-import json
-from datetime import datetime
+import logging
+import threading
+import time
 from typing import List, Dict
-from web3 import Web3
 import os
-from dotenv import load_dotenv
+import sys
+from tx_confirmations import CONFIRMED, FAILED, PENDING, TX_CONFIRMATION_SECONDS, ConfirmationTracker
+from reward_batching import RewardBatcher
+from settlement import SettlementWorker
+from game_store import GameStore
+from task_registry import Task, TaskRegistry
+from structured_logging import configure_logging
 
-load_dotenv()
+# web3 and the modules built on it take about a second to import, so they are imported
+# where the chain is first needed (see preload_chain_modules) rather than here
+CHAIN_MODULES = ("web3", "award_sender", "balance_reader", "event_indexer", "reward_ledger", "rpc_provider")
+
+log = logging.getLogger("game")
 
 # ============= BLOCKCHAIN CONFIGURATION =============
 class BlockchainConfig:
@@ -18,6 +28,74 @@ class BlockchainConfig:
     RPC_URL = "http://127.0.0.1:8545"
     CHAIN_ID = 1337
     
+    # Extra endpoints for failover, comma-separated in RPC_URLS (first one takes all writes)
+    RPC_URLS = [url.strip() for url in os.getenv("RPC_URLS", "").split(",") if url.strip()] or [RPC_URL]
+    RPC_TIMEOUT = 10  # seconds per HTTP request
+    RPC_MAX_RETRIES = 3  # retries with exponential backoff; reads move to the next healthy endpoint
+    RPC_POOL_SIZE = 32  # keep-alive connections per endpoint
+    
+    # Extra send attempts after the node rejects a nonce (local counter gets resynced first)
+    NONCE_RETRIES = 1
+    
+    # Background receipt polling
+    RECEIPT_POLL_INTERVAL = 1.0  # seconds between receipt batches
+    RECEIPT_BATCH_SIZE = 100
+    RECEIPT_TIMEOUT = 120  # seconds before an unconfirmed transaction is re-checked against the ledger
+    RECEIPT_RECHECKS = 3  # times a server re-watches a transaction still in doubt before leaving it to the next start
+    
+    # Reward batching: rewards are merged per player for this many seconds (0 disables)
+    REWARD_BATCH_WINDOW = 2.0
+    REWARD_BATCH_MAX_SIZE = 100  # flush early once this many rewards are queued
+    # Set when the deployed contract implements batchAwardTokens(address[], uint256[])
+    USE_BATCH_AWARD = False
+    BATCH_AWARD_MAX_PLAYERS = 200
+    
+    # Fees: EIP-1559 fields from a fee cache refreshed every few seconds (falls back to gasPrice on legacy chains)
+    USE_EIP1559 = True
+    FEE_URGENCY = "standard"  # low / standard / high
+    FEE_REFRESH_INTERVAL = 2.0  # seconds a fee snapshot is reused
+    GAS_LIMIT_MARGIN = 1.2  # headroom over the memoized gas estimate
+    
+    # Gas limits used only when estimation fails
+    AWARD_GAS = 300000
+    BATCH_AWARD_GAS_PER_PLAYER = 60000
+    
+    # Worker processes that sign multi-player payouts in parallel (0 = sign inline)
+    SIGNING_WORKERS = int(os.getenv("SIGNING_WORKERS", "0"))
+    
+    # Multicall3 contract used to read many balances in one eth_call (None = JSON-RPC batching)
+    MULTICALL_ADDRESS = os.getenv("MULTICALL_ADDRESS")
+    
+    # Local reward history built from Transfer logs
+    INDEXER_DB = "reward_history.db"
+    # Token deployment block; unset means only the last INDEXER_LOOKBACK_BLOCKS are indexed
+    INDEXER_START_BLOCK = int(os.getenv("INDEXER_START_BLOCK")) if os.getenv("INDEXER_START_BLOCK") else None
+    INDEXER_LOOKBACK_BLOCKS = 50000
+    INDEXER_CHUNK_SIZE = 2000  # blocks per eth_getLogs request
+    INDEXER_CONFIRMATIONS = 12  # blocks re-scanned on every sync to absorb reorgs
+    
+    # Players, tasks and award transactions (SQLite, WAL mode)
+    GAME_DB = "game_progress.db"
+    
+    # Write-ahead award ledger: intents and signed transactions, reconciled on startup
+    REWARD_LEDGER_DB = "reward_ledger.db"
+    
+    # The game CLI builds the provider and contract and checks the node on a background thread,
+    # so it is playable right away; the first blockchain operation waits for it and raises any
+    # connection error (0 = connect up front). PlayToEarnGame itself connects eagerly unless lazy=True
+    LAZY_CONNECT = os.getenv("LAZY_CONNECT", "1") != "0"
+    
+    # Port for a Prometheus /metrics endpoint in the CLIs (0 = off; the dashboards serve their own)
+    METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))
+    
+    # Local-first mode: a completed task is recorded in the ledger's outbox right away and a
+    # background worker settles it on-chain whenever the node is reachable (1 = on)
+    LOCAL_FIRST = os.getenv("LOCAL_FIRST", "0") == "1"
+    SETTLEMENT_INTERVAL = 2.0  # seconds between outbox flushes (the batching window)
+    SETTLEMENT_BATCH_SIZE = 100  # awards merged into one flush
+    SETTLEMENT_MAX_IN_FLIGHT = 10  # unconfirmed transactions before the worker stops sending
+    SETTLEMENT_MAX_BACKOFF = 60  # seconds between attempts while the chain is unreachable
+    
     # Smart Contract ABI (simplified ERC-20 token contract)
     CONTRACT_ABI = [
         {
@@ -28,6 +106,14 @@ class BlockchainConfig:
             "stateMutability": "nonpayable",
             "type": "function"
         },
+        {
+            "inputs": [{"internalType": "address[]", "name": "players", "type": "address[]"},
+                       {"internalType": "uint256[]", "name": "amounts", "type": "uint256[]"}],
+            "name": "batchAwardTokens",
+            "outputs": [],
+            "stateMutability": "nonpayable",
+            "type": "function"
+        },
         {
             "inputs": [{"internalType": "address", "name": "account", "type": "address"}],
             "name": "balanceOf",
@@ -42,13 +128,65 @@ class BlockchainConfig:
             "outputs": [{"internalType": "bool", "name": "", "type": "bool"}],
             "stateMutability": "nonpayable",
             "type": "function"
+        },
+        {
+            "anonymous": False,
+            "inputs": [{"indexed": True, "internalType": "address", "name": "from", "type": "address"},
+                       {"indexed": True, "internalType": "address", "name": "to", "type": "address"},
+                       {"indexed": False, "internalType": "uint256", "name": "value", "type": "uint256"}],
+            "name": "Transfer",
+            "type": "event"
         }
     ]
+    
+    @classmethod
+    def load_env(cls, dotenv_path: str = None):
+        """Load .env into the environment and re-read the settings that come from it"""
+        from dotenv import load_dotenv
+        load_dotenv(dotenv_path)
+        cls.RPC_URLS = [url.strip() for url in os.getenv("RPC_URLS", "").split(",") if url.strip()] or [cls.RPC_URL]
+        cls.SIGNING_WORKERS = int(os.getenv("SIGNING_WORKERS", "0"))
+        cls.MULTICALL_ADDRESS = os.getenv("MULTICALL_ADDRESS")
+        cls.INDEXER_START_BLOCK = int(os.getenv("INDEXER_START_BLOCK")) if os.getenv("INDEXER_START_BLOCK") else None
+        cls.LAZY_CONNECT = os.getenv("LAZY_CONNECT", "1") != "0"
+        cls.LOCAL_FIRST = os.getenv("LOCAL_FIRST", "0") == "1"
+        cls.METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))
+
+
+def preload_chain_modules():
+    """Import the web3 stack on a background thread, e.g. while the player types credentials"""
+    def load():
+        for name in CHAIN_MODULES:
+            __import__(name)
+    threading.Thread(target=load, name="preload-chain-modules", daemon=True).start()
+
+
+# Tasks every new player starts with
+DEFAULT_TASKS = [
+    {"id": 1, "title": "Complete Daily Login", "reward": 10, "completed": False, "difficulty": "Easy", "tx_hash": None, "tx_status": None},
+    {"id": 2, "title": "Complete 5 Tasks", "reward": 25, "completed": False, "difficulty": "Medium", "tx_hash": None, "tx_status": None},
+    {"id": 3, "title": "Reach Level 5", "reward": 50, "completed": False, "difficulty": "Hard", "tx_hash": None, "tx_status": None}
+]
 
 
 class PlayToEarnGame:
-    def __init__(self, contract_address: str, player_wallet: str, private_key: str):
-        """Initialize game with blockchain connection"""
+    # Set by _connect_chain; reading one before then waits for (or makes) the connection
+    CHAIN_ATTRIBUTES = frozenset({
+        "w3", "contract", "balance_reader", "indexer", "award_sender", "nonce_manager", "confirmations"
+    })
+    
+    def __init__(self, contract_address: str, player_wallet: str, private_key: str, lazy: bool = False,
+                 w3=None):
+        """Initialize game state; the blockchain connection is made now, so connection errors raise here,
+        or if lazy in the background, where they surface on the first blockchain operation instead.
+        w3 replaces the provider built from BlockchainConfig.RPC_URLS (e.g. an in-process chain)"""
+        from web3 import Web3
+        from reward_ledger import RewardLedger
+        
+        self._web3 = w3
+        self._chain_lock = threading.Lock()
+        self._chain_ready = threading.Event()
+        self.contract_address = Web3.to_checksum_address(contract_address)
         self.player_name = ""
         self.player_wallet = Web3.to_checksum_address(player_wallet)
         self.private_key = private_key
@@ -56,30 +194,138 @@ class PlayToEarnGame:
         self.level = 1
         self.blockchain_tokens = 0  # Actual tokens on blockchain
         
-        self.tasks = [
-            {"id": 1, "title": "Complete Daily Login", "reward": 10, "completed": False, "difficulty": "Easy", "tx_hash": None},
-            {"id": 2, "title": "Complete 5 Tasks", "reward": 25, "completed": False, "difficulty": "Medium", "tx_hash": None},
-            {"id": 3, "title": "Reach Level 5", "reward": 50, "completed": False, "difficulty": "Hard", "tx_hash": None}
-        ]
-        self.next_task_id = 4
+        self.tasks = TaskRegistry.from_dicts(DEFAULT_TASKS)
+        self.next_task_id = len(DEFAULT_TASKS) + 1
         
-        # Initialize Web3 connection
-        self.w3 = Web3(Web3.HTTPProvider(BlockchainConfig.RPC_URL))
+        # Every signed award is journaled in the ledger before it is broadcast
+        self.ledger = RewardLedger(BlockchainConfig.REWARD_LEDGER_DB)
+        self._state_lock = threading.RLock()
         
-        if not self.w3.is_connected():
+        # Rewards completed within one window are minted together (the settlement worker
+        # does its own batching in local-first mode)
+        self.reward_batcher = None
+        if BlockchainConfig.REWARD_BATCH_WINDOW > 0 and not BlockchainConfig.LOCAL_FIRST:
+            self.reward_batcher = RewardBatcher(
+                lambda *batch: self.award_sender.send_reward_batch(*batch),
+                window=BlockchainConfig.REWARD_BATCH_WINDOW,
+                max_size=BlockchainConfig.REWARD_BATCH_MAX_SIZE,
+            )
+            self.reward_batcher.start()
+        
+        # Local-first: awards wait in the ledger's outbox until this worker gets them on-chain
+        self.settlement = None
+        if BlockchainConfig.LOCAL_FIRST:
+            self.settlement = SettlementWorker(
+                self.ledger,
+                lambda *batch: self.award_sender.send_reward_batch(*batch),
+                wallet=self.player_wallet,
+                connect_fn=self.require_chain,
+                in_flight_fn=lambda: self.confirmations.pending_count(),
+                recover_fn=lambda: self._reconcile_awards(strict=True),
+                on_sent=self._on_outbox_sent,
+                on_error=self._on_outbox_failed,
+                interval=BlockchainConfig.SETTLEMENT_INTERVAL,
+                batch_size=BlockchainConfig.SETTLEMENT_BATCH_SIZE,
+                max_in_flight=BlockchainConfig.SETTLEMENT_MAX_IN_FLIGHT,
+                max_backoff=BlockchainConfig.SETTLEMENT_MAX_BACKOFF,
+            )
+        
+        # Only rows that changed since the last save are written back (a new player is all new)
+        self._dirty_player = True
+        self._dirty_tasks = set(self.tasks.ids())
+        self._deleted_tasks = set()
+        self._dirty_txs = {}
+        self.store = GameStore(BlockchainConfig.GAME_DB)
+        self.load_progress()
+        if self.settlement:
+            self.settlement.start()
+        
+        # A local-first game is playable offline, so it never waits for the node here
+        if lazy or self.settlement:
+            threading.Thread(target=self._connect_in_background, name="chain-connect", daemon=True).start()
+        else:
+            self._connect_chain()
+    
+    def __getattr__(self, name):
+        if name in PlayToEarnGame.CHAIN_ATTRIBUTES:
+            self.require_chain()
+            return self.__dict__[name]
+        raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
+    
+    @property
+    def chain_ready(self) -> bool:
+        return self._chain_ready.is_set()
+    
+    def require_chain(self):
+        """Wait for the blockchain connection, connecting now if the background attempt failed"""
+        if self._chain_ready.is_set():
+            return
+        with self._chain_lock:
+            if not self._chain_ready.is_set():
+                self._connect_chain()
+    
+    def _connect_in_background(self):
+        try:
+            self.require_chain()
+        except Exception as e:
+            log.warning("⚠️  %s (retrying on the next blockchain action)", e)
+    
+    def _connect_chain(self):
+        """Build the provider, contract and chain helpers, check the node, then settle open awards"""
+        from award_sender import AwardSender
+        from balance_reader import BalanceReader
+        from event_indexer import EventIndexer
+        from rpc_provider import make_web3
+        
+        w3 = self._web3 or make_web3(
+            BlockchainConfig.RPC_URLS,
+            timeout=BlockchainConfig.RPC_TIMEOUT,
+            max_retries=BlockchainConfig.RPC_MAX_RETRIES,
+            pool_size=BlockchainConfig.RPC_POOL_SIZE
+        )
+        
+        if not w3.is_connected():
             raise Exception("❌ Failed to connect to blockchain! Check your internet connection.")
         
-        print("✅ Connected to Polygon Mumbai Testnet")
+        log.info("✅ Connected to Polygon Mumbai Testnet")
         
         # Initialize smart contract
         try:
-            self.contract = self.w3.eth.contract(
-                address=Web3.to_checksum_address(contract_address),
-                abi=BlockchainConfig.CONTRACT_ABI
-            )
-            print(f"✅ Connected to smart contract: {contract_address}\n")
+            contract = w3.eth.contract(address=self.contract_address, abi=BlockchainConfig.CONTRACT_ABI)
+            log.info("✅ Connected to smart contract: %s", self.contract_address)
         except Exception as e:
             raise Exception(f"❌ Contract initialization failed: {e}")
+        
+        # Nonces are handed out locally so several awards can be in flight at once
+        award_sender = AwardSender(
+            w3, contract, self.player_wallet, self.private_key, BlockchainConfig, ledger=self.ledger
+        )
+        # Receipts are confirmed in the background so completing a task never waits on a block
+        confirmations = ConfirmationTracker(
+            w3,
+            poll_interval=BlockchainConfig.RECEIPT_POLL_INTERVAL,
+            batch_size=BlockchainConfig.RECEIPT_BATCH_SIZE,
+            timeout=BlockchainConfig.RECEIPT_TIMEOUT,
+        )
+        confirmations.start()
+        
+        self.w3 = w3
+        self.contract = contract
+        self.balance_reader = BalanceReader(w3, self.contract_address, BlockchainConfig.MULTICALL_ADDRESS)
+        self.indexer = EventIndexer(
+            w3,
+            self.contract_address,
+            db_path=BlockchainConfig.INDEXER_DB,
+            start_block=BlockchainConfig.INDEXER_START_BLOCK,
+            chunk_size=BlockchainConfig.INDEXER_CHUNK_SIZE,
+            confirmations=BlockchainConfig.INDEXER_CONFIRMATIONS,
+            lookback_blocks=BlockchainConfig.INDEXER_LOOKBACK_BLOCKS,
+        )
+        self.award_sender = award_sender
+        self.nonce_manager = award_sender.nonce_manager
+        self.confirmations = confirmations
+        self._resume_awards()
+        self._chain_ready.set()
     
     def start_game(self, name: str):
         """Initialize the game with player name"""
@@ -87,6 +333,7 @@ class PlayToEarnGame:
             print("❌ Invalid player name!")
             return False
         self.player_name = name
+        self._mark_dirty()
         print(f"\n🎮 Welcome to Blockchain Play-to-Earn, {self.player_name}!")
         print(f"📍 Your Wallet: {self.player_wallet}")
         print("Complete tasks to earn ERC-20 tokens on the blockchain!\n")
@@ -95,11 +342,33 @@ class PlayToEarnGame:
     def sync_blockchain_balance(self):
         """Check balance on blockchain"""
         try:
-            balance = self.contract.functions.balanceOf(self.player_wallet).call()
+            balance = self.balance_reader.get_balance(self.player_wallet)
             self.blockchain_tokens = balance
-            print(f"✅ Synced balance from blockchain: {balance} tokens")
+            self._mark_dirty()
+            log.info("✅ Synced balance from blockchain: %s tokens", balance, extra={"wallet": self.player_wallet})
         except Exception as e:
-            print(f"⚠️  Could not sync balance: {e}")
+            log.warning("⚠️  Could not sync balance: %s", e)
+    
+    def show_reward_history(self, limit: int = 10):
+        """Show recent token transfers and total earned from the local event index"""
+        try:
+            self.indexer.sync()
+        except Exception as e:
+            if not self._chain_ready.is_set():
+                print(f"⚠️  Could not load reward history: {e}")
+                return
+            print(f"⚠️  Could not update reward history (showing last indexed state): {e}")
+        
+        history = self.indexer.history(self.player_wallet, limit=limit)
+        print("\n📜 REWARD HISTORY")
+        print("-" * 60)
+        if not history:
+            print("No transfers indexed yet.")
+        for entry in history:
+            kind = "🎁 Award" if entry["award"] else ("📥 In" if entry["to"] == self.player_wallet else "📤 Out")
+            print(f"{kind}: {entry['amount']} tokens | Block {entry['block']} | {entry['tx_hash'][:10]}...")
+        print(f"💰 Total Earned: {self.indexer.total_earned(self.player_wallet)} tokens")
+        print("-" * 60 + "\n")
     
     def display_stats(self):
         """Display current player statistics"""
@@ -107,101 +376,228 @@ class PlayToEarnGame:
         print(f"👤 Player: {self.player_name}")
         print(f"🔐 Wallet: {self.player_wallet}")
         print(f"💰 Local Tokens: {self.tokens} | 🔗 Blockchain Tokens: {self.blockchain_tokens}")
+        balances = self.ledger.balances(self.player_wallet)
+        print(f"🧾 Settled: {balances['settled']} | ⏳ Unsettled: {balances['unsettled']}")
         print(f"⭐ Level: {self.level}")
-        completed = len([t for t in self.tasks if t["completed"]])
-        print(f"✅ Tasks Completed: {completed}/{len(self.tasks)}")
+        print(f"✅ Tasks Completed: {self.tasks.completed_count}/{len(self.tasks)}")
         print("="*60 + "\n")
     
     def display_tasks(self):
         """Show all available tasks"""
         print("📋 AVAILABLE TASKS:\n")
         for task in self.tasks:
-            status = "✅" if task["completed"] else "⭕"
-            tx_info = f" [TxHash: {task['tx_hash'][:10]}...]" if task['tx_hash'] else ""
-            print(f"{status} [{task['id']}] {task['title']}{tx_info}")
-            print(f"   Difficulty: {task['difficulty']} | Reward: +{task['reward']} tokens")
+            status = "✅" if task.completed else "⭕"
+            tx_info = f" [TxHash: {task.tx_hash[:10]}... {task.tx_status}]" if task.tx_hash else ""
+            if task.tx_status in ("queued", "unsettled"):
+                tx_info = f" [{task.tx_status}]"
+            print(f"{status} [{task.id}] {task.title}{tx_info}")
+            print(f"   Difficulty: {task.difficulty} | Reward: +{task.reward} tokens")
             print()
     
     def complete_task(self, task_id: int):
-        """Complete a task and mint tokens on blockchain"""
-        task = next((t for t in self.tasks if t["id"] == task_id), None)
-        
-        if not task:
-            print("❌ Task not found!")
-            return False
+        """Complete a task and send the token award; confirmation happens in the background"""
+        # Open awards from the last run must be reconciled before a new one is recorded
+        # (in local-first mode reconciling never fails the outbox, so there is nothing to wait for)
+        if not self.settlement:
+            try:
+                self.require_chain()
+            except Exception as e:
+                print(f"❌ {e}")
+                return False
         
-        if task["completed"]:
-            print("⚠️  This task is already completed!")
-            return False
+        with self._state_lock:
+            task = self.tasks.get(task_id)
+            
+            if not task:
+                print("❌ Task not found!")
+                return False
+            
+            if task.completed:
+                print("⚠️  This task is already completed!")
+                return False
+            
+            if self.ledger.has_open_award(self.player_wallet, task.id):
+                print("⏳ The last award for this task may still be mined; try again once it settles")
+                return False
+            
+            # Record the award before anything is queued or signed
+            award_id = self.ledger.record_intent(self.player_wallet, task.reward, task.id)
+            
+            # Mark task as completed locally
+            self.tasks.set_completed(task, True)
+            self.tokens += task.reward
+            if self.settlement:
+                task.tx_status = "unsettled"
+            elif self.reward_batcher:
+                # Set before the batcher can flush it: the send callbacks move it on from here
+                task.tx_status = "queued"
+            self._mark_dirty(task)
+            
+            log.info("⏳ Completing task: %s (+%s tokens)", task.title, task.reward,
+                     extra={"task_id": task.id, "award_id": award_id})
+            self._check_level_up()
         
-        # Mark task as completed locally
-        task["completed"] = True
-        self.tokens += task["reward"]
+        if self.settlement:
+            # The intent is already durable; the settlement worker sends it when it can
+            log.info("📥 Reward saved locally; it settles on-chain in the background", extra={"award_id": award_id})
+            return True
         
-        print(f"\n⏳ Completing task: {task['title']}...")
-        print(f"💰 Reward: +{task['reward']} tokens")
+        if self.reward_batcher:
+            self.reward_batcher.add(
+                self.player_wallet,
+                task.reward,
+                on_sent=lambda tx_hash: self._on_award_sent(task, tx_hash),
+                on_error=lambda e: self._on_award_send_failed(task, e, award_id),
+                award_id=award_id,
+            )
+            log.info("📦 Reward queued for the next blockchain batch", extra={"award_id": award_id})
+            return True
         
         # Send transaction to blockchain
         try:
-            tx_hash = self.mint_tokens_on_blockchain(task['reward'])
-            task["tx_hash"] = tx_hash
-            self.blockchain_tokens += task['reward']
-            
-            print(f"🎉 Task completed and tokens minted on blockchain!")
-            print(f"📤 Transaction Hash: {tx_hash}")
-            
-            # Check for level up
-            completed_count = len([t for t in self.tasks if t["completed"]])
-            if completed_count % 2 == 0:
-                self.level += 1
-                print(f"🚀 LEVEL UP! You are now Level {self.level}!")
-            
-            return True
-            
+            tx_hash = self.send_award_transaction(task.reward, award_ids=[award_id])
         except Exception as e:
-            print(f"❌ Blockchain transaction failed: {e}")
-            task["completed"] = False
-            self.tokens -= task['reward']
+            self._on_award_send_failed(task, e, award_id)
             return False
+        
+        self._on_award_sent(task, tx_hash)
+        return True
+    
+    def _check_level_up(self):
+        """Level up every second completed task"""
+        if self.tasks.completed_count % 2 == 0:
+            self.level += 1
+            print(f"🚀 LEVEL UP! You are now Level {self.level}!")
+    
+    def _on_award_sent(self, task: Task, tx_hash: str):
+        """The award is broadcast; hand it to the confirmation tracker"""
+        with self._state_lock:
+            task.tx_hash = tx_hash
+            task.tx_status = "pending"
+            self._mark_dirty(task, record_tx=True)
+        self._track_award(task)
+        log.info("📤 Transaction sent: %s (confirming in background)", tx_hash, extra={"task_id": task.id})
+    
+    def _track_award(self, task: Task):
+        self.confirmations.track(
+            task.tx_hash,
+            on_confirmed=lambda h, receipt: self._on_award_confirmed(task, receipt),
+            on_failed=lambda h, receipt: (
+                self._on_award_failed(task, receipt) if receipt is not None else self._on_award_unconfirmed(task)
+            ),
+        )
+    
+    def _on_award_send_failed(self, task: Task, error: Exception, award_id: str = None):
+        """The award could not be broadcast, so undo the completion"""
+        log.error("❌ Blockchain transaction failed: %s", error, extra={"task_id": task.id, "award_id": award_id})
+        if award_id:
+            # Only touches awards that were never signed; a signed one is settled by reconcile
+            self.ledger.mark_failed([award_id], str(error))
+        self._on_award_failed(task)
+    
+    def _on_award_confirmed(self, task: Task, receipt=None):
+        """Tracker callback: the award transaction was mined successfully"""
+        if receipt is not None:
+            self.ledger.settle(task.tx_hash, receipt)
+        with self._state_lock:
+            task.tx_status = "confirmed"
+            self.blockchain_tokens += task.reward
+            self._mark_dirty(task, record_tx=True)
+        log.info("🎉 Tokens for '%s' confirmed on blockchain!", task.title, extra={"task_id": task.id, "tx_hash": task.tx_hash})
+    
+    def _on_outbox_sent(self, awards: List[Dict], tx_hash: str):
+        """Settlement callback: outbox awards went out in tx_hash"""
+        for task in self._outbox_tasks(awards):
+            self._on_award_sent(task, tx_hash)
+    
+    def _on_outbox_failed(self, awards: List[Dict], error: Exception):
+        """Settlement callback: the node refused these awards for good"""
+        for task in self._outbox_tasks(awards):
+            self._on_award_send_failed(task, error)
+    
+    def _outbox_tasks(self, awards: List[Dict]) -> List[Task]:
+        tasks = (self.tasks.get(award["task_id"]) for award in awards if award["task_id"] is not None)
+        return [task for task in tasks if task is not None]
+    
+    def _on_award_unconfirmed(self, task: Task):
+        """Tracker callback: no receipt in time (maybe the node is down), so the award may still be mined"""
+        if not self.ledger.has_open_award(self.player_wallet, task.id):
+            # Progress saved before the ledger existed: nothing to check it against
+            self._on_award_failed(task)
+            return
+        log.warning("⏳ Award for '%s' is not confirmed yet; it will be re-checked", task.title,
+                    extra={"task_id": task.id, "tx_hash": task.tx_hash})
+        if self.settlement:
+            with self._state_lock:
+                task.tx_status = "unsettled"
+                self._mark_dirty(task)
+            self.settlement.request_recovery()
+        else:
+            self._recheck_award(task)
+    
+    def _recheck_award(self, task: Task):
+        """Settle an unconfirmed award from the ledger: reconcile rebroadcasts the signed
+        transaction, or fails it if its nonce was taken; watch it again while it is in doubt"""
+        from reward_ledger import CONFIRMED as AWARD_CONFIRMED, OPEN
+        
+        try:
+            # This wallet's queued intents belong to the running batcher, so they are kept
+            self.ledger.reconcile(self.w3, self.award_sender.sender_wallet)
+        except Exception as e:
+            log.warning("⚠️  Could not reconcile reward ledger (will check again): %s", e)
+            self._track_award(task)
+            return
+        award = self.ledger.latest_awards(self.player_wallet).get(task.id)
+        status = award["status"] if award else None
+        if status in OPEN:
+            self._track_award(task)
+        elif status == AWARD_CONFIRMED:
+            # reconcile already stored the receipt
+            self._on_award_confirmed(task)
+        else:
+            self._on_award_failed(task)
+    
+    def _on_award_failed(self, task: Task, receipt=None):
+        """Tracker callback: the award reverted or could not be sent, so undo the completion"""
+        if receipt is not None:
+            self.ledger.settle(task.tx_hash, receipt)
+        with self._state_lock:
+            if self.tasks.completed_count % 2 == 0 and self.level > 1:
+                self.level -= 1
+            self.tasks.set_completed(task, False)
+            task.tx_status = "failed"
+            self.tokens -= task.reward
+            self._mark_dirty(task, record_tx=task.tx_hash is not None)
+        log.error("❌ Award for '%s' failed on blockchain; task reopened", task.title,
+                  extra={"task_id": task.id, "tx_hash": task.tx_hash})
     
     def mint_tokens_on_blockchain(self, amount: int) -> str:
         """Mint tokens by calling smart contract"""
         try:
-            # Get current gas price and nonce
-            gas_price = self.w3.eth.gas_price
-            nonce = self.w3.eth.get_transaction_count(self.player_wallet)
-            
-            # Build transaction
-            tx = self.contract.functions.awardTokens(
-                self.player_wallet,
-                amount
-            ).build_transaction({
-                'from': self.player_wallet,
-                'gas': 300000,
-                'gasPrice': gas_price,
-                'nonce': nonce,
-            })
-            
-            # Sign transaction
-            signed_tx = self.w3.eth.account.sign_transaction(tx, self.private_key)
-            
-            # Send transaction - use correct attribute name
-            tx_hash = self.w3.eth.send_raw_transaction(signed_tx.raw_transaction)
+            tx_hash = self.send_award_transaction(amount)
             
             # Wait for receipt
-            print("⏳ Waiting for transaction confirmation...")
+            log.debug("⏳ Waiting for transaction confirmation...", extra={"tx_hash": tx_hash})
+            started = time.monotonic()
             receipt = self.w3.eth.wait_for_transaction_receipt(tx_hash, timeout=120)
+            TX_CONFIRMATION_SECONDS.labels(CONFIRMED if receipt['status'] == 1 else FAILED).observe(
+                time.monotonic() - started
+            )
             
             if receipt['status'] == 1:
-                return self.w3.to_hex(tx_hash)
+                return tx_hash
             else:
                 raise Exception("Transaction failed on blockchain")
                 
         except Exception as e:
-            import traceback
-            traceback.print_exc()
+            # The traceback is rendered by the log listener, not on this thread
+            log.exception("Minting failed")
             raise Exception(f"Minting failed: {str(e)}")
     
+    def send_award_transaction(self, amount: int, player: str = None, award_ids: List[str] = ()) -> str:
+        """Sign and broadcast an awardTokens transaction without waiting for its receipt"""
+        return self.award_sender.send_award(player or self.player_wallet, amount, award_ids=award_ids)
+    
     def add_custom_task(self, title: str, reward: int):
         """Add a custom task"""
         if not title.strip():
@@ -212,39 +608,36 @@ class PlayToEarnGame:
             print("❌ Reward must be positive!")
             return False
         
-        new_task = {
-            "id": self.next_task_id,
-            "title": title,
-            "reward": reward,
-            "completed": False,
-            "difficulty": "Custom",
-            "tx_hash": None
-        }
-        self.tasks.append(new_task)
+        new_task = Task(self.next_task_id, title, reward)
+        self.tasks.add(new_task)
         self.next_task_id += 1
+        self._mark_dirty(new_task)
         print(f"✨ New task added: {title} (+{reward} tokens)")
         return True
     
     def delete_task(self, task_id: int):
         """Delete a task (only if not completed)"""
-        task = next((t for t in self.tasks if t["id"] == task_id), None)
+        task = self.tasks.get(task_id)
         
         if not task:
             print("❌ Task not found!")
             return False
         
-        if task["completed"]:
+        if task.completed:
             print("⚠️  Cannot delete completed tasks!")
             return False
         
-        self.tasks.remove(task)
-        print(f"🗑️  Task deleted: {task['title']}")
+        with self._state_lock:
+            self.tasks.remove(task_id)
+            self._dirty_tasks.discard(task_id)
+            self._deleted_tasks.add(task_id)
+        print(f"🗑️  Task deleted: {task.title}")
         return True
     
     def get_game_summary(self):
         """Get overall game summary"""
-        total_potential_tokens = sum(t["reward"] for t in self.tasks)
-        completed = len([t for t in self.tasks if t["completed"]])
+        total_potential_tokens = self.tasks.total_reward
+        completed = self.tasks.completed_count
         
         print("\n" + "="*60)
         print("🏆 GAME SUMMARY")
@@ -253,27 +646,164 @@ class PlayToEarnGame:
         print(f"Completed: {completed}")
         print(f"Local Tokens: {self.tokens}/{total_potential_tokens}")
         print(f"Blockchain Tokens: {self.blockchain_tokens}")
-        print(f"Completion Rate: {(completed/len(self.tasks)*100):.1f}%")
+        print(f"Completion Rate: {(completed/max(len(self.tasks), 1)*100):.1f}%")
         print("="*60 + "\n")
     
-    def save_progress(self, filename: str = "game_progress.json"):
-        """Save game progress to file"""
-        data = {
+    def _mark_dirty(self, task: Task = None, record_tx: bool = False):
+        """Remember what changed so save_progress only writes those rows"""
+        with self._state_lock:
+            self._dirty_player = True
+            if task is not None:
+                self._dirty_tasks.add(task.id)
+                if record_tx:
+                    self._dirty_txs[(task.tx_hash, task.id)] = {
+                        "tx_hash": task.tx_hash,
+                        "task_id": task.id,
+                        "amount": task.reward,
+                        "status": task.tx_status,
+                    }
+    
+    def save_progress(self, filename: str = None):
+        """Save changed players, tasks and transactions to the game database; with a filename other
+        than the game database, copy this player's whole state into the SQLite file at that path"""
+        if filename is not None and os.path.abspath(filename) != os.path.abspath(self.store.db_path):
+            self._save_copy(filename)
+            return
+        with self._state_lock:
+            player = self._player_row() if self._dirty_player else None
+            tasks = [self.tasks.get(i).to_dict() for i in self._dirty_tasks if i in self.tasks]
+            deleted = list(self._deleted_tasks)
+            txs = list(self._dirty_txs.values())
+            self._dirty_player = False
+            self._dirty_tasks.clear()
+            self._deleted_tasks.clear()
+            self._dirty_txs.clear()
+        
+        try:
+            self.store.save(self.player_wallet, player, tasks, deleted, txs)
+        except Exception:
+            # Keep the changes marked so the next save retries them
+            with self._state_lock:
+                self._dirty_player = self._dirty_player or player is not None
+                self._dirty_tasks.update(t["id"] for t in tasks)
+                self._deleted_tasks.update(deleted)
+                for tx in txs:
+                    self._dirty_txs.setdefault((tx["tx_hash"], tx["task_id"]), tx)
+            raise
+        log.info("💾 Progress saved to %s (%s task(s) updated)", self.store.db_path, len(tasks))
+    
+    def _save_copy(self, filename: str):
+        """Write this player, every task and the transaction history to another game database"""
+        # Saved first so the game database holds every transaction to copy
+        self.save_progress()
+        with self._state_lock:
+            player = self._player_row()
+            tasks = [task.to_dict() for task in self.tasks]
+        store = GameStore(filename)
+        try:
+            saved = store.load_player(self.player_wallet)
+            deleted = [t["id"] for t in saved["tasks"] if t["id"] not in self.tasks] if saved else []
+            store.save(self.player_wallet, player, tasks, deleted, self.store.transactions_for(self.player_wallet))
+        finally:
+            store.close()
+        log.info("💾 Progress saved to %s", filename)
+    
+    def _player_row(self) -> Dict:
+        return {
             "player_name": self.player_name,
-            "player_wallet": self.player_wallet,
             "tokens": self.tokens,
             "blockchain_tokens": self.blockchain_tokens,
             "level": self.level,
-            "tasks": self.tasks,
-            "saved_at": datetime.now().isoformat()
+            "next_task_id": self.next_task_id,
         }
-        with open(filename, 'w') as f:
-            json.dump(data, f, indent=2)
-        print(f"💾 Progress saved to {filename}")
+    
+    def load_progress(self) -> bool:
+        """Restore this wallet's saved state, if any (reconciling awards waits for the chain)"""
+        data = self.store.load_player(self.player_wallet)
+        if data is not None:
+            with self._state_lock:
+                self.player_name = data["player_name"]
+                self.tokens = data["tokens"]
+                self.blockchain_tokens = data["blockchain_tokens"]
+                self.level = data["level"]
+                self.next_task_id = data["next_task_id"]
+                self.tasks = TaskRegistry.from_dicts(data["tasks"])
+                self._dirty_player = False
+                self._dirty_tasks.clear()
+            log.info("📂 Loaded saved progress for %s", self.player_name or self.player_wallet)
+        if self._chain_ready.is_set():
+            self._resume_awards()
+        elif BlockchainConfig.LOCAL_FIRST:
+            # Awards recorded since the last save are already in the ledger, chain or not
+            self._apply_ledger()
+        return data is not None
+    
+    def _resume_awards(self):
+        """Reconcile with the reward ledger and pick up awards the last run left unconfirmed"""
+        awards = self._reconcile_awards()
+        for task in self.tasks:
+            if task.id in awards:
+                continue
+            # Progress saved before the ledger existed
+            if task.tx_status == "pending":
+                # Confirmation was still outstanding when the game last stopped
+                self._track_award(task)
+            elif task.tx_status == "queued":
+                # The reward never left the batch queue, so nothing was minted
+                self._on_award_failed(task)
+    
+    def _reconcile_awards(self, strict: bool = False) -> Dict:
+        """Settle awards the last run left open and apply the ledger's outcome to the tasks
+        (strict: raise if the chain cannot be reached instead of waiting for the next start)"""
+        try:
+            # A local-first game still means to settle this wallet's outbox; otherwise its
+            # unsigned intents died with the last run
+            self.ledger.reconcile(
+                self.w3,
+                self.award_sender.sender_wallet,
+                stale_wallets=() if BlockchainConfig.LOCAL_FIRST else (self.player_wallet,)
+            )
+        except Exception as e:
+            if strict:
+                raise
+            log.warning("⚠️  Could not reconcile reward ledger (will retry next start): %s", e)
+        
+        awards, waiting = self._apply_ledger()
+        # Mid-game recoveries find transactions this run is still tracking (with every task they carry)
+        tracked = {task.tx_hash for task in waiting if self.confirmations.status(task.tx_hash) == PENDING}
+        for task in waiting:
+            if task.tx_hash not in tracked:
+                self._track_award(task)
+        return awards
+    
+    def _apply_ledger(self):
+        """Apply the ledger's latest award per task; returns (awards, tasks awaiting a receipt)"""
+        from reward_ledger import apply_ledger_awards
+        
+        awards = self.ledger.latest_awards(self.player_wallet)
+        with self._state_lock:
+            changed, waiting, confirmed_delta = apply_ledger_awards(self.tasks, awards)
+            if changed:
+                # Tokens and level follow from the completed tasks
+                self.tokens = sum(t.reward for t in self.tasks if t.completed)
+                self.level = 1 + self.tasks.completed_count // 2
+                self.blockchain_tokens += confirmed_delta
+                for task in changed:
+                    self._mark_dirty(task, record_tx=task.tx_hash is not None)
+                log.info("🧾 Reconciled %s award(s) with the reward ledger", len(changed))
+        return awards, waiting
 
 
 def main():
     """Main game loop with blockchain integration"""
+    # web3 loads while the player is still typing
+    preload_chain_modules()
+    BlockchainConfig.load_env()
+    # Plain lines on stdout so log output reads like the rest of the game
+    configure_logging(default_format="text", stream=sys.stdout)
+    if BlockchainConfig.METRICS_PORT:
+        from metrics import start_http_server
+        start_http_server(BlockchainConfig.METRICS_PORT)
     
     print("\n" + "="*60)
     print("🎮 BLOCKCHAIN PLAY-TO-EARN GAME 🎮")
@@ -294,14 +824,14 @@ def main():
     
     # Initialize game
     try:
-        game = PlayToEarnGame(contract_address, player_wallet, private_key)
+        game = PlayToEarnGame(contract_address, player_wallet, private_key, lazy=BlockchainConfig.LAZY_CONNECT)
     except Exception as e:
         print(f"❌ Game initialization failed: {e}")
         return
     
-    # Get player name
+    # Get player name (returning players keep their saved name)
     print("\n")
-    while True:
+    while not (game.player_name and game.start_game(game.player_name)):
         name = input("Enter your player name: ").strip()
         if game.start_game(name):
             break
@@ -314,6 +844,7 @@ def main():
         print("\n📌 COMMANDS:")
         print("  'complete <id>' - Complete a task and mint tokens")
         print("  'sync' - Sync balance from blockchain")
+        print("  'history' - View reward history")
         print("  'add' - Add a custom task")
         print("  'delete <id>' - Delete a task")
         print("  'summary' - View game summary")
@@ -341,6 +872,9 @@ def main():
         elif action == "sync":
             game.sync_blockchain_balance()
         
+        elif action == "history":
+            game.show_reward_history()
+        
         elif action == "add":
             title = input("Enter task title: ").strip()
             try:
@@ -366,6 +900,19 @@ def main():
             game.save_progress()
         
         elif action == "quit":
+            if game.reward_batcher:
+                game.reward_batcher.stop()
+            if game.settlement:
+                game.settlement.stop()
+                unsettled = game.ledger.balances(game.player_wallet)["unsettled"]
+                if unsettled:
+                    print(f"📥 {unsettled} token(s) not settled yet; they are saved and settle on your next start")
+            if game.chain_ready:
+                if game.confirmations.pending_count():
+                    print("⏳ Waiting for pending transactions to confirm...")
+                    game.confirmations.drain(timeout=BlockchainConfig.RECEIPT_TIMEOUT)
+                game.confirmations.stop()
+            game.save_progress()
             print("\n👋 Thanks for playing! Your tokens are on the blockchain. Goodbye!")
             break
         
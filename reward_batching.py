@@ -0,0 +1,166 @@
+"""
+Reward Batching Queue
+Coalesces many small rewards per player over a time/size window so they
+are minted with one award transaction instead of one per task
+"""
+
+import logging
+import threading
+import time
+from itertools import islice
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Union
+
+from metrics import Gauge, Histogram
+
+log = logging.getLogger("batcher")
+
+# flush_fn receives {player: total_amount} and {player: [award ids]} and
+# returns {player: tx_hash or Exception}
+FlushFn = Callable[[Dict[str, int], Dict[str, List[str]]], Dict[str, Union[str, Exception]]]
+
+REWARD_QUEUE_DEPTH = Gauge("reward_queue_depth", "Rewards waiting in batch queues for the next flush")
+REWARD_FLUSH_SECONDS = Histogram("reward_flush_seconds", "Time to sign and send one flushed batch")
+_QUEUE_DEPTH = REWARD_QUEUE_DEPTH.labels()
+_FLUSH = REWARD_FLUSH_SECONDS.labels()
+
+
+class _PendingReward:
+    __slots__ = ("amount", "callbacks", "award_ids")
+
+    def __init__(self):
+        self.amount = 0
+        self.callbacks = []  # (on_sent, on_error) pairs
+        self.award_ids = []  # ledger ids of the merged rewards
+
+
+class RewardBatcher:
+    """Background queue that merges rewards per player and flushes them in windows"""
+
+    def __init__(self, flush_fn: FlushFn, window: float = 2.0, max_size: int = 100):
+        self.flush_fn = flush_fn
+        self.window = window
+        self.max_size = max_size
+        self._cond = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._pending: Dict[str, _PendingReward] = {}
+        self._queued = 0
+        self._oldest: Optional[float] = None
+        self._stopped = False
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        """Start the flushing thread (no-op if already running)"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, name="reward-batcher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the flushing thread and send whatever is still queued"""
+        with self._cond:
+            self._stopped = True
+            self._cond.notify()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+    def add(self, player: str, amount: int,
+            on_sent: Optional[Callable[[str], None]] = None,
+            on_error: Optional[Callable[[Exception], None]] = None,
+            award_id: Optional[str] = None):
+        """Queue a reward; on_sent gets the tx hash of the award it was merged into"""
+        with self._cond:
+            reward = self._pending.get(player)
+            if reward is None:
+                reward = self._pending[player] = _PendingReward()
+            reward.amount += amount
+            reward.callbacks.append((on_sent, on_error))
+            if award_id is not None:
+                reward.award_ids.append(award_id)
+            self._queued += 1
+            _QUEUE_DEPTH.inc()
+            if self._oldest is None:
+                # Wake the flusher so it starts timing this window
+                self._oldest = time.monotonic()
+                self._cond.notify()
+            elif self._queued >= self.max_size:
+                self._cond.notify()
+
+    def pending_count(self) -> int:
+        """Number of individual rewards waiting for the next flush"""
+        with self._cond:
+            return self._queued
+
+    def flush(self) -> int:
+        """Send everything queued right now; returns the number of players awarded"""
+        with self._flush_lock:
+            with self._cond:
+                batch = self._pending
+                _QUEUE_DEPTH.dec(self._queued)
+                self._pending = {}
+                self._queued = 0
+                self._oldest = None
+            if not batch:
+                return 0
+
+            started = time.perf_counter()
+            try:
+                results = self.flush_fn(
+                    {player: r.amount for player, r in batch.items()},
+                    {player: r.award_ids for player, r in batch.items() if r.award_ids},
+                )
+            except Exception as e:
+                results = {player: e for player in batch}
+            _FLUSH.observe(time.perf_counter() - started)
+
+            for player, reward in batch.items():
+                result = results.get(player)
+                if result is None:
+                    result = Exception(f"No award was sent for {player}")
+                for on_sent, on_error in reward.callbacks:
+                    callback = on_error if isinstance(result, Exception) else on_sent
+                    if callback:
+                        try:
+                            callback(result)
+                        except Exception:
+                            log.exception("⚠️  Reward callback failed for %s", player)
+            return len(batch)
+
+    def _due(self) -> bool:
+        if not self._queued:
+            return False
+        if self._queued >= self.max_size:
+            return True
+        return time.monotonic() - self._oldest >= self.window
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._stopped and not self._due():
+                    timeout = None
+                    if self._oldest is not None:
+                        timeout = max(0.0, self.window - (time.monotonic() - self._oldest))
+                    self._cond.wait(timeout)
+                if self._stopped:
+                    return
+            try:
+                self.flush()
+            except Exception as e:
+                log.warning("⚠️  Reward flush failed: %s", e)
+
+
+def chunked(items: List, size: int) -> List[List]:
+    """Split a list into consecutive chunks of at most size items"""
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def iter_chunks(items: Iterable, size: int) -> Iterator[List]:
+    """chunked() for any iterable, pulling at most size items into memory at a time"""
+    iterator = iter(items)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
@@ -0,0 +1,323 @@
+"""
+Reward Ledger
+Write-ahead record of every award: the intent is stored before anything is
+queued, and the signed raw transaction and nonce before broadcast, so a
+restart can reconcile against chain receipts and never mint an award twice
+"""
+
+import logging
+import sqlite3
+import threading
+import uuid
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from eth_account import Account
+from eth_utils import keccak
+from web3 import Web3
+from web3.exceptions import TransactionNotFound
+
+from rpc_provider import pinned_to_primary
+from tx_confirmations import receipt_status
+
+log = logging.getLogger("ledger")
+
+# Award statuses
+INTENT = "intent"  # recorded, not signed yet (the outbox of a local-first game)
+SIGNED = "signed"  # raw tx stored; it may or may not have reached the node
+SENT = "sent"
+CONFIRMED = "confirmed"
+REVERTED = "reverted"
+FAILED = "failed"  # never broadcast, or its nonce was taken by another transaction
+
+# The award may still be mined, so it must not be sent again
+OPEN = (SIGNED, SENT)
+
+# Outcomes of check_signed_tx
+MINED = "mined"
+DROPPED = "dropped"
+REBROADCAST = "rebroadcast"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS awards (
+    award_id TEXT PRIMARY KEY,
+    wallet TEXT NOT NULL,
+    task_id INTEGER,
+    amount INTEGER NOT NULL,
+    tx_hash TEXT,
+    status TEXT NOT NULL,
+    error TEXT,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS ledger_txs (
+    tx_hash TEXT PRIMARY KEY,
+    sender TEXT,
+    nonce INTEGER NOT NULL,
+    raw_tx BLOB NOT NULL,
+    status TEXT NOT NULL,
+    updated_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_awards_wallet_task ON awards (wallet, task_id);
+CREATE INDEX IF NOT EXISTS idx_awards_tx_hash ON awards (tx_hash);
+CREATE INDEX IF NOT EXISTS idx_ledger_txs_status ON ledger_txs (status);
+"""
+
+
+def check_signed_tx(w3, tx_hash: str, nonce: int, raw_tx: bytes, mined_count: int) -> Tuple[str, Optional[dict]]:
+    """Decide what happened to a signed transaction after a restart.
+
+    mined_count is the sender's latest (mined) transaction count. Returns (MINED, receipt),
+    (DROPPED, None) when another transaction took the nonce, or (REBROADCAST, None) after
+    resending the identical raw transaction - same nonce, so it cannot be mined twice.
+    Any other RPC error propagates: DROPPED for a transaction that was in fact mined would
+    pay it again, so the caller must leave the row open until the node answers.
+    """
+    # mined_count came from the primary endpoint; a lagging secondary could miss the receipt
+    with pinned_to_primary(w3):
+        try:
+            receipt = w3.eth.get_transaction_receipt(tx_hash)
+        except TransactionNotFound:
+            receipt = None
+    if receipt is not None:
+        return MINED, receipt
+    if nonce < mined_count:
+        return DROPPED, None
+    try:
+        w3.eth.send_raw_transaction(raw_tx)
+    except Exception as e:
+        if "known" not in str(e).lower():
+            log.warning("⚠️  Rebroadcast of %s failed: %s", tx_hash, e)
+    return REBROADCAST, None
+
+
+def apply_ledger_awards(tasks, awards: Dict[int, Dict]) -> Tuple[List, List, int]:
+    """Bring a TaskRegistry in line with the ledger's latest award per task.
+
+    Returns (changed tasks, tasks still awaiting a receipt, change in confirmed rewards).
+    Safe to run repeatedly: only differences between the saved state and the ledger apply.
+    """
+    changed, waiting, confirmed_delta = [], [], 0
+    for task in tasks:
+        award = awards.get(task.id)
+        if award is None:
+            continue
+        status = award["status"]
+        completed = status in (CONFIRMED, SIGNED, SENT, INTENT)
+        tx_status = {
+            CONFIRMED: "confirmed", SIGNED: "pending", SENT: "pending", INTENT: "unsettled"
+        }.get(status, "failed")
+        tx_hash = award["tx_hash"] or task.tx_hash
+        if status in OPEN:
+            waiting.append(task)
+        if (task.completed, task.tx_hash, task.tx_status) == (completed, tx_hash, tx_status):
+            continue
+        if task.tx_status == "confirmed":
+            confirmed_delta -= task.reward
+        if tx_status == "confirmed":
+            confirmed_delta += task.reward
+        tasks.set_completed(task, completed)
+        task.tx_hash = tx_hash
+        task.tx_status = tx_status
+        changed.append(task)
+    return changed, waiting, confirmed_delta
+
+
+class RewardLedger:
+    """SQLite (WAL, synchronous=FULL) ledger shared by everything that sends awards"""
+
+    def __init__(self, db_path: str = "reward_ledger.db"):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        # A signed transaction must be on disk before it is broadcast
+        self._db.execute("PRAGMA synchronous=FULL")
+        self._db.executescript(SCHEMA)
+        self._migrate()
+
+    def _migrate(self):
+        """Add ledger_txs.sender to a ledger written before it existed, recovered from the raw transactions"""
+        columns = {name for _, name, *_ in self._db.execute("PRAGMA table_info(ledger_txs)")}
+        if "sender" in columns:
+            return
+        with self._db:
+            self._db.execute("ALTER TABLE ledger_txs ADD COLUMN sender TEXT")
+            rows = self._db.execute("SELECT tx_hash, raw_tx FROM ledger_txs").fetchall()
+            self._db.executemany(
+                "UPDATE ledger_txs SET sender = ? WHERE tx_hash = ?",
+                [(Account.recover_transaction(raw_tx), tx_hash) for tx_hash, raw_tx in rows]
+            )
+
+    def record_intent(self, wallet: str, amount: int, task_id: Optional[int] = None) -> str:
+        """Store an award before it is queued; returns its award id"""
+        award_id = uuid.uuid4().hex
+        now = datetime.now().isoformat()
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT INTO awards (award_id, wallet, task_id, amount, status, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (award_id, wallet, task_id, amount, INTENT, now, now)
+            )
+        return award_id
+
+    def has_open_award(self, wallet: str, task_id: int) -> bool:
+        """Whether an earlier award for this task might still be mined"""
+        with self._lock:
+            row = self._db.execute(
+                f"SELECT 1 FROM awards WHERE wallet = ? AND task_id = ? AND status IN ({','.join('?' * len(OPEN))}) LIMIT 1",
+                (wallet, task_id, *OPEN)
+            ).fetchone()
+        return row is not None
+
+    def record_signed(self, award_ids: Iterable[str], sender: str, nonce: int, raw_tx: bytes) -> str:
+        """Store the signed transaction carrying these awards; call right before broadcasting"""
+        tx_hash = Web3.to_hex(keccak(raw_tx))
+        award_ids = list(award_ids)
+        now = datetime.now().isoformat()
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO ledger_txs (tx_hash, sender, nonce, raw_tx, status, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (tx_hash, Web3.to_checksum_address(sender), nonce, raw_tx, SIGNED, now)
+            )
+            self._db.executemany(
+                "UPDATE awards SET tx_hash = ?, status = ?, error = NULL, updated_at = ? WHERE award_id = ?",
+                [(tx_hash, SIGNED, now, award_id) for award_id in award_ids]
+            )
+        return tx_hash
+
+    def mark_sent(self, tx_hash: str):
+        self._set_tx_status(tx_hash, SENT, only_from=(SIGNED,))
+
+    def mark_rejected(self, tx_hash: str, error: str):
+        """The node refused the transaction, so its awards were never broadcast"""
+        self._set_tx_status(tx_hash, FAILED, error=error)
+
+    def mark_unsigned(self, tx_hash: str):
+        """Forget a transaction that was not broadcast (e.g. re-signed with a fresh nonce)"""
+        now = datetime.now().isoformat()
+        with self._lock, self._db:
+            self._db.execute(
+                "UPDATE awards SET tx_hash = NULL, status = ?, updated_at = ? WHERE tx_hash = ?",
+                (INTENT, now, tx_hash)
+            )
+            self._db.execute("DELETE FROM ledger_txs WHERE tx_hash = ?", (tx_hash,))
+
+    def mark_failed(self, award_ids: Iterable[str], error: str):
+        """Awards that were dropped before they were ever signed"""
+        now = datetime.now().isoformat()
+        with self._lock, self._db:
+            self._db.executemany(
+                "UPDATE awards SET status = ?, error = ?, updated_at = ? WHERE award_id = ? AND status = ?",
+                [(FAILED, error, now, award_id, INTENT) for award_id in award_ids]
+            )
+
+    def fail_intents(self, wallet: str, error: str):
+        """Fail a wallet's unsigned awards, e.g. ones queued by a process that has stopped"""
+        now = datetime.now().isoformat()
+        with self._lock, self._db:
+            self._db.execute(
+                "UPDATE awards SET status = ?, error = ?, updated_at = ? WHERE wallet = ? AND status = ?",
+                (FAILED, error, now, wallet, INTENT)
+            )
+
+    def settle(self, tx_hash: str, receipt):
+        """Record a mined receipt (idempotent; several awards may share one transaction)"""
+        if receipt_status(receipt) == 1:
+            self._set_tx_status(tx_hash, CONFIRMED)
+        else:
+            self._set_tx_status(tx_hash, REVERTED, error="Transaction reverted")
+
+    def reconcile(self, w3, sender_wallet: str, stale_wallets: Iterable[str] = ()) -> List[str]:
+        """Settle sender_wallet's open transactions against the chain; returns hashes still awaiting a receipt.
+
+        Other senders' transactions in a shared ledger file are left to their own process.
+        Unsigned intents of stale_wallets were queued by a run that is gone, so they are failed;
+        any other wallet's may belong to a process that is still running. Raises if the node
+        errors part way; transactions not checked yet stay open for the next attempt.
+        """
+        for wallet in stale_wallets:
+            self.fail_intents(wallet, "Not sent before the game stopped")
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT tx_hash, nonce, raw_tx FROM ledger_txs WHERE sender = ? AND status IN ({','.join('?' * len(OPEN))}) "
+                "ORDER BY nonce", (Web3.to_checksum_address(sender_wallet), *OPEN)
+            ).fetchall()
+        if not rows:
+            return []
+
+        mined_count = w3.eth.get_transaction_count(sender_wallet, "latest")
+        waiting = []
+        for tx_hash, nonce, raw_tx in rows:
+            outcome, receipt = check_signed_tx(w3, tx_hash, nonce, raw_tx, mined_count)
+            if outcome == MINED:
+                self.settle(tx_hash, receipt)
+            elif outcome == DROPPED:
+                self._set_tx_status(tx_hash, FAILED, error="Nonce was used by another transaction")
+            else:
+                self.mark_sent(tx_hash)
+                waiting.append(tx_hash)
+        return waiting
+
+    def latest_awards(self, wallet: str) -> Dict[int, Dict]:
+        """Most recent award per task for a wallet"""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT task_id, award_id, amount, tx_hash, status FROM awards "
+                "WHERE rowid IN (SELECT MAX(rowid) FROM awards WHERE wallet = ? AND task_id IS NOT NULL GROUP BY task_id)",
+                (wallet,)
+            ).fetchall()
+        return {
+            task_id: {"award_id": award_id, "amount": amount, "tx_hash": tx_hash, "status": status}
+            for task_id, award_id, amount, tx_hash, status in rows
+        }
+
+    def outbox(self, wallet: Optional[str] = None, limit: int = 100) -> List[Dict]:
+        """Oldest awards recorded but not yet signed, optionally for one wallet"""
+        query = "SELECT award_id, wallet, task_id, amount FROM awards WHERE status = ?"
+        params = [INTENT]
+        if wallet is not None:
+            query += " AND wallet = ?"
+            params.append(wallet)
+        with self._lock:
+            rows = self._db.execute(query + " ORDER BY rowid LIMIT ?", (*params, limit)).fetchall()
+        return [
+            {"award_id": award_id, "wallet": wallet, "task_id": task_id, "amount": amount}
+            for award_id, wallet, task_id, amount in rows
+        ]
+
+    def balances(self, wallet: str) -> Dict[str, int]:
+        """Tokens awarded to a wallet: settled (mined) and unsettled (queued locally or awaiting a receipt)"""
+        unsettled = (INTENT, *OPEN)
+        with self._lock:
+            settled, pending = self._db.execute(
+                "SELECT COALESCE(SUM(CASE WHEN status = ? THEN amount END), 0), "
+                f"COALESCE(SUM(CASE WHEN status IN ({','.join('?' * len(unsettled))}) THEN amount END), 0) "
+                "FROM awards WHERE wallet = ?",
+                (CONFIRMED, *unsettled, wallet)
+            ).fetchone()
+        return {"settled": settled, "unsettled": pending}
+
+    def status(self, award_id: str) -> Optional[str]:
+        with self._lock:
+            row = self._db.execute("SELECT status FROM awards WHERE award_id = ?", (award_id,)).fetchone()
+        return row[0] if row else None
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def _set_tx_status(self, tx_hash: str, status: str, error: Optional[str] = None,
+                       only_from: Tuple[str, ...] = OPEN):
+        now = datetime.now().isoformat()
+        guard = ",".join("?" * len(only_from))
+        with self._lock, self._db:
+            self._db.execute(
+                f"UPDATE ledger_txs SET status = ?, updated_at = ? WHERE tx_hash = ? AND status IN ({guard})",
+                (status, now, tx_hash, *only_from)
+            )
+            self._db.execute(
+                f"UPDATE awards SET status = ?, error = ?, updated_at = ? WHERE tx_hash = ? AND status IN ({guard})",
+                (status, error, now, tx_hash, *only_from)
+            )
@@ -0,0 +1,296 @@
+"""
+Pooled Failover RPC Provider
+Web3 providers (sync and asyncio) with keep-alive connection pools, retries
+with exponential backoff, and health-scored failover/load-balancing across
+RPC endpoints
+"""
+
+import asyncio
+import random
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from typing import Any, Dict, List, Optional, Sequence
+
+import aiohttp
+import requests
+from requests.adapters import HTTPAdapter
+from web3 import AsyncWeb3, Web3
+from web3.providers import JSONBaseProvider
+from web3.providers.async_base import AsyncJSONBaseProvider
+
+from metrics import Counter, Histogram
+
+# HTTP statuses worth retrying on another attempt/endpoint
+TRANSIENT_STATUS = {408, 425, 429, 500, 502, 503, 504}
+
+# Sent to the primary endpoint only, so nonces and mempool state stay consistent
+PRIMARY_METHODS = {"eth_sendRawTransaction", "eth_sendTransaction", "eth_getTransactionCount"}
+
+RPC_REQUEST_SECONDS = Histogram(
+    "rpc_request_seconds", "JSON-RPC latency per method, retries and failover included", ["method"]
+)
+RPC_REQUEST_ERRORS = Counter("rpc_request_errors_total", "JSON-RPC calls that failed on every attempt", ["method"])
+
+
+@contextmanager
+def _measured(method: str):
+    """Record one JSON-RPC call (a whole batch counts as method "batch")"""
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        RPC_REQUEST_ERRORS.labels(method).inc()
+        raise
+    finally:
+        RPC_REQUEST_SECONDS.labels(method).observe(time.perf_counter() - started)
+
+
+class _Endpoint:
+    __slots__ = ("url", "session", "score", "latency", "failures", "down_until", "requests", "errors")
+
+    def __init__(self, url: str):
+        self.url = url
+        self.session = None  # requests.Session or aiohttp.ClientSession, owned by the provider
+        self.score = 1.0  # moving average of successes, 0..1
+        self.latency = 0.1  # moving average of seconds per request
+        self.failures = 0  # consecutive failures
+        self.down_until = 0.0
+        self.requests = 0
+        self.errors = 0
+
+    def available(self, now: float) -> bool:
+        return now >= self.down_until
+
+    def weight(self) -> float:
+        return max(self.score, 0.01) / max(self.latency, 0.001)
+
+
+class _FailoverPolicy:
+    """Endpoint choice, health scoring and backoff shared by the sync and async providers"""
+
+    def __init__(self, endpoint_urls: Sequence[str], timeout: float = 10.0, max_retries: int = 3,
+                 backoff: float = 0.25, max_backoff: float = 4.0, pool_size: int = 32,
+                 failure_threshold: int = 3, cooldown: float = 30.0, **kwargs):
+        super().__init__(**kwargs)
+        if not endpoint_urls:
+            raise ValueError("At least one RPC endpoint is required")
+        self.endpoints = [_Endpoint(url) for url in endpoint_urls]
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.pool_size = pool_size
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def __str__(self) -> str:
+        return f"{type(self).__name__}({', '.join(e.url for e in self.endpoints)})"
+
+    def endpoint_health(self) -> List[Dict]:
+        """Current health snapshot of every endpoint"""
+        now = time.monotonic()
+        with self._lock:
+            return [
+                {
+                    "url": e.url,
+                    "healthy": e.available(now),
+                    "score": round(e.score, 3),
+                    "latency_ms": round(e.latency * 1000, 1),
+                    "requests": e.requests,
+                    "errors": e.errors,
+                }
+                for e in self.endpoints
+            ]
+
+    @contextmanager
+    def pinned(self):
+        """Send every call this thread makes to the primary endpoint until the block exits"""
+        previous = getattr(self._local, "pinned", False)
+        self._local.pinned = True
+        try:
+            yield
+        finally:
+            self._local.pinned = previous
+
+    def _retry_delay(self, attempt: int) -> float:
+        """Jittered exponential backoff before the next attempt"""
+        return min(self.max_backoff, self.backoff * (2 ** attempt)) * random.uniform(0.5, 1.0)
+
+    def _choose(self, primary: bool, tried: set) -> _Endpoint:
+        """Primary calls (and pinned threads) always use the first endpoint, retries included;
+        reads spread by health and latency"""
+        if primary or getattr(self._local, "pinned", False):
+            # A retried send or nonce read on another node could see a different mempool
+            return self.endpoints[0]
+        now = time.monotonic()
+        with self._lock:
+            candidates = [e for e in self.endpoints if e.available(now) and e.url not in tried]
+            if not candidates:
+                candidates = [e for e in self.endpoints if e.available(now)] or list(self.endpoints)
+            weights = [e.weight() for e in candidates]
+        return random.choices(candidates, weights=weights)[0]
+
+    def _record(self, endpoint: _Endpoint, ok: bool, elapsed: float):
+        with self._lock:
+            endpoint.requests += 1
+            endpoint.latency = endpoint.latency * 0.8 + elapsed * 0.2
+            if ok:
+                endpoint.score = endpoint.score * 0.8 + 0.2
+                endpoint.failures = 0
+                return
+            endpoint.errors += 1
+            endpoint.score *= 0.5
+            endpoint.failures += 1
+            if endpoint.failures >= self.failure_threshold:
+                # Bench the endpoint for a while; it gets another chance after the cooldown
+                endpoint.down_until = time.monotonic() + self.cooldown
+                endpoint.failures = 0
+
+
+class FailoverHTTPProvider(_FailoverPolicy, JSONBaseProvider):
+    """JSON-RPC over pooled HTTP sessions with retries and multi-endpoint failover"""
+
+    def __init__(self, endpoint_urls: Sequence[str], **kwargs):
+        super().__init__(endpoint_urls, **kwargs)
+        for endpoint in self.endpoints:
+            endpoint.session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size, max_retries=0)
+            endpoint.session.mount("http://", adapter)
+            endpoint.session.mount("https://", adapter)
+
+    def make_request(self, method, params: Any) -> Dict:
+        with _measured(method):
+            payload = self.encode_rpc_request(method, params)
+            return self.decode_rpc_response(self._post(payload, primary=method in PRIMARY_METHODS))
+
+    def make_batch_request(self, requests_: List) -> List[Dict]:
+        payload = self.encode_batch_rpc_request(requests_)
+        primary = any(method in PRIMARY_METHODS for method, _ in requests_)
+        with _measured("batch"):
+            response = self.decode_rpc_response(self._post(payload, primary=primary))
+        if isinstance(response, list):
+            return sorted(response, key=lambda r: int(r.get("id", 0)))
+        return response
+
+    def _post(self, payload: bytes, primary: bool) -> bytes:
+        tried = set()
+        last_error: Optional[Exception] = None
+        for attempt in range(self.max_retries + 1):
+            endpoint = self._choose(primary, tried)
+            tried.add(endpoint.url)
+            started = time.monotonic()
+            try:
+                response = endpoint.session.post(
+                    endpoint.url,
+                    data=payload,
+                    headers={"Content-Type": "application/json"},
+                    timeout=self.timeout,
+                )
+                if response.status_code in TRANSIENT_STATUS:
+                    raise requests.HTTPError(
+                        f"{response.status_code} from {endpoint.url}", response=response
+                    )
+                response.raise_for_status()
+            except (requests.ConnectionError, requests.Timeout, requests.HTTPError) as e:
+                transient = not isinstance(e, requests.HTTPError) or (
+                    e.response is not None and e.response.status_code in TRANSIENT_STATUS
+                )
+                self._record(endpoint, ok=False, elapsed=time.monotonic() - started)
+                if not transient:
+                    raise
+                last_error = e
+                if attempt < self.max_retries:
+                    time.sleep(self._retry_delay(attempt))
+                continue
+            self._record(endpoint, ok=True, elapsed=time.monotonic() - started)
+            return response.content
+        raise last_error
+
+
+class AsyncFailoverHTTPProvider(_FailoverPolicy, AsyncJSONBaseProvider):
+    """asyncio counterpart of FailoverHTTPProvider for AsyncWeb3, on pooled aiohttp sessions"""
+
+    async def make_request(self, method, params: Any) -> Dict:
+        with _measured(method):
+            payload = self.encode_rpc_request(method, params)
+            return self.decode_rpc_response(await self._post(payload, primary=method in PRIMARY_METHODS))
+
+    async def make_batch_request(self, requests_: List) -> List[Dict]:
+        payload = self.encode_batch_rpc_request(requests_)
+        primary = any(method in PRIMARY_METHODS for method, _ in requests_)
+        with _measured("batch"):
+            response = self.decode_rpc_response(await self._post(payload, primary=primary))
+        if isinstance(response, list):
+            return sorted(response, key=lambda r: int(r.get("id", 0)))
+        return response
+
+    async def disconnect(self):
+        for endpoint in self.endpoints:
+            if endpoint.session is not None:
+                await endpoint.session.close()
+                endpoint.session = None
+
+    def _session(self, endpoint: _Endpoint) -> aiohttp.ClientSession:
+        # Created on first use so the session binds to the running event loop
+        if endpoint.session is None or endpoint.session.closed:
+            endpoint.session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.pool_size),
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+            )
+        return endpoint.session
+
+    async def _post(self, payload: bytes, primary: bool) -> bytes:
+        tried = set()
+        last_error: Optional[Exception] = None
+        for attempt in range(self.max_retries + 1):
+            endpoint = self._choose(primary, tried)
+            tried.add(endpoint.url)
+            started = time.monotonic()
+            try:
+                async with self._session(endpoint).post(
+                    endpoint.url, data=payload, headers={"Content-Type": "application/json"}
+                ) as response:
+                    if response.status in TRANSIENT_STATUS:
+                        raise aiohttp.ClientResponseError(
+                            response.request_info, response.history, status=response.status,
+                            message=f"{response.status} from {endpoint.url}"
+                        )
+                    response.raise_for_status()
+                    body = await response.read()
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                transient = not isinstance(e, aiohttp.ClientResponseError) or e.status in TRANSIENT_STATUS
+                self._record(endpoint, ok=False, elapsed=time.monotonic() - started)
+                if not transient:
+                    raise
+                last_error = e
+                if attempt < self.max_retries:
+                    await asyncio.sleep(self._retry_delay(attempt))
+                continue
+            self._record(endpoint, ok=True, elapsed=time.monotonic() - started)
+            return body
+        raise last_error
+
+
+def pinned_to_primary(w3):
+    """w3.provider.pinned() for a failover provider; a no-op context for any other provider"""
+    pinned = getattr(w3.provider, "pinned", None)
+    return pinned() if pinned is not None else nullcontext()
+
+
+def make_web3(endpoint_urls: Sequence[str], **provider_kwargs) -> Web3:
+    """Web3 instance backed by a FailoverHTTPProvider over the given endpoints"""
+    return Web3(FailoverHTTPProvider(list(endpoint_urls), **provider_kwargs))
+
+
+def make_async_web3(endpoint_urls: Sequence[str], **provider_kwargs) -> AsyncWeb3:
+    """AsyncWeb3 instance backed by an AsyncFailoverHTTPProvider over the given endpoints"""
+    return AsyncWeb3(AsyncFailoverHTTPProvider(list(endpoint_urls), **provider_kwargs))
+
+
+def parse_endpoint_list(value: Optional[str], default: Sequence[str]) -> List[str]:
+    """Comma-separated RPC URL list (e.g. from an environment variable), or the default"""
+    urls = [url.strip() for url in (value or "").split(",") if url.strip()]
+    return urls or list(default)
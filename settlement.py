@@ -0,0 +1,160 @@
+"""
+Deferred Settlement Worker
+Drains the reward ledger's outbox (awards recorded but never signed) onto the
+chain in the background, so completing a task never waits on, or fails with, the RPC
+"""
+
+import logging
+import threading
+from collections import defaultdict
+from typing import Callable, Dict, List, Optional
+
+from nonce_manager import NonceManager
+from reward_batching import FlushFn
+
+log = logging.getLogger("settlement")
+
+# Callbacks receive the outbox rows ({award_id, wallet, task_id, amount}) one transaction carried
+AwardsCallback = Callable[[List[Dict], object], None]
+
+
+def is_retryable(error: Exception) -> bool:
+    """Errors that say nothing about the award itself: the node was unreachable or the nonce raced"""
+    return isinstance(error, (OSError, TimeoutError)) or NonceManager.is_nonce_error(error)
+
+
+class SettlementWorker:
+    """Background worker that flushes outbox awards in batches, backing off while the chain is down"""
+
+    def __init__(self, ledger, send_fn: FlushFn, wallet: Optional[str] = None,
+                 connect_fn: Optional[Callable[[], None]] = None,
+                 in_flight_fn: Optional[Callable[[], int]] = None,
+                 recover_fn: Optional[Callable[[], None]] = None,
+                 on_sent: Optional[AwardsCallback] = None, on_error: Optional[AwardsCallback] = None,
+                 interval: float = 2.0, batch_size: int = 100, max_in_flight: int = 10,
+                 max_backoff: float = 60.0):
+        """send_fn has the RewardBatcher flush signature; connect_fn raises while the chain is
+        unreachable; recover_fn re-checks transactions whose broadcast failed half way (ledger reconcile)"""
+        self.ledger = ledger
+        self.send_fn = send_fn
+        self.wallet = wallet
+        self.connect_fn = connect_fn
+        self.in_flight_fn = in_flight_fn
+        self.recover_fn = recover_fn
+        self.on_sent = on_sent
+        self.on_error = on_error
+        self.interval = interval
+        self.batch_size = batch_size
+        self.max_in_flight = max_in_flight
+        self.max_backoff = max_backoff
+        self._flush_lock = threading.Lock()
+        self._needs_recovery = False
+        self._failures = 0
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        """Start the settlement thread (no-op if already running)"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name="settlement", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the thread; unsent awards stay in the outbox for the next start"""
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def wake(self):
+        """Flush now instead of at the next interval"""
+        self._wakeup.set()
+
+    def request_recovery(self):
+        """Run recover_fn before the next flush, e.g. after a receipt wait timed out"""
+        self._needs_recovery = True
+        self._wakeup.set()
+
+    @property
+    def backing_off(self) -> bool:
+        """Whether the last attempt found the chain unreachable"""
+        return self._failures > 0
+
+    def settle(self) -> int:
+        """Send one batch from the outbox; returns awards broadcast. Raises while the chain is unreachable"""
+        with self._flush_lock:
+            if self.connect_fn:
+                self.connect_fn()
+            if self._needs_recovery and self.recover_fn:
+                self.recover_fn()
+                self._needs_recovery = False
+            # Backpressure: leave awards in the outbox until earlier transactions confirm
+            if self.in_flight_fn and self.in_flight_fn() >= self.max_in_flight:
+                return 0
+            rows = self.ledger.outbox(self.wallet, limit=self.batch_size)
+            if not rows:
+                return 0
+
+            grouped = defaultdict(list)
+            for row in rows:
+                grouped[row["wallet"]].append(row)
+            try:
+                results = self.send_fn(
+                    {wallet: sum(r["amount"] for r in awards) for wallet, awards in grouped.items()},
+                    {wallet: [r["award_id"] for r in awards] for wallet, awards in grouped.items()},
+                )
+            except Exception as e:
+                results = {wallet: e for wallet in grouped}
+
+            sent, retry_error = 0, None
+            for wallet, awards in grouped.items():
+                result = results.get(wallet)
+                if result is None:
+                    result = Exception(f"No award was sent for {wallet}")
+                if isinstance(result, Exception):
+                    if is_retryable(result):
+                        # Signed awards may have reached the node; reconcile decides before anything is resent
+                        retry_error = result
+                        self._needs_recovery = True
+                        continue
+                    self.ledger.mark_failed([r["award_id"] for r in awards], str(result))
+                    self._notify(self.on_error, awards, result)
+                else:
+                    sent += len(awards)
+                    self._notify(self.on_sent, awards, result)
+            if retry_error is not None:
+                raise retry_error
+            return sent
+
+    def _notify(self, callback: Optional[AwardsCallback], awards: List[Dict], result):
+        if callback is None:
+            return
+        try:
+            callback(awards, result)
+        except Exception:
+            log.exception("⚠️  Settlement callback failed")
+
+    def _run(self):
+        delay = self.interval
+        while True:
+            self._wakeup.wait(delay)
+            self._wakeup.clear()
+            if self._stopped.is_set():
+                return
+            try:
+                sent = self.settle()
+            except Exception as e:
+                self._failures += 1
+                if self._failures == 1:
+                    log.warning("⚠️  Settlement paused, rewards stay queued locally: %s", e)
+                delay = min(self.interval * 2 ** self._failures, self.max_backoff)
+                continue
+            if self._failures:
+                log.info("🔗 Blockchain reachable again; settling queued rewards")
+            self._failures = 0
+            # A full batch means more is waiting
+            delay = 0 if sent >= self.batch_size else self.interval
@@ -0,0 +1,62 @@
+"""
+Parallel Signing Pool
+Signs pre-nonced award transactions in worker processes so ECDSA signing
+scales with CPU cores; results come back in submission (nonce) order
+"""
+
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+from tx_templates import AwardTxTemplate
+
+# (calldata, nonce, gas, fee fields) - everything that varies between award transactions
+SigningJob = Tuple[bytes, int, int, Dict]
+
+_worker_template: Optional[AwardTxTemplate] = None
+
+
+def _init_worker(contract_address: str, private_key, chain_id: int):
+    """Each worker builds its own template once; the key never travels with the jobs"""
+    global _worker_template
+    _worker_template = AwardTxTemplate(contract_address, private_key, chain_id)
+
+
+def _sign_job(job: SigningJob) -> bytes:
+    data, nonce, gas, fees = job
+    return _worker_template.sign(data, nonce, gas, fees)
+
+
+class SigningPool:
+    """Process pool bound to one contract, key and chain"""
+
+    def __init__(self, contract_address: str, private_key, chain_id: int,
+                 workers: Optional[int] = None, chunk_size: int = 16):
+        self.contract_address = contract_address
+        self.private_key = private_key
+        self.chain_id = chain_id
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def start(self):
+        """Start the worker processes (also done lazily by the first sign call)"""
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                # Forking a process that already runs worker threads can deadlock, so spawn fresh ones
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(self.contract_address, self.private_key, self.chain_id),
+            )
+
+    def stop(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def sign(self, jobs: Iterable[SigningJob]) -> Iterator[bytes]:
+        """Raw signed transactions, yielded in the same order as the jobs"""
+        self.start()
+        return self._executor.map(_sign_job, jobs, chunksize=self.chunk_size)
@@ -0,0 +1,116 @@
+const WALLET = document.body.dataset.wallet;
+const CONTRACT = document.body.dataset.contract;
+// The default page shows the single-player demo data from /api/balance
+const LEGACY = document.body.dataset.source === 'legacy';
+
+function showStatus(message, isError = false) {
+    const statusBox = document.getElementById('status-box');
+    statusBox.textContent = message;
+    statusBox.className = isError ? 'status-box error' : 'status-box success';
+    statusBox.style.display = 'block';
+    setTimeout(() => {
+        statusBox.style.display = 'none';
+    }, 5000);
+}
+
+function displayWallet() {
+    document.getElementById('wallet-address').textContent = WALLET;
+}
+
+// Task fields come from players (custom tasks), so they are escaped before going into markup
+function escapeHtml(value) {
+    return String(value).replace(/[&<>"']/g, char => ({
+        '&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;'
+    })[char]);
+}
+
+function renderTasks(tasks) {
+    const container = document.getElementById('tasks-container');
+    container.innerHTML = tasks.map(task => `
+        <div class="task-card ${task.completed ? 'completed' : ''}">
+            <div class="task-header">
+                <div class="task-title">${escapeHtml(task.title)}</div>
+                <div class="task-difficulty ${escapeHtml(task.difficulty.toLowerCase())}">
+                    ${escapeHtml(task.difficulty)}
+                </div>
+            </div>
+            <div class="task-reward">+${escapeHtml(task.reward)} P2E Tokens</div>
+            <div class="task-status">
+                <span class="status-badge ${task.completed ? 'completed' : 'pending'}">
+                    ${task.completed ? '✅ Completed' : '⏳ Pending'}
+                </span>
+            </div>
+        </div>
+    `).join('');
+}
+
+async function fetchPlayer() {
+    // Both endpoints answer unchanged polls with 304, which the browser turns back into the cached body
+    const [player, tasks] = await Promise.all([
+        fetch(`/api/players/${encodeURIComponent(WALLET)}`).then(response => response.json()),
+        fetch(`/api/players/${encodeURIComponent(WALLET)}/tasks`).then(response => response.json())
+    ]);
+    return player.error ? player : {...player, tasks: tasks.tasks};
+}
+
+async function refreshData() {
+    try {
+        const data = LEGACY ? await (await fetch('/api/balance')).json() : await fetchPlayer();
+
+        if (data.error) {
+            showStatus('⚠️ ' + data.error, true);
+            document.getElementById('token-balance').textContent = 'Error';
+        } else {
+            document.getElementById('token-balance').textContent = data.balance;
+            document.getElementById('player-level').textContent = data.level;
+            document.getElementById('completed-tasks').textContent = data.completed_tasks;
+            document.getElementById('total-tasks').textContent = data.tasks.length;
+            currentTasks = data.tasks;
+            renderTasks(data.tasks);
+            showStatus('✅ Data refreshed successfully!', false);
+        }
+    } catch (error) {
+        console.error('Error fetching data:', error);
+        showStatus('❌ Connection failed. Is the server running on port 5000?', true);
+    }
+}
+
+function updateCompletedCount(tasks) {
+    document.getElementById('completed-tasks').textContent =
+        tasks.filter(task => task.completed).length;
+}
+
+let currentTasks = [];
+
+function connectStream() {
+    const stream = new EventSource('/api/stream');
+
+    stream.addEventListener('balance', event => {
+        const data = JSON.parse(event.data);
+        document.getElementById('token-balance').textContent = data.balance;
+    });
+
+    stream.addEventListener('task', event => {
+        const task = JSON.parse(event.data);
+        currentTasks = currentTasks.map(t => t.id === task.id ? task : t);
+        renderTasks(currentTasks);
+        updateCompletedCount(currentTasks);
+    });
+
+    stream.onerror = () => {
+        // EventSource reconnects by itself; resync once it is back
+        stream.onopen = () => refreshData();
+    };
+}
+
+// Initial load
+displayWallet();
+refreshData();
+
+if (LEGACY && window.EventSource) {
+    // Balance and task changes are pushed by the server
+    connectStream();
+} else {
+    // Auto-refresh every 10 seconds
+    setInterval(refreshData, 10000);
+}
@@ -0,0 +1,147 @@
+"""
+Structured Logging
+Queue-backed logging for the game, dashboards and payout tool: callers only put a
+record on a queue, and a listener thread formats it (JSON or plain text, tracebacks
+included) and writes it out. Levels and sampling are set per component (logger name)
+"""
+
+import atexit
+import copy
+import itertools
+import json
+import logging
+import os
+import queue
+import sys
+import threading
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Optional
+
+# Attributes every LogRecord has; anything else came from extra= and is logged as a field
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+_listener: Optional[QueueListener] = None
+_configure_lock = threading.Lock()
+
+
+def parse_component_spec(spec: Optional[str], value_type=str) -> Dict[str, object]:
+    """Parse "game=DEBUG,dashboard.fallback=WARNING" style settings into {component: value}"""
+    settings = {}
+    for item in (spec or "").split(","):
+        name, sep, value = item.partition("=")
+        if sep and name.strip() and value.strip():
+            settings[name.strip()] = value_type(value.strip())
+    return settings
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: ts, level, component, msg, extra= fields and any traceback"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "component": record.name,
+            "msg": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class SamplingFilter(logging.Filter):
+    """Keep 1 in N records below ERROR for the configured components (and their children)"""
+
+    def __init__(self, rates: Dict[str, int]):
+        super().__init__()
+        self.rates = {name: int(rate) for name, rate in rates.items() if int(rate) > 1}
+        self._counters: Dict[tuple, itertools.count] = {}
+        self._lock = threading.Lock()
+
+    def _rate(self, name: str) -> int:
+        while name:
+            if name in self.rates:
+                return self.rates[name]
+            name = name.rpartition(".")[0]
+        return 1
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.ERROR or not self.rates:
+            return True
+        rate = self._rate(record.name)
+        if rate == 1:
+            return True
+        # Counted per message template, so one chatty call site cannot starve the others
+        key = (record.name, record.msg)
+        counter = self._counters.get(key)
+        if counter is None:
+            with self._lock:
+                counter = self._counters.setdefault(key, itertools.count())
+        if next(counter) % rate:
+            return False
+        record.sample_rate = rate
+        return True
+
+
+class _DeferredQueueHandler(QueueHandler):
+    """QueueHandler that leaves formatting (and traceback rendering) to the listener thread"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        # Resolve %-args now: they may change before the listener gets to them
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+def configure_logging(level: Optional[str] = None, fmt: Optional[str] = None,
+                      component_levels: Optional[Dict[str, str]] = None,
+                      sampling: Optional[Dict[str, int]] = None,
+                      default_format: str = "json", stream=None) -> QueueListener:
+    """Route every logger through a queue to one stream handler; settings default to
+    LOG_LEVEL, LOG_FORMAT (json/text), LOG_LEVELS and LOG_SAMPLING from the environment"""
+    global _listener
+    level = level or os.getenv("LOG_LEVEL", "INFO")
+    fmt = fmt or os.getenv("LOG_FORMAT") or default_format
+    if component_levels is None:
+        component_levels = parse_component_spec(os.getenv("LOG_LEVELS"))
+    if sampling is None:
+        sampling = parse_component_spec(os.getenv("LOG_SAMPLING", "dashboard.fallback=100"), int)
+
+    with _configure_lock:
+        if _listener is not None:
+            _listener.stop()
+
+        output = logging.StreamHandler(stream or sys.stderr)
+        output.setFormatter(JsonFormatter() if fmt == "json" else logging.Formatter("%(message)s"))
+        records = queue.SimpleQueue()
+        handler = _DeferredQueueHandler(records)
+        handler.addFilter(SamplingFilter(sampling))
+
+        root = logging.getLogger()
+        for existing in [h for h in root.handlers if isinstance(h, _DeferredQueueHandler)]:
+            root.removeHandler(existing)
+        root.addHandler(handler)
+        root.setLevel(level.upper())
+        for name, component_level in component_levels.items():
+            logging.getLogger(name).setLevel(component_level.upper())
+
+        _listener = QueueListener(records, output, respect_handler_level=True)
+        _listener.start()
+    return _listener
+
+
+def shutdown_logging():
+    """Write out everything still queued and stop the listener thread"""
+    global _listener
+    with _configure_lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+
+
+atexit.register(shutdown_logging)
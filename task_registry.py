@@ -0,0 +1,95 @@
+"""
+Task Registry
+Id-indexed task storage with running completion/reward counters, so task
+lookups, deletes and summaries stay O(1) however many tasks a player has
+"""
+
+from typing import Dict, Iterable, Iterator, List, Optional
+
+
+class Task:
+    """One task; slots keep large custom task lists compact"""
+
+    __slots__ = ("id", "title", "reward", "completed", "difficulty", "tx_hash", "tx_status")
+
+    def __init__(self, id: int, title: str, reward: int, completed: bool = False,
+                 difficulty: str = "Custom", tx_hash: Optional[str] = None, tx_status: Optional[str] = None):
+        self.id = id
+        self.title = title
+        self.reward = reward
+        self.completed = completed
+        self.difficulty = difficulty
+        self.tx_hash = tx_hash
+        self.tx_status = tx_status
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "Task":
+        return cls(data["id"], data["title"], data["reward"], bool(data["completed"]),
+                   data["difficulty"], data.get("tx_hash"), data.get("tx_status"))
+
+    def to_dict(self) -> Dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class TaskRegistry:
+    """Tasks keyed by id in insertion order; completion goes through the registry to keep counters exact"""
+
+    def __init__(self, tasks: Iterable[Task] = ()):
+        self._tasks: Dict[int, Task] = {}
+        self._completed = 0
+        self._total_reward = 0
+        for task in tasks:
+            self.add(task)
+
+    @classmethod
+    def from_dicts(cls, tasks: Iterable[Dict]) -> "TaskRegistry":
+        return cls(Task.from_dict(t) for t in tasks)
+
+    def __len__(self) -> int:
+        return len(self._tasks)
+
+    def __iter__(self) -> Iterator[Task]:
+        return iter(list(self._tasks.values()))
+
+    def __contains__(self, task_id: int) -> bool:
+        return task_id in self._tasks
+
+    def ids(self) -> List[int]:
+        return list(self._tasks)
+
+    def get(self, task_id: int) -> Optional[Task]:
+        return self._tasks.get(task_id)
+
+    def add(self, task: Task):
+        if task.id in self._tasks:
+            raise ValueError(f"Duplicate task id {task.id}")
+        self._tasks[task.id] = task
+        self._total_reward += task.reward
+        if task.completed:
+            self._completed += 1
+
+    def remove(self, task_id: int) -> Optional[Task]:
+        task = self._tasks.pop(task_id, None)
+        if task is not None:
+            self._total_reward -= task.reward
+            if task.completed:
+                self._completed -= 1
+        return task
+
+    def set_completed(self, task: Task, completed: bool):
+        """Flip a task's completion flag and adjust the completed counter"""
+        if task.completed == completed:
+            return
+        task.completed = completed
+        self._completed += 1 if completed else -1
+
+    @property
+    def completed_count(self) -> int:
+        return self._completed
+
+    @property
+    def total_reward(self) -> int:
+        return self._total_reward
+
+    def to_dicts(self) -> List[Dict]:
+        return [task.to_dict() for task in self._tasks.values()]
@@ -0,0 +1,51 @@
+"""
+Leaderboard Tests
+Balances of wallets whose early transfers are not in the event index
+"""
+
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+pytest.importorskip("eth_tester")
+
+from balance_reader import BalanceReader
+from event_indexer import EventIndexer
+from leaderboard import Leaderboard
+from local_chain import LocalChain
+from play_to_earn_game import BlockchainConfig
+
+
+def test_partial_index_ranks_on_chain_balances(tmp_path):
+    chain = LocalChain()
+    token = chain.w3.eth.contract(address=chain.token_address, abi=BlockchainConfig.CONTRACT_ABI)
+    earner, receiver = chain.w3.eth.accounts[1:3]
+    token.functions.awardTokens(earner, 50).transact({"from": chain.account})
+    # Indexing starts after the award, so the index only sees the earner paying out
+    indexer = EventIndexer(
+        chain.w3, chain.token_address, db_path=str(tmp_path / "history.db"),
+        start_block=chain.w3.eth.block_number + 1, confirmations=0,
+    )
+    token.functions.transfer(receiver, 30).transact({"from": earner})
+    indexer.sync()
+
+    leaderboard = Leaderboard()
+    leaderboard.start(
+        indexer, poll_interval=60,
+        balance_reader=BalanceReader(chain.w3, chain.token_address, chain.multicall_address),
+    )
+    try:
+        assert [(p["wallet"], p["balance"]) for p in leaderboard.page()] == [(receiver, 30), (earner, 20)]
+
+        token.functions.awardTokens(earner, 15).transact({"from": chain.account})
+        indexer.sync()
+        assert leaderboard.refresh_balances() == 1
+        assert leaderboard.entry(earner)["balance"] == 35
+        assert leaderboard.entry(earner)["rank"] == 1
+    finally:
+        leaderboard.stop()
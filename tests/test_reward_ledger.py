@@ -0,0 +1,203 @@
+"""
+Reward Ledger Tests
+Restart reconciliation against an in-process chain (benchmarks/local_chain.py):
+mined, dropped and rebroadcast transactions, receipts settled by the tracker,
+and several senders and games sharing one ledger file
+"""
+
+import os
+import sqlite3
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+pytest.importorskip("eth_tester")
+
+from eth_account import Account
+from hexbytes import HexBytes
+from web3 import Web3
+
+from award_sender import AwardSender, encode_award_tokens
+from local_chain import LocalChain, LockedTesterProvider
+from play_to_earn_game import BlockchainConfig
+from reward_ledger import CONFIRMED, FAILED, INTENT, SENT, RewardLedger
+from tx_confirmations import ConfirmationTracker
+
+PLAYER = Web3.to_checksum_address("0x" + "11" * 20)
+OTHER_PLAYER = Web3.to_checksum_address("0x" + "22" * 20)
+
+
+def _raw_json(value):
+    """A formatted web3 value as a node sends it: quantities and bytes as hex strings"""
+    if isinstance(value, dict):
+        return {key: _raw_json(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_raw_json(item) for item in value]
+    if isinstance(value, bool) or value is None:
+        return value
+    if isinstance(value, int):
+        return hex(value)
+    if isinstance(value, (bytes, HexBytes)):
+        return Web3.to_hex(value)
+    return value
+
+
+class RawBatchProvider(LockedTesterProvider):
+    """eth-tester with JSON-RPC batches answered in raw hex, the way an HTTP node answers them"""
+
+    def make_batch_request(self, requests_):
+        return [
+            {"jsonrpc": "2.0", "id": i, "result": _raw_json(self.make_request(method, params)["result"])}
+            for i, (method, params) in enumerate(requests_)
+        ]
+
+
+@pytest.fixture
+def chain():
+    return LocalChain()
+
+
+@pytest.fixture
+def ledger_path(tmp_path):
+    return str(tmp_path / "reward_ledger.db")
+
+
+def make_sender(chain, ledger, private_key=None):
+    private_key = private_key or chain.private_key
+    wallet = Account.from_key(private_key).address
+    contract = chain.w3.eth.contract(address=chain.token_address, abi=BlockchainConfig.CONTRACT_ABI)
+    return AwardSender(chain.w3, contract, wallet, private_key, BlockchainConfig, ledger=ledger)
+
+
+def sign_award(sender, player, amount, nonce):
+    fees = sender.fee_oracle.fee_fields()
+    return sender._sign(encode_award_tokens(player, amount), nonce, sender._award_gas(), fees)
+
+
+def funded_key(chain):
+    """A second funded account, so two senders can share one ledger"""
+    account = Account.create()
+    chain.w3.eth.send_transaction({"from": chain.account, "to": account.address, "value": 10 ** 18})
+    return account.key.to_0x_hex()
+
+
+def test_mined_award_is_confirmed(chain, ledger_path):
+    ledger = RewardLedger(ledger_path)
+    sender = make_sender(chain, ledger)
+    award_id = ledger.record_intent(PLAYER, 5, task_id=1)
+    sender.send_award(PLAYER, 5, award_ids=[award_id])
+
+    assert ledger.reconcile(chain.w3, sender.sender_wallet) == []
+    assert ledger.status(award_id) == CONFIRMED
+    assert ledger.balances(PLAYER) == {"settled": 5, "unsettled": 0}
+
+
+def test_award_whose_nonce_was_taken_is_dropped(chain, ledger_path):
+    ledger = RewardLedger(ledger_path)
+    sender = make_sender(chain, ledger)
+    nonce = chain.w3.eth.get_transaction_count(sender.sender_wallet)
+    award_id = ledger.record_intent(PLAYER, 5, task_id=1)
+    ledger.record_signed([award_id], sender.sender_wallet, nonce, sign_award(sender, PLAYER, 5, nonce))
+    # Another transaction is mined with the same nonce before the journaled one is broadcast
+    chain.w3.eth.send_raw_transaction(sign_award(sender, OTHER_PLAYER, 7, nonce))
+
+    assert ledger.reconcile(chain.w3, sender.sender_wallet) == []
+    assert ledger.status(award_id) == FAILED
+
+
+def test_unsent_award_is_rebroadcast(chain, ledger_path):
+    ledger = RewardLedger(ledger_path)
+    sender = make_sender(chain, ledger)
+    nonce = chain.w3.eth.get_transaction_count(sender.sender_wallet)
+    award_id = ledger.record_intent(PLAYER, 5, task_id=1)
+    tx_hash = ledger.record_signed([award_id], sender.sender_wallet, nonce, sign_award(sender, PLAYER, 5, nonce))
+
+    assert ledger.reconcile(chain.w3, sender.sender_wallet) == [tx_hash]
+    assert ledger.status(award_id) == SENT
+    assert chain.w3.eth.get_transaction_receipt(tx_hash).status == 1
+    # The next start finds the rebroadcast transaction mined
+    assert ledger.reconcile(chain.w3, sender.sender_wallet) == []
+    assert ledger.status(award_id) == CONFIRMED
+
+
+def test_tracker_confirmation_survives_restart(chain, ledger_path):
+    chain.w3 = Web3(RawBatchProvider(chain.tester))
+    ledger = RewardLedger(ledger_path)
+    sender = make_sender(chain, ledger)
+    award_id = ledger.record_intent(PLAYER, 5, task_id=1)
+    tx_hash = sender.send_award(PLAYER, 5, award_ids=[award_id])
+
+    confirmed = []
+    tracker = ConfirmationTracker(chain.w3)
+    tracker.track(tx_hash, on_confirmed=lambda h, receipt: (ledger.settle(h, receipt), confirmed.append(receipt)))
+    assert tracker.poll_once() == 1
+    assert confirmed[0]["status"] == 1
+    ledger.close()
+
+    restarted = RewardLedger(ledger_path)
+    assert restarted.reconcile(chain.w3, sender.sender_wallet) == []
+    assert restarted.status(award_id) == CONFIRMED
+    assert restarted.balances(PLAYER) == {"settled": 5, "unsettled": 0}
+
+
+def test_settle_accepts_raw_receipts(ledger_path):
+    ledger = RewardLedger(ledger_path)
+    confirmed = ledger.record_intent(PLAYER, 5, task_id=1)
+    reverted = ledger.record_intent(PLAYER, 5, task_id=2)
+    confirmed_tx = ledger.record_signed([confirmed], PLAYER, 0, b"\x01")
+    reverted_tx = ledger.record_signed([reverted], PLAYER, 1, b"\x02")
+
+    ledger.settle(confirmed_tx, {"status": "0x1"})
+    ledger.settle(reverted_tx, {"status": "0x0"})
+    assert ledger.status(confirmed) == CONFIRMED
+    assert ledger.status(reverted) != CONFIRMED
+
+
+def test_reconcile_only_checks_its_own_sender(chain, ledger_path):
+    ledger = RewardLedger(ledger_path)
+    first = make_sender(chain, ledger)
+    second = make_sender(chain, ledger, funded_key(chain))
+    # The second sender journaled an award it has not broadcast yet: its nonce is still free,
+    # but judged against the first sender's (higher) mined count it would look dropped
+    for _ in range(3):
+        first.send_award(OTHER_PLAYER, 1)
+    award_id = ledger.record_intent(PLAYER, 5, task_id=1)
+    ledger.record_signed([award_id], second.sender_wallet, 0, sign_award(second, PLAYER, 5, 0))
+
+    assert ledger.reconcile(chain.w3, first.sender_wallet) == []
+    assert ledger.status(award_id) != FAILED
+    assert len(ledger.reconcile(chain.w3, second.sender_wallet)) == 1
+    assert ledger.reconcile(chain.w3, second.sender_wallet) == []
+    assert ledger.status(award_id) == CONFIRMED
+
+
+def test_reconcile_keeps_other_wallets_intents(chain, ledger_path):
+    ledger = RewardLedger(ledger_path)
+    sender = make_sender(chain, ledger)
+    stale = ledger.record_intent(PLAYER, 5, task_id=1)
+    running = ledger.record_intent(OTHER_PLAYER, 5, task_id=1)
+
+    ledger.reconcile(chain.w3, sender.sender_wallet, stale_wallets=[PLAYER])
+    assert ledger.status(stale) == FAILED
+    assert ledger.status(running) == INTENT
+
+
+def test_ledger_without_sender_column_is_migrated(chain, ledger_path):
+    sender = make_sender(chain, None)
+    nonce = chain.w3.eth.get_transaction_count(sender.sender_wallet)
+    raw_tx = sign_award(sender, PLAYER, 5, nonce)
+    db = sqlite3.connect(ledger_path)
+    db.execute(
+        "CREATE TABLE ledger_txs (tx_hash TEXT PRIMARY KEY, nonce INTEGER NOT NULL, raw_tx BLOB NOT NULL, "
+        "status TEXT NOT NULL, updated_at TEXT NOT NULL)"
+    )
+    db.execute("INSERT INTO ledger_txs VALUES (?, ?, ?, 'signed', '')", (Web3.to_hex(Web3.keccak(raw_tx)), nonce, raw_tx))
+    db.commit()
+    db.close()
+
+    ledger = RewardLedger(ledger_path)
+    assert ledger.reconcile(chain.w3, sender.sender_wallet) == [Web3.to_hex(Web3.keccak(raw_tx))]
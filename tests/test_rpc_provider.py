@@ -0,0 +1,33 @@
+"""
+RPC Provider Tests
+Endpoint choice of the failover provider: primary-only methods and pinned threads
+"""
+
+import os
+import sys
+import threading
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from rpc_provider import PRIMARY_METHODS, FailoverHTTPProvider
+
+ENDPOINTS = ["http://primary.invalid", "http://secondary.invalid"]
+
+
+def test_pinned_thread_reads_from_primary():
+    provider = FailoverHTTPProvider(ENDPOINTS)
+    # Make the secondary the only likely pick for a load-balanced read
+    provider.endpoints[0].latency = 1000.0
+    assert "eth_getTransactionReceipt" not in PRIMARY_METHODS
+    assert {provider._choose(False, set()).url for _ in range(50)} == {ENDPOINTS[1]}
+
+    with provider.pinned():
+        assert {provider._choose(False, set()).url for _ in range(50)} == {ENDPOINTS[0]}
+        # Other threads keep load balancing
+        seen = []
+        thread = threading.Thread(target=lambda: seen.append(provider._choose(False, set()).url))
+        thread.start()
+        thread.join()
+        assert seen == [ENDPOINTS[1]]
+    assert provider._choose(False, set()).url == ENDPOINTS[1]
@@ -0,0 +1,209 @@
+"""
+Transaction Confirmation Tracker
+Polls receipts for sent transactions on a background thread so senders
+never block on block times
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional
+
+from metrics import Gauge, Histogram
+
+log = logging.getLogger("confirmations")
+
+PENDING = "pending"
+CONFIRMED = "confirmed"
+FAILED = "failed"
+UNKNOWN = "unknown"  # no receipt before the timeout: it may still be mined
+
+TX_CONFIRMATION_SECONDS = Histogram(
+    "tx_confirmation_seconds", "From tracking a sent transaction to its receipt (or giving up)", ["status"],
+    buckets=(0.5, 1.0, 2.0, 5.0, 10.0, 15.0, 30.0, 60.0, 120.0, 300.0),
+)
+TX_PENDING = Gauge("tx_pending", "Sent transactions still waiting for a receipt")
+_PENDING_GAUGE = TX_PENDING.labels()
+
+
+class _TrackedTx:
+    __slots__ = ("tx_hash", "callbacks", "tracked_at", "deadline")
+
+    def __init__(self, tx_hash: str, tracked_at: float, deadline: float):
+        self.tx_hash = tx_hash
+        self.callbacks = []  # (on_confirmed, on_failed) pairs; batched awards share one hash
+        self.tracked_at = tracked_at
+        self.deadline = deadline
+
+
+class ConfirmationTracker:
+    """Background worker that moves sent transactions from pending to confirmed, failed or unknown (timed out)"""
+
+    def __init__(self, w3, poll_interval: float = 1.0, batch_size: int = 100,
+                 timeout: float = 120, history_size: int = 10000):
+        self.w3 = w3
+        self.poll_interval = poll_interval
+        self.batch_size = batch_size
+        self.timeout = timeout
+        self.history_size = history_size
+        self._lock = threading.Lock()
+        self._pending: "OrderedDict[str, _TrackedTx]" = OrderedDict()
+        self._finished: "OrderedDict[str, str]" = OrderedDict()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        """Start the polling thread (no-op if already running)"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name="tx-confirmations", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the polling thread; pending transactions stay tracked"""
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def track(self, tx_hash: str,
+              on_confirmed: Optional[Callable[[str, dict], None]] = None,
+              on_failed: Optional[Callable[[str, Optional[dict]], None]] = None):
+        """Watch a sent transaction; callbacks run on the tracker thread.
+
+        on_failed gets receipt=None when no receipt arrived in time: the outcome is unknown,
+        so check the ledger (reconcile) before treating the transaction as lost.
+        """
+        with self._lock:
+            item = self._pending.get(tx_hash)
+            if item is None:
+                now = time.monotonic()
+                item = self._pending[tx_hash] = _TrackedTx(tx_hash, now, now + self.timeout)
+                _PENDING_GAUGE.inc()
+            item.callbacks.append((on_confirmed, on_failed))
+
+    def status(self, tx_hash: str) -> Optional[str]:
+        """Return pending/confirmed/failed/unknown for a tracked hash, or None if never tracked"""
+        with self._lock:
+            if tx_hash in self._pending:
+                return PENDING
+            return self._finished.get(tx_hash)
+
+    def pending_count(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def drain(self, timeout: float = 120) -> bool:
+        """Poll until nothing is pending or the timeout expires; returns True when drained"""
+        deadline = time.monotonic() + timeout
+        while self.pending_count():
+            if time.monotonic() >= deadline:
+                return False
+            self.poll_once()
+            if self.pending_count():
+                time.sleep(self.poll_interval)
+        return True
+
+    def poll_once(self) -> int:
+        """Check one batch of pending receipts; returns how many transactions settled"""
+        with self._lock:
+            batch = list(self._pending.values())[:self.batch_size]
+        if not batch:
+            return 0
+
+        receipts = self._fetch_receipts([item.tx_hash for item in batch])
+        now = time.monotonic()
+        settled = 0
+        for item in batch:
+            receipt = receipts.get(item.tx_hash)
+            if receipt is None and now < item.deadline:
+                continue
+            ok = receipt is not None and receipt_status(receipt) == 1
+            if not self._finish(item, CONFIRMED if ok else FAILED if receipt is not None else UNKNOWN):
+                # drain() on another thread settled it first and ran the callbacks
+                continue
+            for on_confirmed, on_failed in item.callbacks:
+                callback = on_confirmed if ok else on_failed
+                if callback:
+                    try:
+                        callback(item.tx_hash, receipt)
+                    except Exception:
+                        log.exception("⚠️  Confirmation callback failed for %s", item.tx_hash)
+            settled += 1
+
+        # Rotate still-pending items to the back so large backlogs are polled fairly
+        with self._lock:
+            for item in batch:
+                if item.tx_hash in self._pending:
+                    self._pending.move_to_end(item.tx_hash)
+        return settled
+
+    def _finish(self, item: _TrackedTx, state: str) -> bool:
+        """Move an item out of pending; False if another poll already did (its callbacks ran there)"""
+        with self._lock:
+            if self._pending.get(item.tx_hash) is not item:
+                return False
+            del self._pending[item.tx_hash]
+            _PENDING_GAUGE.dec()
+            TX_CONFIRMATION_SECONDS.labels(state).observe(time.monotonic() - item.tracked_at)
+            self._finished[item.tx_hash] = state
+            while len(self._finished) > self.history_size:
+                self._finished.popitem(last=False)
+            return True
+
+    def _fetch_receipts(self, tx_hashes: List[str]) -> Dict[str, Optional[dict]]:
+        """Fetch receipts in one JSON-RPC batch when the provider allows it.
+
+        Either way callbacks get receipts formatted like w3.eth.get_transaction_receipt()
+        returns them (int status, block number, ...), never raw JSON-RPC hex.
+        """
+        # web3 is imported on first use so importing the tracker stays cheap (see play_to_earn_game)
+        from web3.datastructures import AttributeDict
+        from web3.exceptions import TransactionNotFound
+        from web3._utils.method_formatters import receipt_formatter
+
+        provider = self.w3.provider
+        if hasattr(provider, "make_batch_request"):
+            try:
+                responses = provider.make_batch_request(
+                    [("eth_getTransactionReceipt", [tx_hash]) for tx_hash in tx_hashes]
+                )
+                # Batch responses may come back in any order; match them up by request id
+                if all("id" in r for r in responses):
+                    responses = sorted(responses, key=lambda r: int(r["id"]))
+                return {
+                    tx_hash: AttributeDict(receipt_formatter(response["result"])) if response.get("result") else None
+                    for tx_hash, response in zip(tx_hashes, responses)
+                }
+            except Exception as e:
+                log.warning("⚠️  Batched receipt request failed, fetching one by one: %s", e)
+
+        receipts = {}
+        for tx_hash in tx_hashes:
+            try:
+                receipts[tx_hash] = self.w3.eth.get_transaction_receipt(tx_hash)
+            except TransactionNotFound:
+                receipts[tx_hash] = None
+            except Exception as e:
+                log.warning("⚠️  Receipt request for %s failed: %s", tx_hash, e)
+                receipts[tx_hash] = None
+        return receipts
+
+    def _run(self):
+        while not self._stopped.is_set():
+            try:
+                self.poll_once()
+            except Exception as e:
+                log.warning("⚠️  Receipt polling failed: %s", e)
+            self._wakeup.wait(self.poll_interval)
+            self._wakeup.clear()
+
+
+def receipt_status(receipt) -> int:
+    """A receipt's status as an int, whether it was formatted by web3 or is raw JSON (hex)"""
+    status = receipt["status"]
+    return int(status, 16) if isinstance(status, str) else int(status)
@@ -0,0 +1,129 @@
+"""
+Award Transaction Templates
+Hand-encoded awardTokens/batchAwardTokens calldata and pre-serialized static
+transaction fields, so each award is only splice-in + sign
+"""
+
+from typing import Dict, List
+
+from eth_keys import keys
+from eth_utils import keccak
+from hexbytes import HexBytes
+
+AWARD_TOKENS_SELECTOR = bytes.fromhex("2b581990")  # awardTokens(address,uint256)
+BATCH_AWARD_TOKENS_SELECTOR = bytes.fromhex("53f329a9")  # batchAwardTokens(address[],uint256[])
+
+DYNAMIC_FEE_TX_TYPE = b"\x02"
+UINT256_LIMIT = 2 ** 256
+
+
+def _address_word(address: str) -> bytes:
+    try:
+        raw = bytes.fromhex(address[2:] if address.startswith(("0x", "0X")) else address)
+    except (AttributeError, ValueError):
+        raw = b""
+    if len(raw) != 20:
+        raise ValueError(f"Invalid address {address!r}")
+    return bytes(12) + raw
+
+
+def _uint_word(value: int) -> bytes:
+    if not isinstance(value, int) or not 0 <= value < UINT256_LIMIT:
+        raise ValueError(f"Value {value!r} is not a uint256")
+    return value.to_bytes(32, "big")
+
+
+def encode_award_tokens(player: str, amount: int) -> bytes:
+    """Calldata for awardTokens(player, amount) without going through the contract ABI machinery"""
+    return AWARD_TOKENS_SELECTOR + _address_word(player) + _uint_word(amount)
+
+
+def encode_batch_award_tokens(players: List[str], amounts: List[int]) -> bytes:
+    """Calldata for batchAwardTokens(players, amounts)"""
+    count = len(players)
+    if count != len(amounts):
+        raise ValueError("players and amounts must have the same length")
+    return b"".join([
+        BATCH_AWARD_TOKENS_SELECTOR,
+        _uint_word(64),  # offset of players
+        _uint_word(64 + 32 * (count + 1)),  # offset of amounts
+        _uint_word(count),
+        *(_address_word(player) for player in players),
+        _uint_word(count),
+        *(_uint_word(amount) for amount in amounts),
+    ])
+
+
+# Minimal RLP encoder: only byte strings, unsigned ints and flat lists are needed here
+def _rlp_prefix(length: int, offset: int) -> bytes:
+    if length < 56:
+        return bytes([offset + length])
+    encoded_length = length.to_bytes((length.bit_length() + 7) // 8, "big")
+    return bytes([offset + 55 + len(encoded_length)]) + encoded_length
+
+
+def _rlp_bytes(data: bytes) -> bytes:
+    if len(data) == 1 and data[0] < 0x80:
+        return data
+    return _rlp_prefix(len(data), 0x80) + data
+
+
+def _rlp_uint(value: int) -> bytes:
+    return _rlp_bytes(value.to_bytes((value.bit_length() + 7) // 8, "big"))
+
+
+def _rlp_list(payload: bytes) -> bytes:
+    return _rlp_prefix(len(payload), 0xc0) + payload
+
+
+class AwardTxTemplate:
+    """Signs award transactions to one contract from one key; static fields are encoded once"""
+
+    def __init__(self, contract_address: str, private_key, chain_id: int):
+        self._key = keys.PrivateKey(HexBytes(private_key))
+        self.sender = self._key.public_key.to_checksum_address()
+        self.chain_id = chain_id
+        self._chain_id_item = _rlp_uint(chain_id)
+        # to + value (always 0) are identical in every award transaction
+        self._to_value_items = _rlp_bytes(bytes.fromhex(contract_address[2:])) + _rlp_uint(0)
+        self._access_list_item = _rlp_list(b"")
+        # EIP-155 tail for legacy transactions: chainId, 0, 0
+        self._legacy_tail = self._chain_id_item + _rlp_uint(0) + _rlp_uint(0)
+
+    def sign_award(self, player: str, amount: int, nonce: int, gas: int, fees: Dict) -> bytes:
+        return self.sign(encode_award_tokens(player, amount), nonce, gas, fees)
+
+    def sign_batch_award(self, players: List[str], amounts: List[int], nonce: int, gas: int,
+                         fees: Dict) -> bytes:
+        return self.sign(encode_batch_award_tokens(players, amounts), nonce, gas, fees)
+
+    def sign(self, data: bytes, nonce: int, gas: int, fees: Dict) -> bytes:
+        """Raw signed transaction; fees are FeeOracle.fee_fields() output (EIP-1559 or gasPrice)"""
+        if "gasPrice" in fees:
+            return self._sign_legacy(data, nonce, gas, fees["gasPrice"])
+        body = b"".join([
+            self._chain_id_item,
+            _rlp_uint(nonce),
+            _rlp_uint(fees["maxPriorityFeePerGas"]),
+            _rlp_uint(fees["maxFeePerGas"]),
+            _rlp_uint(gas),
+            self._to_value_items,
+            _rlp_bytes(data),
+            self._access_list_item,
+        ])
+        signature = self._key.sign_msg_hash(keccak(DYNAMIC_FEE_TX_TYPE + _rlp_list(body)))
+        return DYNAMIC_FEE_TX_TYPE + _rlp_list(
+            body + _rlp_uint(signature.v) + _rlp_uint(signature.r) + _rlp_uint(signature.s)
+        )
+
+    def _sign_legacy(self, data: bytes, nonce: int, gas: int, gas_price: int) -> bytes:
+        body = b"".join([
+            _rlp_uint(nonce),
+            _rlp_uint(gas_price),
+            _rlp_uint(gas),
+            self._to_value_items,
+            _rlp_bytes(data),
+        ])
+        signature = self._key.sign_msg_hash(keccak(_rlp_list(body + self._legacy_tail)))
+        v = signature.v + self.chain_id * 2 + 35
+        return _rlp_list(body + _rlp_uint(v) + _rlp_uint(signature.r) + _rlp_uint(signature.s))
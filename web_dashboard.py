@@ -3,16 +3,70 @@ Play-to-Earn Web Dashboard (Fixed)
 Flask web interface to visualize blockchain tokens and game progress
 """
 
-from flask import Flask, render_template_string, jsonify
+from flask import Flask, g, jsonify, request, Response
 from web3 import Web3
+from collections import OrderedDict
+from types import SimpleNamespace
+from datetime import datetime
+import gzip
+import hashlib
 import json
+import logging
+import os
+import threading
+import time
+from balance_reader import BalanceReader
+from balance_cache import BalanceCache
+from event_stream import EventBroadcaster, BlockWatcher
+from event_indexer import EventIndexer
+from game_store import GameStore
+from leaderboard import Leaderboard
+from metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, REGISTRY, Histogram
+from rpc_provider import make_web3, parse_endpoint_list
+from structured_logging import configure_logging
 
-app = Flask(__name__)
+# Static assets are served from memory by /assets (see below) under content-hashed names
+app = Flask(__name__, static_folder=None)
 
 # Blockchain Configuration
 RPC_URL = "https://rpc-mumbai.maticvigil.com"  # Polygon Mumbai RPC
+RPC_URLS = parse_endpoint_list(os.getenv("RPC_URLS"), [RPC_URL])  # failover order
+RPC_TIMEOUT = 10  # seconds per HTTP request
+RPC_MAX_RETRIES = 3
+RPC_POOL_SIZE = 64  # keep-alive connections per endpoint (one per busy request thread)
 CONTRACT_ADDRESS = "0xf8e81D47203A594245E36C48e151709F0C19fBe8"
 PLAYER_WALLET = "0x461c676225b325142b30fBd6e2BcB99E22177577"
+MULTICALL_ADDRESS = os.getenv("MULTICALL_ADDRESS")  # optional Multicall3 for batched reads
+MAX_BALANCE_WALLETS = 1000  # per /api/balances request
+
+# Balance cache shared by every viewer: entries expire on a new block or after the TTL
+BALANCE_CACHE_TTL = 15  # seconds
+BALANCE_CACHE_MAX_ENTRIES = 10000
+
+# Server-push updates (/api/stream)
+STREAM_BLOCK_POLL_INTERVAL = 1.0  # seconds between block-number checks
+STREAM_KEEPALIVE = 15  # seconds between keepalive comments on idle streams
+
+# Reward history index (shared with the game)
+INDEXER_DB = "reward_history.db"
+INDEXER_START_BLOCK = int(os.getenv("INDEXER_START_BLOCK")) if os.getenv("INDEXER_START_BLOCK") else None  # deployment block
+INDEXER_LOOKBACK_BLOCKS = 50000  # indexed when INDEXER_START_BLOCK is unset
+INDEXER_POLL_INTERVAL = 5  # seconds
+
+# Leaderboard: balances are re-read for wallets the event index sees move, levels follow the game's database
+GAME_DB = "game_progress.db"
+LEADERBOARD_LEVEL_POLL_INTERVAL = 5  # seconds
+LEADERBOARD_MAX_PAGE = 100  # entries per /api/leaderboard request
+
+# Per-wallet API responses
+GZIP_MIN_SIZE = 1024  # bytes; smaller bodies are not worth compressing
+GZIP_LEVEL = 6
+
+# Dashboard page and its CSS/JS
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
+STATIC_ASSETS = {"dashboard.css": "text/css", "dashboard.js": "application/javascript"}
+STATIC_MAX_AGE = 365 * 24 * 3600  # seconds; a hashed asset URL never changes content
+PAGE_CACHE_MAX_ENTRIES = 10000  # rendered pages, one per wallet
 
 CONTRACT_ABI = [
     {
@@ -24,8 +78,73 @@ CONTRACT_ABI = [
     }
 ]
 
-# Initialize Web3
-w3 = Web3(Web3.HTTPProvider(RPC_URL))
+# Pushes balance/task changes to every open dashboard
+broadcaster = EventBroadcaster()
+
+log = logging.getLogger("dashboard")
+# Hit on every /api/balance while the contract is unreachable; sampled by default (LOG_SAMPLING)
+_fallback_log = logging.getLogger("dashboard.fallback")
+
+
+def on_new_block(block_number):
+    """Re-read the balance once per block and push it only if it changed"""
+    if not broadcaster.subscriber_count():
+        return
+    try:
+        balance = chain().balance_cache.get_balance(PLAYER_WALLET)
+    except Exception as e:
+        log.warning("Stream balance refresh failed: %s", e)
+        return
+    previous = broadcaster.latest("balance")
+    if previous is None or previous["balance"] != balance:
+        broadcaster.publish("balance", {"balance": balance, "block": block_number})
+
+
+# Web3 and everything built on it are created by the first request that needs the chain,
+# so importing this module (e.g. from async_dashboard) opens no connections
+_chain = None
+_chain_lock = threading.Lock()
+
+
+def chain():
+    """The Web3 provider, balance cache, block watcher and event indexer, built on first use"""
+    global _chain
+    if _chain is None:
+        with _chain_lock:
+            if _chain is None:
+                _chain = _build_chain(
+                    make_web3(RPC_URLS, timeout=RPC_TIMEOUT, max_retries=RPC_MAX_RETRIES, pool_size=RPC_POOL_SIZE),
+                    CONTRACT_ADDRESS,
+                    MULTICALL_ADDRESS,
+                )
+    return _chain
+
+
+def use_web3(w3, contract_address: str = CONTRACT_ADDRESS, multicall_address: str = MULTICALL_ADDRESS):
+    """Serve from an already connected Web3 (e.g. an in-process chain) instead of RPC_URLS"""
+    global _chain
+    with _chain_lock:
+        _chain = _build_chain(w3, contract_address, multicall_address)
+
+
+def _build_chain(w3, contract_address, multicall_address):
+    return SimpleNamespace(
+        w3=w3,
+        balance_cache=BalanceCache(
+            BalanceReader(w3, contract_address, multicall_address),
+            ttl=BALANCE_CACHE_TTL,
+            max_entries=BALANCE_CACHE_MAX_ENTRIES
+        ),
+        block_watcher=BlockWatcher(w3, on_new_block, poll_interval=STREAM_BLOCK_POLL_INTERVAL),
+        event_indexer=EventIndexer(
+            w3, contract_address, db_path=INDEXER_DB,
+            start_block=INDEXER_START_BLOCK, lookback_blocks=INDEXER_LOOKBACK_BLOCKS
+        ),
+    )
+
+
+game_store = GameStore(GAME_DB)
+leaderboard = Leaderboard()
 
 # Game data
 game_data = {
@@ -46,253 +165,9 @@ HTML_TEMPLATE = """
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
     <title>Play-to-Earn Dashboard</title>
-    <style>
-        * {
-            margin: 0;
-            padding: 0;
-            box-sizing: border-box;
-        }
-        
-        body {
-            font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            min-height: 100vh;
-            padding: 20px;
-        }
-        
-        .container {
-            max-width: 1200px;
-            margin: 0 auto;
-        }
-        
-        header {
-            text-align: center;
-            color: white;
-            margin-bottom: 40px;
-        }
-        
-        h1 {
-            font-size: 2.5em;
-            margin-bottom: 10px;
-            text-shadow: 2px 2px 4px rgba(0,0,0,0.3);
-        }
-        
-        .stats-grid {
-            display: grid;
-            grid-template-columns: repeat(auto-fit, minmax(250px, 1fr));
-            gap: 20px;
-            margin-bottom: 40px;
-        }
-        
-        .stat-card {
-            background: white;
-            border-radius: 15px;
-            padding: 25px;
-            box-shadow: 0 10px 30px rgba(0,0,0,0.2);
-            text-align: center;
-            transition: transform 0.3s, box-shadow 0.3s;
-        }
-        
-        .stat-card:hover {
-            transform: translateY(-5px);
-            box-shadow: 0 15px 40px rgba(0,0,0,0.3);
-        }
-        
-        .stat-label {
-            color: #666;
-            font-size: 0.9em;
-            margin-bottom: 10px;
-            text-transform: uppercase;
-            letter-spacing: 1px;
-        }
-        
-        .stat-value {
-            font-size: 2.5em;
-            font-weight: bold;
-            color: #667eea;
-        }
-        
-        .token-value {
-            color: #f59e0b;
-        }
-        
-        .level-value {
-            color: #ec4899;
-        }
-        
-        .tasks-section {
-            background: white;
-            border-radius: 15px;
-            padding: 30px;
-            box-shadow: 0 10px 30px rgba(0,0,0,0.2);
-            margin-bottom: 30px;
-        }
-        
-        .tasks-section h2 {
-            color: #333;
-            margin-bottom: 25px;
-            font-size: 1.8em;
-        }
-        
-        .tasks-grid {
-            display: grid;
-            grid-template-columns: repeat(auto-fit, minmax(300px, 1fr));
-            gap: 20px;
-        }
-        
-        .task-card {
-            background: linear-gradient(135deg, #f5f7fa 0%, #c3cfe2 100%);
-            border-radius: 12px;
-            padding: 20px;
-            border-left: 5px solid #667eea;
-            transition: all 0.3s;
-        }
-        
-        .task-card.completed {
-            background: linear-gradient(135deg, #d4fc79 0%, #96e6a1 100%);
-            border-left-color: #10b981;
-        }
-        
-        .task-card:hover {
-            transform: translateX(5px);
-            box-shadow: 0 5px 15px rgba(0,0,0,0.1);
-        }
-        
-        .task-header {
-            display: flex;
-            justify-content: space-between;
-            align-items: start;
-            margin-bottom: 12px;
-        }
-        
-        .task-title {
-            font-weight: bold;
-            color: #333;
-            font-size: 1.1em;
-        }
-        
-        .task-difficulty {
-            font-size: 0.8em;
-            padding: 4px 12px;
-            border-radius: 20px;
-            background: white;
-            color: #667eea;
-            font-weight: 600;
-        }
-        
-        .task-difficulty.easy {
-            background: #dcfce7;
-            color: #16a34a;
-        }
-        
-        .task-difficulty.medium {
-            background: #fef3c7;
-            color: #b45309;
-        }
-        
-        .task-difficulty.hard {
-            background: #fee2e2;
-            color: #dc2626;
-        }
-        
-        .task-reward {
-            color: #f59e0b;
-            font-weight: bold;
-            font-size: 1.2em;
-            margin-top: 10px;
-        }
-        
-        .task-status {
-            margin-top: 10px;
-            padding-top: 10px;
-            border-top: 1px solid rgba(0,0,0,0.1);
-            color: #666;
-            font-size: 0.9em;
-        }
-        
-        .status-badge {
-            display: inline-block;
-            padding: 4px 8px;
-            border-radius: 4px;
-            font-weight: 600;
-        }
-        
-        .status-badge.completed {
-            background: #10b981;
-            color: white;
-        }
-        
-        .status-badge.pending {
-            background: #f59e0b;
-            color: white;
-        }
-        
-        .wallet-info {
-            background: rgba(255,255,255,0.1);
-            color: white;
-            padding: 15px;
-            border-radius: 10px;
-            margin-bottom: 20px;
-            font-size: 0.9em;
-            word-break: break-all;
-        }
-        
-        .wallet-label {
-            opacity: 0.8;
-            margin-bottom: 5px;
-        }
-        
-        .status-box {
-            background: rgba(255,255,255,0.1);
-            color: white;
-            padding: 15px;
-            border-radius: 10px;
-            margin-bottom: 20px;
-            font-size: 0.9em;
-        }
-        
-        .status-box.error {
-            background: rgba(220,38,38,0.3);
-            border: 1px solid rgba(220,38,38,0.5);
-        }
-        
-        .status-box.success {
-            background: rgba(16,185,129,0.3);
-            border: 1px solid rgba(16,185,129,0.5);
-        }
-        
-        .refresh-btn {
-            background: #667eea;
-            color: white;
-            border: none;
-            padding: 12px 30px;
-            border-radius: 8px;
-            font-size: 1em;
-            cursor: pointer;
-            transition: background 0.3s;
-            margin-bottom: 20px;
-        }
-        
-        .refresh-btn:hover {
-            background: #764ba2;
-        }
-        
-        @media (max-width: 768px) {
-            h1 {
-                font-size: 1.8em;
-            }
-            
-            .stat-value {
-                font-size: 2em;
-            }
-            
-            .tasks-grid {
-                grid-template-columns: 1fr;
-            }
-        }
-    </style>
+    <link rel="stylesheet" href="{{ css_url }}">
 </head>
-<body>
+<body data-wallet="{{ wallet }}" data-contract="{{ contract }}" data-source="{{ source }}">
     <div class="container">
         <header>
             <h1>🎮 Play-to-Earn Dashboard</h1>
@@ -324,7 +199,7 @@ HTML_TEMPLATE = """
             <div class="stat-card">
                 <div class="stat-label">Tasks Completed</div>
                 <div class="stat-value" id="completed-tasks">0</div>
-                <div style="margin-top: 10px; color: #999; font-size: 0.9em;">Out of 3</div>
+                <div style="margin-top: 10px; color: #999; font-size: 0.9em;">Out of <span id="total-tasks">3</span></div>
             </div>
         </div>
         
@@ -336,105 +211,174 @@ HTML_TEMPLATE = """
         </div>
     </div>
     
-    <script>
-        const WALLET = "{{ wallet }}";
-        const CONTRACT = "{{ contract }}";
-        
-        function showStatus(message, isError = false) {
-            const statusBox = document.getElementById('status-box');
-            statusBox.textContent = message;
-            statusBox.className = isError ? 'status-box error' : 'status-box success';
-            statusBox.style.display = 'block';
-            setTimeout(() => {
-                statusBox.style.display = 'none';
-            }, 5000);
-        }
-        
-        function displayWallet() {
-            document.getElementById('wallet-address').textContent = WALLET;
-        }
-        
-        function renderTasks(tasks) {
-            const container = document.getElementById('tasks-container');
-            container.innerHTML = tasks.map(task => `
-                <div class="task-card ${task.completed ? 'completed' : ''}">
-                    <div class="task-header">
-                        <div class="task-title">${task.title}</div>
-                        <div class="task-difficulty ${task.difficulty.toLowerCase()}">
-                            ${task.difficulty}
-                        </div>
-                    </div>
-                    <div class="task-reward">+${task.reward} P2E Tokens</div>
-                    <div class="task-status">
-                        <span class="status-badge ${task.completed ? 'completed' : 'pending'}">
-                            ${task.completed ? '✅ Completed' : '⏳ Pending'}
-                        </span>
-                    </div>
-                </div>
-            `).join('');
-        }
-        
-        async function refreshData() {
-            try {
-                const response = await fetch('/api/balance');
-                const data = await response.json();
-                
-                if (data.error) {
-                    showStatus('⚠️ ' + data.error, true);
-                    document.getElementById('token-balance').textContent = 'Error';
-                } else {
-                    document.getElementById('token-balance').textContent = data.balance;
-                    document.getElementById('player-level').textContent = data.level;
-                    document.getElementById('completed-tasks').textContent = data.completed_tasks;
-                    renderTasks(data.tasks);
-                    showStatus('✅ Data refreshed successfully!', false);
-                }
-            } catch (error) {
-                console.error('Error fetching data:', error);
-                showStatus('❌ Connection failed. Is the server running on port 5000?', true);
-            }
-        }
-        
-        // Initial load
-        displayWallet();
-        refreshData();
-        
-        // Auto-refresh every 10 seconds
-        setInterval(refreshData, 10000);
-    </script>
+    <script src="{{ js_url }}"></script>
 </body>
 </html>
 """
 
+class PreparedBody:
+    """Response body with its ETag; the gzipped copy is made on first use and kept"""
+    __slots__ = ("body", "etag", "_gzipped")
+
+    def __init__(self, body: bytes):
+        self.body = body
+        self.etag = hashlib.sha1(body).hexdigest()
+        self._gzipped = None
+
+    def gzipped(self) -> bytes:
+        if self._gzipped is None:
+            self._gzipped = gzip.compress(self.body, compresslevel=GZIP_LEVEL)
+        return self._gzipped
+
+
+def load_static_assets():
+    """Read each asset once; returns name -> (content-hashed name, body, mimetype)"""
+    assets = {}
+    for name, mimetype in STATIC_ASSETS.items():
+        with open(os.path.join(STATIC_DIR, name), "rb") as f:
+            prepared = PreparedBody(f.read())
+        stem, extension = os.path.splitext(name)
+        assets[name] = (f"{stem}.{prepared.etag[:12]}{extension}", prepared, mimetype)
+    return assets
+
+
+static_assets = load_static_assets()
+hashed_assets = {hashed_name: (prepared, mimetype) for hashed_name, prepared, mimetype in static_assets.values()}
+
+# Compiled once; rendered pages are cached per wallet since everything dynamic comes from the API
+dashboard_template = app.jinja_env.from_string(HTML_TEMPLATE)
+page_cache = OrderedDict()
+page_cache_lock = threading.Lock()
+
+
+def asset_url(name):
+    return f"/assets/{static_assets[name][0]}"
+
+
+def dashboard_page(wallet, source):
+    key = (wallet, source)
+    with page_cache_lock:
+        page = page_cache.get(key)
+        if page is not None:
+            page_cache.move_to_end(key)
+            return page
+    page = PreparedBody(dashboard_template.render(
+        wallet=wallet,
+        contract=CONTRACT_ADDRESS,
+        source=source,
+        css_url=asset_url("dashboard.css"),
+        js_url=asset_url("dashboard.js")
+    ).encode())
+    with page_cache_lock:
+        page_cache[key] = page
+        if len(page_cache) > PAGE_CACHE_MAX_ENTRIES:
+            page_cache.popitem(last=False)
+    return page
+
+
+def conditional_response(prepared, mimetype, last_modified=None, max_age=None):
+    """Response with an ETag (and Last-Modified); 304 for unchanged polls, gzip for big bodies"""
+    response = Response(prepared.body, mimetype=mimetype)
+    set_cache_headers(response, prepared, last_modified, max_age)
+    response.make_conditional(request)
+    apply_gzip(response, prepared, request)
+    return response
+
+
+def set_cache_headers(response, prepared, last_modified=None, max_age=None):
+    # Weak: the gzip and identity encodings of the same body share a tag
+    response.set_etag(prepared.etag, weak=True)
+    if last_modified:
+        response.last_modified = datetime.fromisoformat(last_modified).astimezone()
+    if max_age:
+        response.cache_control.public = True
+        response.cache_control.max_age = max_age
+        response.cache_control.immutable = True
+    else:
+        # Clients may keep the body but must revalidate, which is what makes 304s possible
+        response.cache_control.no_cache = True
+    response.vary.add("Accept-Encoding")
+
+
+def apply_gzip(response, prepared, request):
+    """Swap in the gzipped body for a full (non-304) response when the client accepts it"""
+    if (response.status_code == 200 and len(prepared.body) >= GZIP_MIN_SIZE
+            and "gzip" in request.accept_encodings):
+        response.set_data(prepared.gzipped())
+        response.content_encoding = "gzip"
+
+
+def conditional_json(payload, last_modified=None):
+    body = json.dumps(payload, separators=(",", ":"), sort_keys=True).encode()
+    return conditional_response(PreparedBody(body), "application/json", last_modified)
+
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_seconds", "Dashboard request latency per route", ["route", "method", "status"]
+)
+
+
+def route_label(url_rule):
+    """The matched rule, so /api/players/<wallet> is one series instead of one per wallet"""
+    return url_rule.rule if url_rule is not None else "unmatched"
+
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+
+@app.after_request
+def record_request_latency(response):
+    started = g.pop("request_started", None)
+    if started is not None:
+        HTTP_REQUEST_SECONDS.labels(
+            route_label(request.url_rule), request.method, response.status_code
+        ).observe(time.perf_counter() - started)
+    return response
+
+
 @app.route('/')
 def dashboard():
-    return render_template_string(
-        HTML_TEMPLATE,
-        wallet=PLAYER_WALLET,
-        contract=CONTRACT_ADDRESS
-    )
+    return conditional_response(dashboard_page(PLAYER_WALLET, "legacy"), "text/html")
+
+@app.route('/players/<wallet>')
+def player_dashboard(wallet):
+    wallet, error = parse_wallet(wallet)
+    if error:
+        return error
+    return conditional_response(dashboard_page(wallet, "player"), "text/html")
+
+@app.route('/assets/<name>')
+def static_asset(name):
+    """CSS/JS from memory: hashed names are cached for a year, plain names are revalidated"""
+    if name in hashed_assets:
+        prepared, mimetype = hashed_assets[name]
+        return conditional_response(prepared, mimetype, max_age=STATIC_MAX_AGE)
+    if name in static_assets:
+        _, prepared, mimetype = static_assets[name]
+        return conditional_response(prepared, mimetype)
+    return jsonify({"error": "Not found"}), 404
 
 @app.route('/api/balance')
 def get_balance():
     try:
-        # Check if connected to Ganache
-        if not w3.is_connected():
-            return jsonify({
-                "error": "Not connected to blockchain. Is Ganache running on port 8545?"
-            }), 500
-        
         try:
-            # Try to get contract balance
-            contract = w3.eth.contract(
-                address=Web3.to_checksum_address(CONTRACT_ADDRESS),
-                abi=CONTRACT_ABI
-            )
-            balance = contract.functions.balanceOf(Web3.to_checksum_address(PLAYER_WALLET)).call()
+            # Try to get contract balance (shared cache, at most one RPC per block)
+            balance = chain().balance_cache.get_balance(PLAYER_WALLET)
         except Exception as contract_error:
+            # Only pay for a connectivity check once something has gone wrong
+            if not chain().w3.is_connected():
+                return jsonify({
+                    "error": "Not connected to blockchain. Is Ganache running on port 8545?"
+                }), 500
+            
             # If contract call fails, show wallet balance instead
-            balance = w3.eth.get_balance(Web3.to_checksum_address(PLAYER_WALLET))
-            print(f"Contract call failed: {str(contract_error)}")
-            print(f"Showing ETH wallet balance instead: {balance} Wei")
+            balance = chain().w3.eth.get_balance(Web3.to_checksum_address(PLAYER_WALLET))
+            _fallback_log.warning(
+                "Contract call failed (%s); showing ETH wallet balance instead: %s Wei",
+                contract_error, balance, extra={"wallet": PLAYER_WALLET}
+            )
         
         return jsonify({
             "balance": balance,
@@ -443,22 +387,140 @@ def get_balance():
             "tasks": game_data["tasks"]
         })
     except Exception as e:
-        print(f"Error in get_balance: {str(e)}")
+        log.error("Error in get_balance: %s", e)
         return jsonify({"error": str(e)}), 500
 
+def parse_wallet(wallet):
+    try:
+        return Web3.to_checksum_address(wallet), None
+    except ValueError as e:
+        return None, (jsonify({"error": f"Invalid wallet address: {e}"}), 400)
+
+@app.route('/api/players/<wallet>')
+def get_player(wallet):
+    """Game state and on-chain balance for one wallet, without the task list"""
+    wallet, error = parse_wallet(wallet)
+    if error:
+        return error
+    player = game_store.get_player(wallet)
+    if player is None:
+        return jsonify({"error": "Unknown player"}), 404
+    try:
+        player["balance"] = chain().balance_cache.get_balance(wallet)
+    except Exception as e:
+        log.error("Error in get_player: %s", e, extra={"wallet": wallet})
+        return jsonify({"error": str(e)}), 500
+    # No Last-Modified: the balance changes on-chain without touching updated_at, so only the ETag is reliable
+    del player["updated_at"]
+    return conditional_json(player)
+
+@app.route('/api/players/<wallet>/tasks')
+def get_player_tasks(wallet):
+    wallet, error = parse_wallet(wallet)
+    if error:
+        return error
+    player = game_store.get_player(wallet)
+    if player is None:
+        return jsonify({"error": "Unknown player"}), 404
+    return conditional_json(
+        {"wallet": wallet, "tasks": game_store.get_tasks(wallet)},
+        player["updated_at"]
+    )
+
+@app.route('/api/balances')
+def get_balances():
+    """Token balances for a comma-separated list of wallets, fetched in one round-trip"""
+    wallets = [w.strip() for w in request.args.get("wallets", "").split(",") if w.strip()]
+    if not wallets:
+        return jsonify({"error": "Pass wallets=<address>,<address>,..."}), 400
+    if len(wallets) > MAX_BALANCE_WALLETS:
+        return jsonify({"error": f"At most {MAX_BALANCE_WALLETS} wallets per request"}), 400
+    try:
+        wallets = [Web3.to_checksum_address(w) for w in wallets]
+    except ValueError as e:
+        return jsonify({"error": f"Invalid wallet address: {e}"}), 400
+    
+    try:
+        return jsonify({"balances": chain().balance_cache.get_balances(wallets)})
+    except Exception as e:
+        log.error("Error in get_balances: %s", e, extra={"wallets": len(wallets)})
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/history/<wallet>')
+def get_history(wallet):
+    """Reward history and total earned for a wallet, served from the local event index"""
+    try:
+        wallet = Web3.to_checksum_address(wallet)
+    except ValueError as e:
+        return jsonify({"error": f"Invalid wallet address: {e}"}), 400
+    event_indexer = chain().event_indexer
+    event_indexer.start(poll_interval=INDEXER_POLL_INTERVAL)
+    limit = min(max(request.args.get("limit", 50, type=int), 1), 500)
+    offset = max(request.args.get("offset", 0, type=int), 0)
+    return jsonify({
+        "wallet": wallet,
+        "total_earned": event_indexer.total_earned(wallet),
+        "indexed_to_block": event_indexer.last_indexed_block,
+        "history": event_indexer.history(wallet, limit=limit, offset=offset)
+    })
+
+@app.route('/api/leaderboard')
+def get_leaderboard():
+    """Players ranked by token balance, then level; pass wallet=<address> to include its rank"""
+    event_indexer = chain().event_indexer
+    leaderboard.start(
+        event_indexer, game_store, poll_interval=LEADERBOARD_LEVEL_POLL_INTERVAL,
+        balance_reader=chain().balance_cache.reader
+    )
+    event_indexer.start(poll_interval=INDEXER_POLL_INTERVAL)
+    limit = min(max(request.args.get("limit", 50, type=int), 1), LEADERBOARD_MAX_PAGE)
+    offset = max(request.args.get("offset", 0, type=int), 0)
+    result = {
+        "total": len(leaderboard),
+        "offset": offset,
+        "limit": limit,
+        "indexed_to_block": event_indexer.last_indexed_block,
+        "players": leaderboard.page(offset, limit)
+    }
+    wallet = request.args.get("wallet")
+    if wallet:
+        try:
+            result["player"] = leaderboard.entry(Web3.to_checksum_address(wallet))
+        except ValueError as e:
+            return jsonify({"error": f"Invalid wallet address: {e}"}), 400
+    return jsonify(result)
+
 @app.route('/api/update-task/<int:task_id>')
 def update_task(task_id):
     for task in game_data["tasks"]:
         if task["id"] == task_id:
-            task["completed"] = True
+            if not task["completed"]:
+                task["completed"] = True
+                broadcaster.publish("task", task)
             break
     return jsonify({"status": "updated"})
 
+@app.route('/api/stream')
+def stream():
+    """Server-Sent Events feed of balance and task changes"""
+    chain().block_watcher.start()
+    return Response(
+        broadcaster.stream(keepalive=STREAM_KEEPALIVE),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.route('/metrics')
+def metrics():
+    """Prometheus scrape endpoint"""
+    return Response(REGISTRY.render(), content_type=METRICS_CONTENT_TYPE)
+
 if __name__ == '__main__':
-    print("Starting Play-to-Earn Web Dashboard...")
-    print(f"RPC URL: {RPC_URL}")
-    print(f"Contract: {CONTRACT_ADDRESS}")
-    print(f"Player Wallet: {PLAYER_WALLET}")
-    print("Open your browser and go to: http://localhost:5000")
-    print("Make sure Ganache is running on port 8545!")
+    configure_logging()
+    log.info("Starting Play-to-Earn Web Dashboard...")
+    log.info("RPC URLs: %s", ", ".join(RPC_URLS))
+    log.info("Contract: %s", CONTRACT_ADDRESS)
+    log.info("Player Wallet: %s", PLAYER_WALLET)
+    log.info("Open your browser and go to: http://localhost:5000")
+    log.info("Make sure Ganache is running on port 8545!")
     app.run(debug=True, port=5000)
\ No newline at end of file